@@ -1,4 +1,13 @@
-"""Critic Agent module."""
-from .critic import CriticAgent, create_critic_agent, evaluate_answer
-
-__all__ = ["CriticAgent", "create_critic_agent", "evaluate_answer"]
+"""Critic Agent module."""
+from .critic import (
+    CriticAgent, APPROVED_VERDICTS, is_approved, critique_score, create_critic_agent, evaluate_answer,
+    critic_parse_stats, record_parse_failure_retry
+)
+from .schema import Critique, Verdict, normalize_verdict
+from .tiered import TieredCritic, assess_risk, critic_tier_stats
+
+__all__ = [
+    "CriticAgent", "APPROVED_VERDICTS", "is_approved", "critique_score", "create_critic_agent", "evaluate_answer",
+    "critic_parse_stats", "record_parse_failure_retry", "Critique", "Verdict", "normalize_verdict",
+    "TieredCritic", "assess_risk", "critic_tier_stats"
+]
@@ -1,45 +1,124 @@
 """Critic Agent implementation using LangChain and Google Generative AI."""
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 import json
-from langchain_google_genai import ChatGoogleGenerativeAI
-from backend.config import GEMINI_API_KEY
-from .prompts import CRITIC_SYSTEM_PROMPT
+import re
+import threading
+from pydantic import ValidationError
+from backend.config import GEMINI_API_KEY, CRITIC_MODE, CRITIC_PRECHECK_MODEL, CRITIC_STRUCTURED_OUTPUT
+from backend.llm import get_llm, registry
+from .prompts import CRITIC_SYSTEM_PROMPT, CRITIC_REPAIR_PROMPT
+from .schema import APPROVED_VERDICTS, Critique, Verdict, normalize_verdict
 from .tools import get_critic_tools
 from langchain.agents import create_agent
+from langchain.agents.structured_output import ToolStrategy
+from langchain_core.messages import HumanMessage, SystemMessage
+
+_stats_lock = threading.Lock()
+# How each critique was obtained, and how many revisions an unusable verdict still caused
+_parse_stats = {"structured": 0, "parsed": 0, "repaired": 0, "failed": 0, "parse_failure_retries": 0}
+
+
+def _count(outcome: str) -> None:
+    with _stats_lock:
+        _parse_stats[outcome] += 1
+
+
+def record_parse_failure_retry() -> None:
+    """Count a revision cycle started only because a verdict couldn't be understood."""
+    _count("parse_failure_retries")
+
+
+def critic_parse_stats() -> Dict[str, int]:
+    """Return how critiques were parsed: schema-enforced, from text, repaired or failed."""
+    with _stats_lock:
+        return dict(_parse_stats)
+
+
+def is_approved(critique: Dict[str, Any]) -> bool:
+    """Whether a critique's verdict approves the answer."""
+    verdict = critique.get("verdict", "") if isinstance(critique, dict) else ""
+    return normalize_verdict(verdict) == Verdict.GOOD
+
+
+def extract_json(output: str) -> Optional[Dict[str, Any]]:
+    """Pull a JSON object out of model text (bare, in a code block or embedded), or None."""
+    candidates = [output]
+    block = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', output, re.DOTALL)
+    if block:
+        candidates.append(block.group(1))
+    embedded = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', output, re.DOTALL)
+    if embedded:
+        candidates.append(embedded.group(0))
+    for candidate in candidates:
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(parsed, dict):
+            return parsed
+    return None
+
+
+def critique_score(critique: Dict[str, Any]) -> float:
+    """Return a critique's 0-10 quality score.
+    
+    Critiques without a usable score get a neutral 5 if approved and 0 otherwise.
+    """
+    score = critique.get("score") if isinstance(critique, dict) else None
+    try:
+        return min(max(float(score), 0.0), 10.0)
+    except (TypeError, ValueError):
+        return 5.0 if is_approved(critique) else 0.0
 
 
 class CriticAgent:
-    """Critic Agent that evaluates responses using LangChain and Google Gemini."""
+    """Critic Agent that evaluates responses using LangChain and Google Gemini.
+    
+    The agent must end with a Critique (schema-enforced through a structured
+    output tool, which the agent retries on validation errors). If it ends
+    with plain text instead, the text is parsed against the same schema and,
+    failing that, converted by one repair call without tools. Output that
+    still can't be read yields an "error" verdict, which ends the revision
+    loop instead of paying for another responder+critic cycle.
+    """
     
-    def __init__(self, model_name: str = "gemini-2.0-flash", temperature: float = 0.3):
+    def __init__(
+        self,
+        model_name: str = "gemini-2.0-flash",
+        temperature: float = 0.3,
+        tools: Optional[List] = None,
+        structured_output: bool = CRITIC_STRUCTURED_OUTPUT
+    ):
         """Initialize the Critic Agent.
         
         Args:
             model_name: Google Gemini model to use
             temperature: Temperature for generation (lower = more deterministic)
+            tools: Optional tool list (defaults to the shared critic tools)
+            structured_output: Enforce the Critique schema on the agent's final answer
         """
         if not GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY is required for CriticAgent")
         
-        # Initialize the LLM
-        self.llm = ChatGoogleGenerativeAI(
-            model=model_name,
-            temperature=temperature,
-            google_api_key=GEMINI_API_KEY
-        )
+        # Shared LLM client from the process-wide registry
+        self.llm = get_llm(model_name=model_name, temperature=temperature)
         
         # Get tools
-        self.tools = get_critic_tools()
+        self.tools = tools if tools is not None else get_critic_tools()
         
         # Create the agent using the modern create_agent API
+        self.structured_output = structured_output
         self.agent = create_agent(
             model=self.llm,
             tools=self.tools,
-            system_prompt=CRITIC_SYSTEM_PROMPT
+            system_prompt=CRITIC_SYSTEM_PROMPT,
+            response_format=ToolStrategy(Critique) if structured_output else None
         )
+        # Tool-less repair pass for final answers that don't match the schema
+        self.repair_llm = self.llm.with_structured_output(Critique)
     
-    def evaluate(self, question: str, answer: str, context: Optional[str] = None) -> Dict[str, Any]:
-        """Evaluate an answer using the critic agent.
+    def _build_evaluation_message(self, question: str, answer: str, context: Optional[str] = None) -> str:
+        """Build the user message sent to the critic agent.
         
         Args:
             question: The original question that was asked
@@ -47,7 +126,7 @@ class CriticAgent:
             context: Optional additional context (can include memory/conversation history)
             
         Returns:
-            Dictionary with verdict, feedback, evidence, and sources
+            The evaluation prompt
         """
         from datetime import datetime
         current_date = datetime.now().strftime("%B %d, %Y")
@@ -64,89 +143,181 @@ Answer to Evaluate:
         if context:
             user_message += f"\nAdditional Context:\n{context}"
         
-        user_message += """
+        if self.structured_output:
+            user_message += """
+
+Please evaluate this answer and report your critique through the Critique output (verdict, score, feedback, evidence, sources)."""
+        else:
+            user_message += """
 
-Please evaluate this answer and provide your critique in JSON format with keys: verdict, feedback, evidence, sources.
+Please evaluate this answer and provide your critique in JSON format with keys: verdict, score, feedback, evidence, sources."""
+        user_message += """
 CRITICAL: Do NOT reject answers just because they mention recent dates. If the answer contains factual information based on search results, approve it with verdict 'good'."""
+        return user_message
+    
+    def _final_output(self, result: Dict[str, Any]) -> str:
+        messages = result.get("messages", [])
+        if not messages:
+            return ""
+        content = getattr(messages[-1], "content", messages[-1])
+        return content if isinstance(content, str) else str(content)
+    
+    def _structured_critique(self, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the schema-enforced critique, or the final text parsed against the schema."""
+        structured = result.get("structured_response")
+        if isinstance(structured, Critique):
+            _count("structured")
+            return structured.as_dict()
+        critique = self._parse_json_output(self._final_output(result))
+        if critique is not None:
+            _count("parsed")
+        return critique
+    
+    def _repair_messages(self, output: str) -> List:
+        return [SystemMessage(content=CRITIC_REPAIR_PROMPT), HumanMessage(content=output)]
+    
+    def _repaired_critique(self, repaired: Any, output: str) -> Dict[str, Any]:
+        if isinstance(repaired, Critique):
+            _count("repaired")
+            print(f"[CRITIC] Repaired unstructured critique: {repaired.verdict}")
+            return repaired.as_dict()
+        return self._unparsed_critique(output)
+    
+    def _unparsed_critique(self, output: str) -> Dict[str, Any]:
+        _count("failed")
+        print(f"[CRITIC] Could not read critique, ending review: {output[:200]}")
+        return {
+            "verdict": Verdict.ERROR.value,
+            "feedback": output or "The critic returned no critique.",
+            "evidence": [],
+            "sources": []
+        }
+    
+    def _critique_from_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the critique from the agent's result, repairing unstructured output."""
+        critique = self._structured_critique(result)
+        if critique is not None:
+            return critique
+        output = self._final_output(result)
+        try:
+            return self._repaired_critique(self.repair_llm.invoke(self._repair_messages(output)), output)
+        except Exception as e:
+            print(f"[CRITIC] Repair pass error: {type(e).__name__}: {e}")
+            return self._unparsed_critique(output)
+    
+    async def _acritique_from_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of _critique_from_result."""
+        critique = self._structured_critique(result)
+        if critique is not None:
+            return critique
+        output = self._final_output(result)
+        try:
+            return self._repaired_critique(await self.repair_llm.ainvoke(self._repair_messages(output)), output)
+        except Exception as e:
+            print(f"[CRITIC] Repair pass error: {type(e).__name__}: {e}")
+            return self._unparsed_critique(output)
+    
+    def _error_critique(self, e: Exception) -> Dict[str, Any]:
+        return {
+            "verdict": Verdict.ERROR.value,
+            "feedback": f"Error during evaluation: {str(e)}",
+            "evidence": [],
+            "sources": []
+        }
+    
+    def evaluate(self, question: str, answer: str, context: Optional[str] = None) -> Dict[str, Any]:
+        """Evaluate an answer using the critic agent.
+        
+        Args:
+            question: The original question that was asked
+            answer: The answer to evaluate
+            context: Optional additional context (can include memory/conversation history)
+            
+        Returns:
+            Dictionary with verdict, score, feedback, evidence, and sources
+        """
+        user_message = self._build_evaluation_message(question, answer, context)
         
         try:
             # Invoke the agent with messages
             result = self.agent.invoke({
                 "messages": [{"role": "user", "content": user_message}]
             })
+            return self._critique_from_result(result)
             
-            # Extract the final message content
-            messages = result.get("messages", [])
-            if messages:
-                last_message = messages[-1]
-                output = last_message.content if hasattr(last_message, 'content') else str(last_message)
-            else:
-                output = "{}"
-            
-            # Try to extract JSON from the output
-            critique = self._parse_json_output(output)
+        except Exception as e:
+            return self._error_critique(e)
+    
+    async def aevaluate(self, question: str, answer: str, context: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of evaluate that does not block the event loop.
+        
+        Args:
+            question: The original question that was asked
+            answer: The answer to evaluate
+            context: Optional additional context (can include memory/conversation history)
             
-            return critique
+        Returns:
+            Dictionary with verdict, score, feedback, evidence, and sources
+        """
+        user_message = self._build_evaluation_message(question, answer, context)
+        
+        try:
+            result = await self.agent.ainvoke({
+                "messages": [{"role": "user", "content": user_message}]
+            })
+            return await self._acritique_from_result(result)
             
         except Exception as e:
-            return {
-                "verdict": "error",
-                "feedback": f"Error during evaluation: {str(e)}",
-                "evidence": [],
-                "sources": []
-            }
-    
-    def _parse_json_output(self, output: str) -> Dict[str, Any]:
-        """Parse JSON output from the agent response.
+            return self._error_critique(e)
+    
+    def _parse_json_output(self, output: str) -> Optional[Dict[str, Any]]:
+        """Parse a critique from the agent's text output.
         
         Args:
             output: The agent's output string
             
         Returns:
-            Parsed dictionary or default structure
+            The critique if the text holds JSON matching the Critique schema, else None
         """
-        # Try to find JSON in the output
+        parsed = extract_json(output)
+        if parsed is None:
+            return None
         try:
-            # First try direct parsing
-            return json.loads(output)
-        except json.JSONDecodeError:
-            # Try to extract JSON from markdown code blocks
-            import re
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', output, re.DOTALL)
-            if json_match:
-                try:
-                    return json.loads(json_match.group(1))
-                except json.JSONDecodeError:
-                    pass
-            
-            # Try to find any JSON object in the text
-            json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', output, re.DOTALL)
-            if json_match:
-                try:
-                    return json.loads(json_match.group(0))
-                except json.JSONDecodeError:
-                    pass
-        
-        # Return the output as feedback if we can't parse it
-        return {
-            "verdict": "needs_revision",
-            "feedback": output,
-            "evidence": [],
-            "sources": []
-        }
+            return Critique.model_validate(parsed).as_dict()
+        except ValidationError:
+            return None
 
 
-def create_critic_agent(model_name: str = "gemini-2.0-flash", temperature: float = 0.3) -> CriticAgent:
-    """Factory function to create a CriticAgent instance.
+def create_critic_agent(model_name: str = "gemini-2.0-flash", temperature: float = 0.3, mode: str = CRITIC_MODE):
+    """Factory function returning the shared critic for this configuration.
+    
+    Agents are built once per (model name, temperature, tool set) and kept in the
+    process-wide client registry; use registry.clear("critic") to rebuild them.
     
     Args:
         model_name: Google Gemini model to use
         temperature: Temperature for generation
+        mode: "full" for the tool-using critic alone, "tiered" to put the cheap
+            pre-check tiers in front of it
         
     Returns:
-        Initialized CriticAgent instance
+        Initialized CriticAgent, or a TieredCritic wrapping one
     """
-    return CriticAgent(model_name=model_name, temperature=temperature)
+    tools = get_critic_tools()
+    tool_set = tuple(getattr(t, "name", type(t).__name__) for t in tools)
+    full_critic = registry.get_or_create(
+        ("critic", model_name, temperature, tool_set),
+        lambda: CriticAgent(model_name=model_name, temperature=temperature, tools=tools)
+    )
+    if mode != "tiered":
+        return full_critic
+    
+    # Imported here: the tiered module builds on this one
+    from .tiered import TieredCritic
+    return registry.get_or_create(
+        ("critic", "tiered", model_name, temperature, tool_set, CRITIC_PRECHECK_MODEL),
+        lambda: TieredCritic(full_critic, precheck_model=CRITIC_PRECHECK_MODEL)
+    )
 
 
 def evaluate_answer(question: str, answer: str, context: Optional[str] = None) -> Dict[str, Any]:
@@ -158,7 +329,7 @@ def evaluate_answer(question: str, answer: str, context: Optional[str] = None) -
         context: Optional additional context
         
     Returns:
-        Dictionary with verdict, feedback, evidence, and sources
+        Dictionary with verdict, score, feedback, evidence, and sources
     """
     agent = create_critic_agent()
     return agent.evaluate(question=question, answer=answer, context=context)
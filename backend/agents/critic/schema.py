@@ -0,0 +1,65 @@
+"""Typed critic verdicts and the critique schema the critic model must follow."""
+from typing import Any, Dict, List, Literal, Optional
+import enum
+from pydantic import BaseModel, Field, field_validator
+
+
+class Verdict(str, enum.Enum):
+    GOOD = "good"
+    NEEDS_REVISION = "needs_revision"
+    # Set by the code, never by the model: the critic failed or its output was unusable
+    ERROR = "error"
+
+
+# Verdict spellings seen from models, mapped onto the typed verdicts
+APPROVED_VERDICTS = ['good', 'approved', 'acceptable', 'pass', 'ok', 'correct', 'accurate', 'satisfactory']
+REVISION_VERDICTS = ['needs_revision', 'revise', 'improve', 'needs improvement', 'needs_improvement',
+                     'incorrect', 'wrong', 'incomplete', 'inaccurate', 'poor', 'bad', 'fail', 'rejected']
+
+
+def normalize_verdict(verdict: Any) -> Optional[Verdict]:
+    """Map a raw verdict onto Verdict, or None if it isn't recognised."""
+    if isinstance(verdict, Verdict):
+        return verdict
+    if not isinstance(verdict, str):
+        return None
+    verdict = verdict.lower().strip()
+    if verdict in APPROVED_VERDICTS:
+        return Verdict.GOOD
+    if verdict in REVISION_VERDICTS:
+        return Verdict.NEEDS_REVISION
+    if verdict == Verdict.ERROR.value:
+        return Verdict.ERROR
+    return None
+
+
+class Critique(BaseModel):
+    """A critic's judgement of one answer."""
+
+    verdict: Literal["good", "needs_revision"] = Field(
+        description='"good" to approve the answer, "needs_revision" to send it back'
+    )
+    # Optional so a critique missing only its score still validates; critique_score then falls back to a neutral value
+    score: Optional[float] = Field(
+        default=None, ge=0, le=10, description="Overall quality from 0 (useless or wrong) to 10 (flawless)"
+    )
+    feedback: str = Field(description="Explanation of the judgement, citing specific issues or virtues")
+    evidence: List[str] = Field(default_factory=list, description="Facts and observations supporting the verdict")
+    sources: List[str] = Field(default_factory=list, description="URLs from search results, when applicable")
+
+    @field_validator("verdict", mode="before")
+    @classmethod
+    def _canonical_verdict(cls, value: Any) -> Any:
+        verdict = normalize_verdict(value)
+        return verdict.value if verdict is not None and verdict != Verdict.ERROR else value
+
+    @field_validator("evidence", "sources", mode="before")
+    @classmethod
+    def _as_list(cls, value: Any) -> Any:
+        if value is None:
+            return []
+        return [value] if isinstance(value, str) else value
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the critique in the dictionary form the graph passes around."""
+        return self.model_dump()
@@ -1,16 +1,28 @@
-from langchain_tavily import TavilySearch
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 import os
 from backend.config import TAVILY_API_KEY
+from backend.llm import registry
+from backend.search_cache import search_cache
 
 def get_critic_tools():
-    """Returns the tools available for the critic agent."""
+    """Returns the tools available for the critic agent (shared via the client registry)."""
+    return registry.get_or_create(("tools", "critic"), _build_critic_tools)
+
+def _build_critic_tools():
     if TAVILY_API_KEY:
         os.environ["TAVILY_API_KEY"] = TAVILY_API_KEY
     
-    web_search = TavilySearch(
-        max_results=5,
-        topic="general",
+    # Searches go through the shared search cache, so the critic's verification
+    # queries reuse the responder's results and each other's across revisions
+    def search(query: str):
+        return search_cache.search(query, topic="general", max_results=5)
+    
+    async def asearch(query: str):
+        return await search_cache.asearch(query, topic="general", max_results=5)
+    
+    web_search = StructuredTool.from_function(
+        func=search,
+        coroutine=asearch,
         name="web_search",
         description="""Use this tool to search the web and verify facts, claims, or information.
         
@@ -0,0 +1,93 @@
+"""Per-turn deadline and token budget for the responder/critic loop."""
+from typing import Any, Dict, Optional
+from contextvars import ContextVar
+import time
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from backend.config import CHAT_DEADLINE_SECONDS, CHAT_TOKEN_BUDGET
+
+# Weight of the newest observation in the per-node moving averages
+_SMOOTHING = 0.5
+
+# Every chat model call made while a tracker is active reports its token usage to it
+_usage_callback: ContextVar[Optional[UsageMetadataCallbackHandler]] = ContextVar("turn_usage_callback", default=None)
+register_configure_hook(_usage_callback, inheritable=True)
+
+
+def turn_deadline(deadline_seconds: Optional[float] = None) -> Optional[float]:
+    """Return the time.monotonic() deadline for a turn starting now (None = no deadline)."""
+    seconds = CHAT_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+    return time.monotonic() + seconds if seconds and seconds > 0 else None
+
+
+def turn_token_budget(token_budget: Optional[int] = None) -> Optional[int]:
+    """Return the token budget for a turn (None = unlimited)."""
+    budget = CHAT_TOKEN_BUDGET if token_budget is None else token_budget
+    return budget if budget and budget > 0 else None
+
+
+class NodeUsage:
+    """Context manager measuring one node run: wall time and LLM tokens spent."""
+
+    def __enter__(self) -> "NodeUsage":
+        self.handler = UsageMetadataCallbackHandler()
+        self._token = _usage_callback.set(self.handler)
+        self._started = time.monotonic()
+        self.seconds = 0.0
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.seconds = time.monotonic() - self._started
+        _usage_callback.reset(self._token)
+
+    @property
+    def tokens(self) -> int:
+        return sum(usage.get("total_tokens", 0) for usage in self.handler.usage_metadata.values())
+
+
+def cost_update(state: Dict[str, Any], node: str, usage: NodeUsage) -> Dict[str, Any]:
+    """Fold a node run into the state's observed per-node latency and token averages."""
+    latency = dict(state.get("node_latency") or {})
+    tokens = dict(state.get("node_tokens") or {})
+    latency[node] = usage.seconds if node not in latency else (
+        _SMOOTHING * usage.seconds + (1 - _SMOOTHING) * latency[node]
+    )
+    tokens[node] = usage.tokens if node not in tokens else (
+        _SMOOTHING * usage.tokens + (1 - _SMOOTHING) * tokens[node]
+    )
+    return {"node_latency": latency, "node_tokens": tokens, "tokens_used": usage.tokens}
+
+
+def budget_status(state: Dict[str, Any], cost: Dict[str, Any], cycle_nodes=("responder", "critic")) -> Dict[str, Any]:
+    """Report what is left of the turn's deadline and token budget.
+
+    Args:
+        state: Graph state before the current node's update
+        cost: The current node's cost_update
+        cycle_nodes: Nodes that make up one more revision cycle
+
+    Returns:
+        Dictionary with remaining seconds/tokens (None when unlimited), the estimated
+        cost of another cycle and whether that cycle no longer fits
+    """
+    cycle_seconds = sum(cost["node_latency"].get(node, 0.0) for node in cycle_nodes)
+    cycle_tokens = sum(cost["node_tokens"].get(node, 0.0) for node in cycle_nodes)
+    tokens_used = state.get("tokens_used", 0) + cost["tokens_used"]
+
+    deadline = state.get("deadline")
+    token_budget = state.get("token_budget")
+    remaining_seconds = deadline - time.monotonic() if deadline is not None else None
+    remaining_tokens = token_budget - tokens_used if token_budget is not None else None
+
+    exhausted = (
+        (remaining_seconds is not None and remaining_seconds < cycle_seconds)
+        or (remaining_tokens is not None and remaining_tokens < cycle_tokens)
+    )
+    return {
+        "remaining_seconds": round(remaining_seconds, 2) if remaining_seconds is not None else None,
+        "remaining_tokens": remaining_tokens,
+        "tokens_used": tokens_used,
+        "estimated_cycle_seconds": round(cycle_seconds, 2),
+        "estimated_cycle_tokens": round(cycle_tokens),
+        "exhausted": exhausted
+    }
@@ -9,6 +9,10 @@ AIVEN_DATABASE_URL = os.getenv("AIVEN_DATABASE_URL", "")
 if not AIVEN_DATABASE_URL:
     raise ValueError("AIVEN_DATABASE_URL environment variable is required")
 
+# Async connection pool; concurrent DB work is bounded by size + overflow
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY", "")
@@ -16,3 +20,98 @@ HF_TOKEN = os.getenv("HF_TOKEN", "")
 CHROMA_API_KEY = os.getenv("CHROMA_API_KEY", "")
 CHROMA_TENANT = os.getenv("CHROMA_TENANT", "")
 CHROMA_DATABASE = os.getenv("CHROMA_DATABASE", "")
+
+# Long-term memory vector store: "chroma_cloud", "chroma_local" (embedded, on disk),
+# "in_memory" or "numpy" (in-process index persisted as memory-mapped files)
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "chroma_cloud")
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "chroma_data")
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", "memory_index")
+
+# Max number of LongTermMemoryStore instances kept alive (one per memory collection)
+MEMORY_STORE_CACHE_SIZE = int(os.getenv("MEMORY_STORE_CACHE_SIZE", "256"))
+
+# Content-addressed embedding cache: in-memory LRU size and optional SQLite file ("" disables the disk tier)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+
+# Per-source deadlines (seconds) for the concurrent context prefetch stage
+PREFETCH_MEMORY_TIMEOUT = float(os.getenv("PREFETCH_MEMORY_TIMEOUT", "3"))
+PREFETCH_SEARCH_TIMEOUT = float(os.getenv("PREFETCH_SEARCH_TIMEOUT", "6"))
+PREFETCH_HISTORY_TIMEOUT = float(os.getenv("PREFETCH_HISTORY_TIMEOUT", "2"))
+
+# Web search result cache: TTLs (seconds) per freshness class and max cached queries
+SEARCH_CACHE_NEWS_TTL = float(os.getenv("SEARCH_CACHE_NEWS_TTL", "300"))
+SEARCH_CACHE_EVERGREEN_TTL = float(os.getenv("SEARCH_CACHE_EVERGREEN_TTL", "21600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048"))
+
+# Semantic response cache (off by default): on/off, min cosine similarity for a hit, entry TTL (seconds) and max cached answers
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.96"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+# Longest a lookup may wait on the query embedding (seconds) before the turn skips the cache
+RESPONSE_CACHE_EMBED_TIMEOUT = float(os.getenv("RESPONSE_CACHE_EMBED_TIMEOUT", "1.5"))
+
+# Write-behind memory ingestion: max items per flush, flush interval (seconds), retries and queue bound
+MEMORY_INGEST_BATCH_SIZE = int(os.getenv("MEMORY_INGEST_BATCH_SIZE", "64"))
+MEMORY_INGEST_FLUSH_INTERVAL = float(os.getenv("MEMORY_INGEST_FLUSH_INTERVAL", "1.0"))
+MEMORY_INGEST_MAX_RETRIES = int(os.getenv("MEMORY_INGEST_MAX_RETRIES", "3"))
+MEMORY_INGEST_MAX_QUEUE = int(os.getenv("MEMORY_INGEST_MAX_QUEUE", "10000"))
+
+# Write-behind persistence of streamed chat turns: max turns per flush, flush interval (seconds), retries and queue bound
+TURN_PERSIST_BATCH_SIZE = int(os.getenv("TURN_PERSIST_BATCH_SIZE", "100"))
+TURN_PERSIST_FLUSH_INTERVAL = float(os.getenv("TURN_PERSIST_FLUSH_INTERVAL", "0.5"))
+TURN_PERSIST_MAX_RETRIES = int(os.getenv("TURN_PERSIST_MAX_RETRIES", "3"))
+TURN_PERSIST_MAX_QUEUE = int(os.getenv("TURN_PERSIST_MAX_QUEUE", "5000"))
+
+# Critic mode: "full" runs the tool-using critic on every draft, "tiered" lets a rules
+# scorer or a small model approve low-risk drafts first. Risk thresholds are 0..1.
+CRITIC_MODE = os.getenv("CRITIC_MODE", "full")
+CRITIC_PRECHECK_MODEL = os.getenv("CRITIC_PRECHECK_MODEL", "gemini-2.0-flash-lite")
+CRITIC_RULES_MAX_RISK = float(os.getenv("CRITIC_RULES_MAX_RISK", "0.1"))
+CRITIC_PRECHECK_MAX_RISK = float(os.getenv("CRITIC_PRECHECK_MAX_RISK", "0.4"))
+# Enforce the Critique schema (typed verdict, score, feedback...) on the full critic's final answer
+CRITIC_STRUCTURED_OUTPUT = os.getenv("CRITIC_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+# Speculative revision: generate the next draft while the critic is still reviewing the current one
+SPECULATIVE_REVISION = os.getenv("SPECULATIVE_REVISION", "false").lower() == "true"
+
+# Graph mode: "revise" runs the responder/critic revision loop, "best_of_n" writes BEST_OF_N drafts
+# in parallel (temperatures cycled from BEST_OF_N_TEMPERATURES), has the critic score them all and keeps the best
+GRAPH_MODE = os.getenv("GRAPH_MODE", "revise")
+BEST_OF_N = int(os.getenv("BEST_OF_N", "3"))
+BEST_OF_N_TEMPERATURES = [float(t) for t in os.getenv("BEST_OF_N_TEMPERATURES", "0.3,0.7,1.0").split(",") if t.strip()]
+
+# Per-turn limits for the revision loop (overridable per request): wall-clock deadline in seconds
+# and LLM token budget. The loop stops revising once another cycle would not fit; 0 disables a limit.
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "120"))
+CHAT_TOKEN_BUDGET = int(os.getenv("CHAT_TOKEN_BUDGET", "0"))
+
+# In-process short-term memory: messages kept per group, max buffered groups and max total characters
+SHORT_MEMORY_MESSAGES = int(os.getenv("SHORT_MEMORY_MESSAGES", "20"))
+SHORT_MEMORY_MAX_GROUPS = int(os.getenv("SHORT_MEMORY_MAX_GROUPS", "1000"))
+SHORT_MEMORY_MAX_CHARS = int(os.getenv("SHORT_MEMORY_MAX_CHARS", "4000000"))
+
+# Model that writes the answers (responder, revisions and best-of-N drafts); the prompt budget
+# below counts tokens for this model
+RESPONDER_MODEL = os.getenv("RESPONDER_MODEL", "gemini-2.0-flash")
+
+# Responder prompt budget (tokens): total context window to use, and the part reserved for the
+# system prompt, question and critic feedback before memory/search/history/draft are fitted in
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "12000"))
+CONTEXT_PROMPT_RESERVE = int(os.getenv("CONTEXT_PROMPT_RESERVE", "1500"))
+
+# Rolling conversation summaries: on/off, model that folds new turns in, summary length (words),
+# how long the worker waits (seconds) for more turns before folding, retries, queue bound, cached groups
+# and how many groups are folded (one LLM call each) at once
+SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gemini-2.0-flash-lite")
+SUMMARY_MAX_WORDS = int(os.getenv("SUMMARY_MAX_WORDS", "200"))
+SUMMARY_FLUSH_INTERVAL = float(os.getenv("SUMMARY_FLUSH_INTERVAL", "2.0"))
+SUMMARY_MAX_RETRIES = int(os.getenv("SUMMARY_MAX_RETRIES", "2"))
+SUMMARY_MAX_QUEUE = int(os.getenv("SUMMARY_MAX_QUEUE", "5000"))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "1000"))
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+
+# Query intent router: score (0..1) a memory or search intent needs before it is acted on
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "0.5"))
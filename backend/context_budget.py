@@ -0,0 +1,113 @@
+"""Token budgeting for the responder prompt's context sections."""
+from typing import Dict, List, Optional
+import math
+from backend.config import CONTEXT_MAX_TOKENS, CONTEXT_PROMPT_RESERVE
+
+# Average characters per token by model family; used instead of a remote count_tokens call
+_CHARS_PER_TOKEN = {
+    "gemini": 4.0,
+    "gpt": 4.0,
+    "claude": 3.5,
+}
+_DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Share of the context budget each section may claim before spare tokens are handed out,
+# in the order spare tokens are handed out (most valuable first)
+SECTION_SHARES = {
+    "search": 0.35,
+    "memory": 0.25,
+    "history": 0.2,
+    "draft": 0.2,
+}
+
+# Items that would be cut below this many tokens are dropped instead
+MIN_ITEM_TOKENS = 24
+
+
+def _chars_per_token(model_name: str) -> float:
+    for family, ratio in _CHARS_PER_TOKEN.items():
+        if model_name.lower().startswith(family):
+            return ratio
+    return _DEFAULT_CHARS_PER_TOKEN
+
+
+class ContextBudget:
+    """Splits a model's prompt budget across context sections and fits text to it.
+
+    The system prompt, question and other fixed text are reserved first. The
+    rest is shared between search results, memories, conversation history and
+    the previous draft: each section gets what it needs up to its share, and
+    tokens a section doesn't need go to the others in SECTION_SHARES order.
+    Within a section, items are taken in order of value and the lowest-value
+    ones are cut short or dropped once the section is full.
+    """
+
+    def __init__(self, model_name: str = "gemini-2.0-flash", max_tokens: int = CONTEXT_MAX_TOKENS):
+        self.model_name = model_name
+        self.max_tokens = max_tokens
+        self._ratio = _chars_per_token(model_name)
+
+    def count(self, text: Optional[str]) -> int:
+        """Estimate how many tokens text takes for this model."""
+        return math.ceil(len(text) / self._ratio) if text else 0
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens, at a word boundary."""
+        if self.count(text) <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+        cut = text[:int(max_tokens * self._ratio) - 1]
+        if " " in cut:
+            cut = cut[:cut.rfind(" ")]
+        return cut.rstrip() + "…"
+
+    def fit(self, items: List[str], max_tokens: int, max_item_tokens: Optional[int] = None) -> List[str]:
+        """Keep items (most valuable first) until max_tokens is used up.
+
+        Args:
+            items: Candidate items ordered by value, highest first
+            max_tokens: Tokens available for all items together
+            max_item_tokens: Optional cap on any single item
+
+        Returns:
+            The items that fit; the last one may be truncated
+        """
+        fitted = []
+        remaining = max_tokens
+        for item in items:
+            limit = min(remaining, max_item_tokens) if max_item_tokens else remaining
+            if self.count(item) <= limit:
+                fitted.append(item)
+                remaining -= self.count(item)
+            elif limit >= MIN_ITEM_TOKENS:
+                fitted.append(self.truncate(item, limit))
+                remaining -= limit
+            if remaining < MIN_ITEM_TOKENS:
+                break
+        return fitted
+
+    def allocate(self, demands: Dict[str, int], reserved: int = CONTEXT_PROMPT_RESERVE) -> Dict[str, int]:
+        """Split the tokens left after reserved between sections.
+
+        Args:
+            demands: Tokens each section would use untrimmed. Sections left out
+                (e.g. the draft, which doesn't exist yet) are given their full share.
+            reserved: Tokens set aside for the system prompt, question and feedback
+
+        Returns:
+            Token allocation per section in SECTION_SHARES
+        """
+        available = max(0, self.max_tokens - reserved)
+        shares = {name: int(available * share) for name, share in SECTION_SHARES.items()}
+        wanted = {name: demands.get(name, shares[name]) for name in SECTION_SHARES}
+        allocation = {name: min(wanted[name], shares[name]) for name in SECTION_SHARES}
+
+        spare = available - sum(allocation.values())
+        for name in SECTION_SHARES:
+            extra = min(spare, wanted[name] - allocation[name])
+            if extra > 0:
+                allocation[name] += extra
+                spare -= extra
+        return allocation
+
@@ -1,30 +1,61 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from backend.config import AIVEN_DATABASE_URL
+from typing import Any, AsyncGenerator, Dict, Tuple
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from backend.config import AIVEN_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW
 
-engine = create_engine(
-    AIVEN_DATABASE_URL.replace("postgres://", "postgresql://"),
+
+def _async_database_url(url: str) -> Tuple[Any, Dict[str, Any]]:
+    """Point a database URL at its async driver and return (url, connect_args).
+
+    asyncpg does not understand libpq's ``sslmode`` query parameter, so it is
+    moved into the driver's ``ssl`` connect argument.
+    """
+    url = make_url(url.replace("postgres://", "postgresql://", 1))
+    connect_args: Dict[str, Any] = {}
+    if url.get_backend_name() == "postgresql":
+        sslmode = url.query.get("sslmode")
+        url = url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+        if sslmode:
+            connect_args["ssl"] = sslmode
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url, connect_args
+
+
+_database_url, _connect_args = _async_database_url(AIVEN_DATABASE_URL)
+_pool_args = (
+    {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+    if _database_url.get_backend_name() == "postgresql" else {}
+)
+
+engine = create_async_engine(
+    _database_url,
+    connect_args=_connect_args,
     pool_pre_ping=True,
     pool_recycle=300,
-    echo=False
+    echo=False,
+    **_pool_args
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay usable after commit; async sessions can't lazily refresh them
+AsyncSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def init_db():
+async def init_db():
     try:
         from backend import models
         print("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
         print("Database initialized successfully")
     except Exception as e:
         print(f"Database initialization error: {e}")
         print("Continuing without database connection...")
+
+async def close_db():
+    await engine.dispose()
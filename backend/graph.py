@@ -1,13 +1,30 @@
-from typing import Annotated, List, Dict, Any, TypedDict, Optional
+from typing import Annotated, Callable, List, Dict, Any, TypedDict, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import asyncio
+import contextvars
 import operator
+import threading
+import time
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
-from backend.agents.critic import create_critic_agent
+from langchain_core.runnables import RunnableLambda
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from backend.agents.critic import (
+    create_critic_agent, is_approved, critique_score, normalize_verdict, Verdict, record_parse_failure_retry
+)
+from backend.config import SPECULATIVE_REVISION, BEST_OF_N, BEST_OF_N_TEMPERATURES, RESPONDER_MODEL
+from backend.budget import NodeUsage, cost_update, budget_status
+from backend.context_budget import ContextBudget, MIN_ITEM_TOKENS
+from backend.intent_router import intent_router
 from backend.llm import get_llm
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 MAX_REVISION_ATTEMPTS = 3  # Max number of retry attempts (so total responses = initial + 3 retries = 4)
 
+# Token budget for the responder model's prompt
+_context_budget = ContextBudget(RESPONDER_MODEL)
+
 class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], operator.add]
     feedback_count: int
@@ -17,15 +34,25 @@ class AgentState(TypedDict):
     all_responses: Annotated[List[str], operator.add]
     revision_history: Annotated[List[Dict[str, Any]], operator.add]
     memory_context: Optional[str]  # Retrieved memory context
+    context_allocation: Optional[Dict[str, int]]  # Prompt tokens per context section (see ContextBudget)
+    recent_history: Optional[List[Dict[str, str]]]  # Recent group messages (short memory), oldest first
+    search_context: Optional[str]  # Prefetched web search context (None = not prefetched)
+    speculative_draft: Optional[str]  # Next draft generated while the critic reviewed the current one
+    candidates: List[Dict[str, Any]]  # Best-of-N drafts (index, temperature, response, critique)
+    deadline: Optional[float]  # time.monotonic() after which no new revision starts (None = no deadline)
+    token_budget: Optional[int]  # LLM tokens the whole turn may spend (None = unlimited)
+    tokens_used: Annotated[int, operator.add]
+    node_latency: Dict[str, float]  # Observed seconds per node run (moving average)
+    node_tokens: Dict[str, float]  # Observed tokens per node run (moving average)
+    budget: Dict[str, Any]  # Latest budget_status, reported in the stream
+    best_response: Optional[str]  # Highest-scoring draft so far, returned if the budget runs out
+    best_score: Optional[float]
 
-def responder_node(state: AgentState):
+def _memory_section(state: AgentState) -> str:
+    """Build the memory section of the responder prompt ("" if there is no memory)."""
     messages = state['messages']
-    feedback_count = state.get('feedback_count', 0)
-    critic_response = state.get('critic_response', {})
     memory_context = state.get('memory_context', '')
-    
-    print(f"[RESPONDER] Starting iteration {feedback_count + 1} of {MAX_REVISION_ATTEMPTS}")
-    
+
     # Extract memory context from SystemMessages if present
     if not memory_context:
         for msg in messages:
@@ -33,30 +60,40 @@ def responder_node(state: AgentState):
                 memory_context = msg.content
                 print(f"[RESPONDER] Found memory context in messages: {memory_context[:100]}...")
                 break
-    
-    llm = get_llm()
-    
-    from datetime import datetime
-    current_date = datetime.now().strftime("%B %d, %Y")
-    
-    # Build memory section if available
-    memory_section = ""
-    if memory_context:
-        memory_section = f"""
+
+    if not memory_context:
+        return ""
+    return f"""
 ## YOUR MEMORY OF PAST CONVERSATIONS:
 {memory_context}
 
 IMPORTANT: Use this memory to answer questions about past conversations. If the user asks "what did we discuss" or "what topics did we talk about", refer to these memories!
 """
-    
+
+def _build_responder_prompt(state: AgentState) -> Tuple[str, str, bool]:
+    """Build the responder system prompt from the current state.
+
+    Returns:
+        Tuple of (system_prompt, user_query, needs_search)
+    """
+    messages = state['messages']
+    feedback_count = state.get('feedback_count', 0)
+    critic_response = state.get('critic_response', {})
+
+    print(f"[RESPONDER] Starting iteration {feedback_count + 1} of {MAX_REVISION_ATTEMPTS}")
+
+    from datetime import datetime
+    current_date = datetime.now().strftime("%B %d, %Y")
+    memory_section = _memory_section(state)
+
     if feedback_count > 0 and critic_response:
         feedback = critic_response.get('feedback', '')
         evidence = critic_response.get('evidence', [])
         sources = critic_response.get('sources', [])
-        
+
         evidence_text = "\n".join([f"- {e}" for e in evidence]) if evidence else ""
         sources_text = "\n".join([f"- {s}" for s in sources]) if sources else ""
-        
+
         system_prompt = f"""You are an expert AI assistant. Today's date is {current_date}.
 {memory_section}
 Your previous response needed improvement. This is revision attempt {feedback_count + 1} of {MAX_REVISION_ATTEMPTS}.
@@ -94,141 +131,420 @@ Format your responses professionally using:
 - ```language for code blocks
 - - Bullet points for lists
 - ## Headers for sections when appropriate"""
-    
+
     user_query = ""
     for msg in reversed(messages):
         if hasattr(msg, 'type') and msg.type == 'human':
             content = msg.content
             user_query = content.lower() if isinstance(content, str) else ""
             break
-    
-    # Keywords that indicate memory/recall questions - DO NOT web search for these
-    memory_keywords = [
-        'remember', 'memory', 'earlier', 'before', 'we discussed', 'we talked', 'we spoke',
-        'topics we', 'what did we', 'past conversation', 'previous', 'last time', 
-        'you told me', 'i told you', 'mentioned', 'our conversation'
-    ]
-    is_memory_question = any(keyword in user_query for keyword in memory_keywords)
-    
-    if is_memory_question:
-        print(f"[RESPONDER] Query: '{user_query[:100]}...' | Memory question detected - using stored memory, not web search")
-    
-    search_keywords = [
-        'news', 'latest', 'today', 'current', 'recent', 'now', 'update', 'happening',
-        'yesterday', 'last night', 'this week', 'this month', 'this year', '2024', '2025',
-        'match', 'game', 'score', 'result', 'won', 'lost', 'cricket', 'football', 'sports',
-        'weather', 'stock', 'price', 'election', 'breaking', 'announced', 'released'
-    ]
-    # Only search web if it's not a memory question
-    needs_search = not is_memory_question and any(keyword in user_query for keyword in search_keywords)
-    print(f"[RESPONDER] Query: '{user_query[:100]}...' | Needs web search: {needs_search}")
-    
-    if needs_search:
-        try:
-            from langchain_tavily import TavilySearch
-            from backend.config import TAVILY_API_KEY
-            import os
-            
-            if TAVILY_API_KEY:
-                print(f"[RESPONDER] Performing web search for: '{user_query[:100]}...'")
-                os.environ["TAVILY_API_KEY"] = TAVILY_API_KEY
-                search_tool = TavilySearch(max_results=5)
-                search_response = search_tool.invoke(user_query)
-                
-                # Tavily returns {'results': [...]} format
-                if isinstance(search_response, dict):
-                    search_results = search_response.get('results', [])
-                elif isinstance(search_response, list):
-                    search_results = search_response
-                else:
-                    search_results = []
-                
-                print(f"[RESPONDER] Got {len(search_results)} search results")
-                
-                from datetime import datetime
-                current_date = datetime.now().strftime("%B %d, %Y")
-                search_context = f"\n\n## IMPORTANT - Current Information from Web Search (Today is {current_date} - use this data!):\n"
-                result_count = 0
-                for result in search_results:
-                    if isinstance(result, dict):
-                        content = result.get('content', '')
-                        title = result.get('title', '')
-                        url = result.get('url', '')
-                        if content or title:
-                            result_count += 1
-                            # Escape curly braces to prevent template parsing errors
-                            safe_title = title.replace('{', '{{').replace('}', '}}') if title else ''
-                            safe_content = content.replace('{', '{{').replace('}', '}}') if content else ''
-                            search_context += f"\n### Result {result_count}: {safe_title}\n"
-                            if safe_content:
-                                search_context += f"{safe_content[:800]}\n"
-                            if url:
-                                search_context += f"(Source: {url})\n"
-                
-                if result_count > 0:
-                    search_context += f"\n\n**CRITICAL INSTRUCTION: Your answer MUST be based on the search results above. Today is {current_date}. This is current, real-time information. Do NOT use outdated training data or old match results.**\n"
-                    system_prompt += search_context
-                    print(f"[RESPONDER] Added {result_count} search results to context")
-                else:
-                    print("[RESPONDER] No valid search results found")
-            else:
-                print("[RESPONDER] TAVILY_API_KEY not configured")
-        except Exception as e:
-            print(f"[RESPONDER] Search error: {type(e).__name__}: {e}")
-    
+
+    _, needs_search = route_query(user_query)
+
+    return system_prompt, user_query, needs_search
+
+def route_query(user_query: str) -> Tuple[bool, bool]:
+    """Decide whether a query is a memory question and whether it needs a web search.
+
+    Returns:
+        Tuple of (is_memory_question, needs_search)
+    """
+    decision = intent_router.route(user_query)
+    print(
+        f"[ROUTER] Query: '{user_query[:100]}...' | Intent: {decision.intent.value} "
+        f"({decision.confidence:.2f}, matched {decision.matches or 'nothing'})"
+    )
+    return decision.is_memory_question, decision.needs_search
+
+def format_search_context(search_response: Any, max_tokens: Optional[int] = None) -> str:
+    """Format a Tavily response into a prompt section ("" if there are no usable results).
+
+    Results are kept in ranked order until max_tokens is used up; lower-ranked
+    results are cut short or dropped first.
+    """
+    # Tavily returns {'results': [...]} format
+    if isinstance(search_response, dict):
+        search_results = search_response.get('results', [])
+    elif isinstance(search_response, list):
+        search_results = search_response
+    else:
+        search_results = []
+
+    print(f"[RESPONDER] Got {len(search_results)} search results")
+
+    from datetime import datetime
+    current_date = datetime.now().strftime("%B %d, %Y")
+    header = f"\n\n## IMPORTANT - Current Information from Web Search (Today is {current_date} - use this data!):\n"
+    footer = f"\n\n**CRITICAL INSTRUCTION: Your answer MUST be based on the search results above. Today is {current_date}. This is current, real-time information. Do NOT use outdated training data or old match results.**\n"
+
+    blocks = []
+    for result in search_results:
+        if isinstance(result, dict):
+            content = result.get('content', '')
+            title = result.get('title', '')
+            url = result.get('url', '')
+            if content or title:
+                block = f"\n### Result {len(blocks) + 1}: {title}\n"
+                if content:
+                    block += f"{content}\n"
+                if url:
+                    block += f"(Source: {url})\n"
+                blocks.append(block)
+
+    if not blocks:
+        print("[RESPONDER] No valid search results found")
+        return ""
+
+    if max_tokens is not None:
+        available = max_tokens - _context_budget.count(header + footer)
+        # No single result may crowd out all the others
+        blocks = _context_budget.fit(blocks, available, max_item_tokens=max(available // 2, MIN_ITEM_TOKENS))
+        if not blocks:
+            print("[RESPONDER] No room for search results in the context budget")
+            return ""
+    print(f"[RESPONDER] Added {len(blocks)} search results to context")
+    return header + "".join(blocks) + footer
+
+def _allocation(state: AgentState) -> Dict[str, int]:
+    return state.get('context_allocation') or _context_budget.allocate({})
+
+def _prompt_messages(state: AgentState, latest_draft: Optional[str] = None) -> List[BaseMessage]:
+    """Messages sent to the responder: the conversation plus only the latest draft.
+
+    Earlier drafts stay in state for the record but aren't resent, so the
+    prompt doesn't grow with each revision. latest_draft, if given, stands in
+    for the last draft in state (a speculative draft being refined).
+    """
+    messages = [m for m in state['messages'] if not isinstance(m, AIMessage)]
+    drafts = [m for m in state['messages'] if isinstance(m, AIMessage)]
+    if latest_draft is None and drafts:
+        content = drafts[-1].content
+        latest_draft = content if isinstance(content, str) else str(content)
+    if latest_draft is not None:
+        messages.append(AIMessage(content=_context_budget.truncate(latest_draft, _allocation(state)["draft"])))
+    return messages
+
+def _build_responder_chain(system_prompt: str, temperature: Optional[float] = None, timeout: Optional[float] = None):
+    # A SystemMessage rather than a template string: context may contain literal braces
     prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
+        SystemMessage(content=system_prompt),
         MessagesPlaceholder(variable_name="messages"),
     ])
-    chain = prompt | llm
-    
-    try:
-        response = chain.invoke({"messages": messages})
-        print(f"[RESPONDER] LLM Response type: {type(response)}")
-        print(f"[RESPONDER] LLM Response content type: {type(response.content) if hasattr(response, 'content') else 'no content attr'}")
-        print(f"[RESPONDER] LLM Response preview: {str(response.content)[:200] if hasattr(response, 'content') else str(response)[:200]}...")
-        
-        response_text = response.content if isinstance(response.content, str) else str(response.content)
-        
-        if not response_text or response_text.strip() == "":
-            print("[RESPONDER] WARNING: Empty response from LLM!")
-            response_text = "I apologize, but I was unable to generate a response. Please try again."
-    except Exception as e:
-        print(f"[RESPONDER] LLM Error: {type(e).__name__}: {e}")
-        response_text = f"Error generating response: {str(e)}"
-    
+    if temperature is None:
+        llm = get_llm(model_name=RESPONDER_MODEL)
+    else:
+        llm = get_llm(model_name=RESPONDER_MODEL, temperature=temperature)
+    if timeout is not None:
+        # A single attempt: a retry would start after the time it has to finish in
+        llm = llm.bind(timeout=max(timeout, 1.0), max_retries=1)
+    return prompt | llm
+
+def _response_text(response: Any) -> str:
+    print(f"[RESPONDER] LLM Response type: {type(response)}")
+    print(f"[RESPONDER] LLM Response content type: {type(response.content) if hasattr(response, 'content') else 'no content attr'}")
+    print(f"[RESPONDER] LLM Response preview: {str(response.content)[:200] if hasattr(response, 'content') else str(response)[:200]}...")
+
+    response_text = response.content if isinstance(response.content, str) else str(response.content)
+
+    if not response_text or response_text.strip() == "":
+        print("[RESPONDER] WARNING: Empty response from LLM!")
+        response_text = "I apologize, but I was unable to generate a response. Please try again."
+    return response_text
+
+def _responder_update(
+    state: AgentState,
+    response: Optional[BaseMessage],
+    response_text: str,
+    search_context: Optional[str] = None
+) -> Dict[str, Any]:
+    feedback_count = state.get('feedback_count', 0)
+    if response is None:
+        response = AIMessage(content=response_text)
+
     revision_entry = {
         "iteration": feedback_count + 1,
         "response": response_text[:500],
         "had_feedback": feedback_count > 0
     }
-    
-    return {
-        "messages": [response], 
+
+    update = {
+        "messages": [response],
         "final_response": response_text,
         "all_responses": [response_text],
         "revision_history": [revision_entry]
     }
+    # Keep search results in state so revisions don't search again
+    if search_context is not None:
+        update["search_context"] = search_context
+    return update
 
-def critic_node(state: AgentState):
+def fetch_search_results(user_query: str) -> Any:
+    """Run a (cached) web search for the query and return the raw results ([] if unavailable)."""
+    from backend.config import TAVILY_API_KEY
+    from backend.search_cache import search_cache
+
+    if not TAVILY_API_KEY:
+        print("[RESPONDER] TAVILY_API_KEY not configured")
+        return []
+    try:
+        print(f"[RESPONDER] Performing web search for: '{user_query[:100]}...'")
+        return search_cache.search(user_query)
+    except Exception as e:
+        print(f"[RESPONDER] Search error: {type(e).__name__}: {e}")
+    return []
+
+async def afetch_search_results(user_query: str) -> Any:
+    """Async variant of fetch_search_results."""
+    from backend.config import TAVILY_API_KEY
+    from backend.search_cache import search_cache
+
+    if not TAVILY_API_KEY:
+        print("[RESPONDER] TAVILY_API_KEY not configured")
+        return []
+    try:
+        print(f"[RESPONDER] Performing web search for: '{user_query[:100]}...'")
+        return await search_cache.asearch(user_query)
+    except Exception as e:
+        print(f"[RESPONDER] Search error: {type(e).__name__}: {e}")
+    return []
+
+def fetch_search_context(user_query: str, max_tokens: Optional[int] = None) -> str:
+    """Run a (cached) web search for the query and return it formatted as a prompt section."""
+    return format_search_context(fetch_search_results(user_query), max_tokens)
+
+async def afetch_search_context(user_query: str, max_tokens: Optional[int] = None) -> str:
+    """Async variant of fetch_search_context."""
+    return format_search_context(await afetch_search_results(user_query), max_tokens)
+
+# Runs side LLM calls (speculative drafts, best-of-N candidates) for the sync graph
+_llm_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="graph-llm")
+_speculation_lock = threading.Lock()
+_speculation_stats = {"started": 0, "used": 0, "refined": 0, "cancelled": 0, "failed": 0}
+
+# The side call running in this context, so its LLM and tool steps can be stopped once it is abandoned
+_side_call: contextvars.ContextVar[Optional["_SideCall"]] = contextvars.ContextVar("graph_side_call", default=None)
+register_configure_hook(_side_call, inheritable=True)
+
+class _SideCall(BaseCallbackHandler):
+    """A call run on _llm_pool (in a copy of this context, so its tokens count towards the node).
+
+    A running thread can't be interrupted, so cancel() marks the call abandoned
+    and its next LLM or tool step raises instead of starting: a multi-step call
+    such as the critic agent stops there rather than holding a pool worker
+    until it completes.
+    """
+    raise_error = True
+
+    def __init__(self, fn: Callable[..., Any], *args: Any):
+        self._abandoned = threading.Event()
+        context = contextvars.copy_context()
+        context.run(_side_call.set, self)
+        self.future = _llm_pool.submit(context.run, fn, *args)
+
+    def cancel(self) -> None:
+        if not self.future.cancel():
+            self._abandoned.set()
+
+    def _check(self, *args: Any, **kwargs: Any) -> None:
+        if self._abandoned.is_set():
+            raise TimeoutError("Abandoned: the node stopped waiting for this call")
+
+    on_llm_start = on_chat_model_start = on_tool_start = _check
+
+def _count_speculation(outcome: str) -> None:
+    with _speculation_lock:
+        _speculation_stats[outcome] += 1
+
+def speculation_stats() -> Dict[str, int]:
+    """Return how many speculative drafts were started, used as is, refined, cancelled or failed."""
+    with _speculation_lock:
+        return dict(_speculation_stats)
+
+def _should_speculate(state: AgentState) -> bool:
+    # Only worth it if a rejection of this draft can still lead to another one
+    return SPECULATIVE_REVISION and state.get('feedback_count', 0) + 1 <= MAX_REVISION_ATTEMPTS
+
+def _build_speculative_prompt(state: AgentState) -> str:
+    """Build a self-refinement prompt for the draft the critic is currently reviewing.
+
+    The critic's verdict on that draft isn't known yet, so the prompt carries the
+    feedback on the previous draft (if any) and asks for a generally improved answer.
+    """
+    from datetime import datetime
+    current_date = datetime.now().strftime("%B %d, %Y")
+    critic_response = state.get('critic_response', {})
+    feedback = critic_response.get('feedback', '') if state.get('feedback_count', 0) > 0 else ''
+
+    system_prompt = f"""You are an expert AI assistant. Today's date is {current_date}.
+{_memory_section(state)}
+Your previous response (the last assistant message) is being reviewed. Write an improved version of it now.
+{f"Earlier Critic Feedback (still apply it): {feedback}" if feedback else ""}
+
+IMPORTANT INSTRUCTIONS:
+1. Generate a NEW, COMPLETE answer to the user's original question
+2. Fix any factual errors, gaps or unclear wording in your previous response
+3. If the user is asking about past conversations, USE YOUR MEMORY above
+4. DO NOT evaluate your own response or mention that it was revised
+5. DO NOT apologize or say you cannot generate a response
+6. Use markdown formatting for readability
+
+Generate your improved answer now:"""
+
+    search_context = state.get('search_context')
+    if search_context:
+        system_prompt += search_context
+    return system_prompt
+
+def _speculative_text(response: Any) -> Optional[str]:
+    text = response.content if isinstance(response.content, str) else str(response.content)
+    return text if text.strip() else None
+
+def _generate_speculative_draft(state: AgentState) -> Optional[str]:
+    return _speculative_text(_build_responder_chain(_build_speculative_prompt(state)).invoke({"messages": _prompt_messages(state)}))
+
+async def _agenerate_speculative_draft(state: AgentState) -> Optional[str]:
+    response = await _build_responder_chain(_build_speculative_prompt(state)).ainvoke({"messages": _prompt_messages(state)})
+    return _speculative_text(response)
+
+def _keep_speculation(critique: Dict[str, Any]) -> bool:
+    """Whether the critic's verdict leads to another draft (mirrors check_critique)."""
+    return not is_approved(critique) and normalize_verdict(critique.get('verdict')) != Verdict.ERROR
+
+# Appended to the revision prompt when the latest draft is a speculative one
+_SPECULATIVE_REFINE_NOTE = """
+
+The latest assistant message is a revised draft that was written before the critic's feedback above
+arrived. Keep what is already good in it and change it so it addresses every feedback point."""
+
+def _pending_speculation(state: AgentState) -> Optional[str]:
+    """The speculative draft waiting for this revision, if any."""
+    if state.get('feedback_count', 0) == 0:
+        return None
+    return state.get('speculative_draft') or None
+
+def _speculative_update(
+    state: AgentState,
+    draft: str,
+    response: Optional[BaseMessage],
+    refined: Optional[str],
+    search_context: Optional[str]
+) -> Dict[str, Any]:
+    """Responder output built from a speculative draft and its refine pass.
+
+    The speculative draft predates the critic's feedback on the draft it was
+    written alongside, so it is refined with that feedback before use. If the
+    feedback is empty or the refine pass fails, the draft is used as written.
+    """
+    iteration = state.get('feedback_count', 0) + 1
+    if refined is not None:
+        print(f"[RESPONDER] Refined speculative draft with the critic's feedback for iteration {iteration}")
+        _count_speculation("refined")
+        update = _responder_update(state, response, refined, search_context)
+    else:
+        print(f"[RESPONDER] Using speculative draft as written for iteration {iteration}")
+        _count_speculation("used")
+        update = _responder_update(state, None, draft, search_context)
+    update["revision_history"][0]["speculative"] = True
+    update["revision_history"][0]["refined"] = refined is not None
+    update["speculative_draft"] = None
+    return update
+
+def responder_node(state: AgentState):
+    with NodeUsage() as usage:
+        update = _respond(state)
+    return {**update, **cost_update(state, "responder", usage)}
+
+async def aresponder_node(state: AgentState):
+    """Async variant of responder_node used by graph.astream/ainvoke."""
+    with NodeUsage() as usage:
+        update = await _arespond(state)
+    return {**update, **cost_update(state, "responder", usage)}
+
+def _respond(state: AgentState) -> Dict[str, Any]:
+    system_prompt, user_query, needs_search = _build_responder_prompt(state)
+
+    # Use the orchestrator's prefetched search results when present
+    search_context = state.get('search_context')
+    if search_context is None and needs_search:
+        search_context = fetch_search_context(user_query, _allocation(state)["search"])
+    if search_context:
+        system_prompt += search_context
+
+    draft = _pending_speculation(state)
+    if draft is not None:
+        response, refined = None, None
+        if state.get('critic_response', {}).get('feedback'):
+            try:
+                response = _build_responder_chain(system_prompt + _SPECULATIVE_REFINE_NOTE).invoke(
+                    {"messages": _prompt_messages(state, draft)}
+                )
+                refined = _speculative_text(response)
+            except Exception as e:
+                print(f"[RESPONDER] Refine error: {type(e).__name__}: {e}")
+        return _speculative_update(state, draft, response, refined, search_context)
+
+    response = None
+    try:
+        response = _build_responder_chain(system_prompt).invoke({"messages": _prompt_messages(state)})
+        response_text = _response_text(response)
+    except Exception as e:
+        print(f"[RESPONDER] LLM Error: {type(e).__name__}: {e}")
+        response_text = f"Error generating response: {str(e)}"
+
+    return _responder_update(state, response, response_text, search_context)
+
+async def _arespond(state: AgentState) -> Dict[str, Any]:
+    system_prompt, user_query, needs_search = _build_responder_prompt(state)
+
+    search_context = state.get('search_context')
+    if search_context is None and needs_search:
+        search_context = await afetch_search_context(user_query, _allocation(state)["search"])
+    if search_context:
+        system_prompt += search_context
+
+    draft = _pending_speculation(state)
+    if draft is not None:
+        response, refined = None, None
+        if state.get('critic_response', {}).get('feedback'):
+            try:
+                response = await _build_responder_chain(system_prompt + _SPECULATIVE_REFINE_NOTE).ainvoke(
+                    {"messages": _prompt_messages(state, draft)}
+                )
+                refined = _speculative_text(response)
+            except Exception as e:
+                print(f"[RESPONDER] Refine error: {type(e).__name__}: {e}")
+        return _speculative_update(state, draft, response, refined, search_context)
+
+    response = None
+    try:
+        response = await _build_responder_chain(system_prompt).ainvoke({"messages": _prompt_messages(state)})
+        response_text = _response_text(response)
+    except Exception as e:
+        print(f"[RESPONDER] LLM Error: {type(e).__name__}: {e}")
+        response_text = f"Error generating response: {str(e)}"
+
+    return _responder_update(state, response, response_text, search_context)
+
+def _build_critic_request(state: AgentState) -> Dict[str, str]:
+    """Build the question/answer/context arguments for CriticAgent.evaluate."""
     messages = state['messages']
     feedback_count = state.get('feedback_count', 0)
     memory_context = state.get('memory_context', '')
-    
+
     print(f"[CRITIC] Evaluating response (iteration {feedback_count + 1})")
-    
+
     last_message = messages[-1]
-    
+
     user_message = ""
     for msg in reversed(messages[:-1]):
         if isinstance(msg, HumanMessage):
             content = msg.content
             user_message = content if isinstance(content, str) else str(content)
             break
-            
+
     if not user_message:
         user_message = "Unknown query"
-    
+
     # Check if memory was provided to the assistant
     has_memory = bool(memory_context)
     for msg in messages:
@@ -237,11 +553,9 @@ def critic_node(state: AgentState):
             memory_context = msg.content
             break
 
-    critic_agent = create_critic_agent()
-    
     answer_content = last_message.content
     answer_str = answer_content if isinstance(answer_content, str) else str(answer_content)
-    
+
     # Build context for critic
     evaluation_context = f"This is evaluation iteration {feedback_count + 1} of {MAX_REVISION_ATTEMPTS}."
     if has_memory:
@@ -252,67 +566,396 @@ IMPORTANT - MEMORY WAS PROVIDED TO THE ASSISTANT:
 
 If the user is asking about past conversations/topics and the assistant claims to have no memory or doesn't reference the memories above, this is a FAILURE. The assistant HAD memory available and should have used it!
 """
-    
-    try:
-        critique = critic_agent.evaluate(
-            question=user_message,
-            answer=answer_str,
-            context=evaluation_context
-        )
-    except Exception as e:
-        critique = {
-            "verdict": "error",
-            "feedback": f"Critic error: {str(e)}",
-            "evidence": [],
-            "sources": []
-        }
-    
-    print(f"[CRITIC] Verdict: {critique.get('verdict', 'unknown')}")
-        
+
     return {
+        "question": user_message,
+        "answer": answer_str,
+        "context": evaluation_context
+    }
+
+def _critic_error(e: Exception) -> Dict[str, Any]:
+    return {
+        "verdict": "error",
+        "feedback": f"Critic error: {str(e)}",
+        "evidence": [],
+        "sources": []
+    }
+
+def _critic_update(
+    state: AgentState,
+    critique: Dict[str, Any],
+    cost: Dict[str, Any],
+    budget: Dict[str, Any],
+    speculative_draft: Optional[str] = None
+) -> Dict[str, Any]:
+    print(f"[CRITIC] Verdict: {critique.get('verdict', 'unknown')}")
+
+    update = {
         "critic_response": critique,
-        "feedback_count": feedback_count + 1
+        "feedback_count": state.get('feedback_count', 0) + 1,
+        "speculative_draft": speculative_draft,
+        "budget": budget,
+        **cost
     }
 
+    # Later drafts win ties: they had the most feedback to work from
+    score = critique_score(critique)
+    best_score = state.get('best_score')
+    if best_score is None or score >= best_score:
+        update["best_response"] = state.get('final_response', '')
+        update["best_score"] = score
+
+    # Out of time or tokens: finish with the best draft rather than the latest
+    if budget["exhausted"] and _keep_speculation(critique):
+        best_response = update.get("best_response", state.get('best_response'))
+        print(f"[CRITIC] Budget exhausted ({budget}); returning best draft so far")
+        if best_response:
+            update["final_response"] = best_response
+    return update
+
+def _finish_speculation(speculation: Optional[Future], keep: bool) -> Optional[str]:
+    if speculation is None:
+        return None
+    if not keep:
+        # A running thread can't be interrupted; its result is simply discarded
+        speculation.cancel()
+        _count_speculation("cancelled")
+        return None
+    try:
+        return speculation.result()
+    except Exception as e:
+        print(f"[CRITIC] Speculative draft failed: {type(e).__name__}: {e}")
+        _count_speculation("failed")
+        return None
+
+async def _afinish_speculation(speculation: Optional[asyncio.Task], keep: bool) -> Optional[str]:
+    if speculation is None:
+        return None
+    if not keep:
+        speculation.cancel()
+        _count_speculation("cancelled")
+        return None
+    try:
+        return await speculation
+    except Exception as e:
+        print(f"[CRITIC] Speculative draft failed: {type(e).__name__}: {e}")
+        _count_speculation("failed")
+        return None
+
+def critic_node(state: AgentState):
+    request = _build_critic_request(state)
+
+    with NodeUsage() as usage:
+        # In speculative mode the next draft is written while the critic reviews this one
+        speculation = None
+        if _should_speculate(state):
+            # Run in a copy of this context so the draft's tokens count towards the budget
+            speculation = _llm_pool.submit(contextvars.copy_context().run, _generate_speculative_draft, state)
+            _count_speculation("started")
+
+        try:
+            critique = create_critic_agent().evaluate(**request)
+        except Exception as e:
+            critique = _critic_error(e)
+
+    cost = cost_update(state, "critic", usage)
+    budget = budget_status(state, cost)
+    keep = _keep_speculation(critique) and not budget["exhausted"]
+    speculative_draft = _finish_speculation(speculation, keep)
+    # Also counts a speculative draft that finished after the critic
+    cost["tokens_used"] = usage.tokens
+    return _critic_update(state, critique, cost, budget, speculative_draft)
+
+async def acritic_node(state: AgentState):
+    """Async variant of critic_node used by graph.astream/ainvoke."""
+    request = _build_critic_request(state)
+
+    with NodeUsage() as usage:
+        speculation = None
+        if _should_speculate(state):
+            speculation = asyncio.create_task(_agenerate_speculative_draft(state))
+            _count_speculation("started")
+
+        try:
+            critique = await create_critic_agent().aevaluate(**request)
+        except asyncio.CancelledError:
+            if speculation is not None:
+                speculation.cancel()
+            raise
+        except Exception as e:
+            critique = _critic_error(e)
+
+    cost = cost_update(state, "critic", usage)
+    budget = budget_status(state, cost)
+    keep = _keep_speculation(critique) and not budget["exhausted"]
+    speculative_draft = await _afinish_speculation(speculation, keep)
+    # Also counts a speculative draft that finished after the critic
+    cost["tokens_used"] = usage.tokens
+    return _critic_update(state, critique, cost, budget, speculative_draft)
+
 def check_critique(state: AgentState):
     critic_response = state.get('critic_response', {})
     feedback_count = state.get('feedback_count', 0)
-    
+
     raw_verdict = critic_response.get('verdict', '')
-    verdict = raw_verdict.lower().strip() if isinstance(raw_verdict, str) else ''
-    
-    print(f"[CHECK_CRITIQUE] feedback_count={feedback_count}, verdict='{verdict}'")
-    
+    verdict = normalize_verdict(raw_verdict)
+
+    print(f"[CHECK_CRITIQUE] feedback_count={feedback_count}, verdict='{raw_verdict}'")
+
     if feedback_count > MAX_REVISION_ATTEMPTS:
         print(f"[CHECK_CRITIQUE] Max revisions ({MAX_REVISION_ATTEMPTS}) exceeded ({feedback_count} attempts). Ending loop.")
         return "end"
-    
-    approved_verdicts = ['good', 'approved', 'acceptable', 'pass', 'ok', 'correct', 'accurate', 'satisfactory']
-    if verdict in approved_verdicts:
-        print(f"[CHECK_CRITIQUE] Response approved with verdict: '{verdict}'")
+
+    if verdict == Verdict.GOOD:
+        print(f"[CHECK_CRITIQUE] Response approved with verdict: '{raw_verdict}'")
+        return "end"
+
+    if state.get('budget', {}).get('exhausted'):
+        print(f"[CHECK_CRITIQUE] Deadline or token budget can't cover another revision. Ending loop.")
         return "end"
-    
-    revision_verdicts = ['needs_revision', 'revise', 'improve', 'needs improvement', 'needs_improvement', 
-                         'incorrect', 'wrong', 'incomplete', 'inaccurate', 'poor', 'bad', 'fail', 'rejected']
-    if verdict in revision_verdicts:
-        print(f"[CHECK_CRITIQUE] Needs revision (verdict: '{verdict}'). Attempt {feedback_count} of {MAX_REVISION_ATTEMPTS}")
+
+    if verdict == Verdict.NEEDS_REVISION:
+        print(f"[CHECK_CRITIQUE] Needs revision (verdict: '{raw_verdict}'). Attempt {feedback_count} of {MAX_REVISION_ATTEMPTS}")
         return "retry"
-    
-    if verdict == 'error':
+
+    if verdict == Verdict.ERROR:
         print(f"[CHECK_CRITIQUE] Error occurred. Ending to prevent issues.")
         return "end"
-    
-    if not verdict:
-        print(f"[CHECK_CRITIQUE] Empty/missing verdict. Conservative: treating as needs_revision.")
-        return "retry"
-    
-    print(f"[CHECK_CRITIQUE] Unknown verdict '{verdict}'. Conservative: treating as needs_revision.")
+
+    # The critic returns typed verdicts, so this only happens with critics that bypass the schema
+    record_parse_failure_retry()
+    print(f"[CHECK_CRITIQUE] Unrecognised verdict '{raw_verdict}'. Conservative: treating as needs_revision.")
     return "retry"
 
+def _candidate_temperatures() -> List[float]:
+    temperatures = BEST_OF_N_TEMPERATURES or [0.7]
+    return [temperatures[i % len(temperatures)] for i in range(max(BEST_OF_N, 1))]
+
+def _candidate_prompt(state: AgentState) -> Tuple[str, Optional[str]]:
+    """Return (system prompt, search context) shared by every best-of-N draft."""
+    system_prompt, user_query, needs_search = _build_responder_prompt(state)
+    search_context = state.get('search_context')
+    if search_context is None and needs_search:
+        search_context = fetch_search_context(user_query, _allocation(state)["search"])
+    if search_context:
+        system_prompt += search_context
+    return system_prompt, search_context
+
+async def _acandidate_prompt(state: AgentState) -> Tuple[str, Optional[str]]:
+    """Async variant of _candidate_prompt."""
+    system_prompt, user_query, needs_search = _build_responder_prompt(state)
+    search_context = state.get('search_context')
+    if search_context is None and needs_search:
+        search_context = await afetch_search_context(user_query, _allocation(state)["search"])
+    if search_context:
+        system_prompt += search_context
+    return system_prompt, search_context
+
+def _generate_candidate(
+    system_prompt: str, messages: List[BaseMessage], temperature: float, timeout: Optional[float] = None
+) -> str:
+    try:
+        return _response_text(_build_responder_chain(system_prompt, temperature, timeout).invoke({"messages": messages}))
+    except Exception as e:
+        print(f"[RESPONDER] LLM Error: {type(e).__name__}: {e}")
+        return f"Error generating response: {str(e)}"
+
+async def _agenerate_candidate(system_prompt: str, messages: List[BaseMessage], temperature: float) -> str:
+    try:
+        return _response_text(await _build_responder_chain(system_prompt, temperature).ainvoke({"messages": messages}))
+    except Exception as e:
+        print(f"[RESPONDER] LLM Error: {type(e).__name__}: {e}")
+        return f"Error generating response: {str(e)}"
+
+def _remaining_seconds(state: AgentState) -> Optional[float]:
+    """Seconds left before the turn's deadline (None = no deadline)."""
+    deadline = state.get('deadline')
+    return max(0.0, deadline - time.monotonic()) if deadline is not None else None
+
+def _drafting_seconds(state: AgentState) -> Optional[float]:
+    """Time the drafts may take: half of what is left, so the critic has the rest to review them."""
+    remaining = _remaining_seconds(state)
+    return remaining / 2 if remaining is not None else None
+
+def _wait_finished(calls: List[_SideCall], timeout: Optional[float], at_least_one: bool = True) -> List[int]:
+    """Wait up to timeout for side calls (then for the first one if none finished and at_least_one).
+
+    Calls still running are cancelled. Returns the indexes of the finished ones.
+    """
+    futures = [call.future for call in calls]
+    done, _ = wait(futures, timeout=timeout)
+    if not done and at_least_one:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+    for call in calls:
+        if call.future not in done:
+            call.cancel()
+    return [i for i, future in enumerate(futures) if future in done]
+
+async def _await_finished(tasks: List[asyncio.Task], timeout: Optional[float]) -> List[int]:
+    """Async variant of _wait_finished that cancels the tasks left behind."""
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    if not done:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    return [i for i, task in enumerate(tasks) if task in done]
+
+def _drafts_update(
+    state: AgentState,
+    temperatures: List[float],
+    responses: Dict[int, str],
+    search_context: Optional[str],
+    usage: NodeUsage
+) -> Dict[str, Any]:
+    skipped = len(temperatures) - len(responses)
+    print(f"[RESPONDER] Generated {len(responses)} candidate drafts at temperatures {temperatures}"
+          + (f" ({skipped} skipped at the deadline)" if skipped else ""))
+    update = {
+        "candidates": [
+            {"index": i, "temperature": temperatures[i], "response": responses[i]}
+            for i in sorted(responses)
+        ],
+        **cost_update(state, "drafts", usage)
+    }
+    if search_context is not None:
+        update["search_context"] = search_context
+    return update
+
+def drafts_node(state: AgentState):
+    """Write BEST_OF_N drafts of the answer concurrently, one per temperature.
+
+    Drafts still running after half of the time left in the turn are skipped
+    (at least one is kept), leaving the other half for the critic. Each
+    request is also bounded by the time left in the turn, so a skipped draft
+    frees its pool worker by the deadline at the latest.
+    """
+    with NodeUsage() as usage:
+        system_prompt, search_context = _candidate_prompt(state)
+        temperatures = _candidate_temperatures()
+        timeout = _remaining_seconds(state)
+        calls = [
+            _SideCall(_generate_candidate, system_prompt, _prompt_messages(state), t, timeout)
+            for t in temperatures
+        ]
+        finished = _wait_finished(calls, _drafting_seconds(state))
+        responses = {i: calls[i].future.result() for i in finished}
+    return _drafts_update(state, temperatures, responses, search_context, usage)
+
+async def adrafts_node(state: AgentState):
+    """Async variant of drafts_node used by graph.astream/ainvoke."""
+    with NodeUsage() as usage:
+        system_prompt, search_context = await _acandidate_prompt(state)
+        temperatures = _candidate_temperatures()
+        tasks = [
+            asyncio.create_task(_agenerate_candidate(system_prompt, _prompt_messages(state), t))
+            for t in temperatures
+        ]
+        finished = await _await_finished(tasks, _drafting_seconds(state))
+        responses = {i: tasks[i].result() for i in finished}
+    return _drafts_update(state, temperatures, responses, search_context, usage)
+
+def _candidate_request(state: AgentState, candidate: Dict[str, Any]) -> Dict[str, str]:
+    return _build_critic_request({**state, "messages": state['messages'] + [AIMessage(content=candidate["response"])]})
+
+def _evaluate_candidate(request: Dict[str, str]) -> Dict[str, Any]:
+    try:
+        return create_critic_agent().evaluate(**request)
+    except Exception as e:
+        return _critic_error(e)
+
+async def _aevaluate_candidate(request: Dict[str, str]) -> Dict[str, Any]:
+    try:
+        return await create_critic_agent().aevaluate(**request)
+    except Exception as e:
+        return _critic_error(e)
+
+def _judging_allowed(state: AgentState) -> bool:
+    """Whether any time and tokens are left to run the critic over the drafts."""
+    remaining_seconds = _remaining_seconds(state)
+    token_budget = state.get('token_budget')
+    out_of_time = remaining_seconds is not None and remaining_seconds <= 0
+    out_of_tokens = token_budget is not None and state.get('tokens_used', 0) >= token_budget
+    if out_of_time or out_of_tokens:
+        print(f"[CRITIC] {'Deadline' if out_of_time else 'Token budget'} used up by the drafts; skipping review")
+    return not (out_of_time or out_of_tokens)
+
+def _unreviewed_critique() -> Dict[str, Any]:
+    return {
+        "verdict": "error",
+        "feedback": "Not reviewed: the turn's deadline or token budget ran out before the critic finished.",
+        "evidence": [],
+        "sources": []
+    }
+
+def _judge_update(state: AgentState, critiques: Dict[int, Dict[str, Any]], usage: NodeUsage) -> Dict[str, Any]:
+    """Keep the best reviewed draft: approved ones first, then by critic score, then earliest.
+
+    Drafts whose review didn't finish in time only win if no draft was reviewed.
+    """
+    candidates = [
+        {**c, "critique": critiques.get(position, _unreviewed_critique())}
+        for position, c in enumerate(state['candidates'])
+    ]
+    reviewed = [candidates[position] for position in sorted(critiques)] or candidates
+    best = max(reviewed, key=lambda c: (is_approved(c["critique"]), critique_score(c["critique"]), -c["index"]))
+    for c in candidates:
+        print(f"[CRITIC] Candidate {c['index']} (temperature {c['temperature']}): "
+              f"{c['critique'].get('verdict', 'unknown')}, score {critique_score(c['critique'])}")
+    print(f"[CRITIC] Selected candidate {best['index']}")
+
+    cost = cost_update(state, "judge", usage)
+    return {
+        "candidates": candidates,
+        "messages": [AIMessage(content=best["response"])],
+        "final_response": best["response"],
+        "all_responses": [c["response"] for c in candidates],
+        "revision_history": [{
+            "iteration": 1,
+            "response": best["response"][:500],
+            "had_feedback": False,
+            "candidate": best["index"]
+        }],
+        "critic_response": best["critique"],
+        "feedback_count": 1,
+        "budget": budget_status(state, cost, cycle_nodes=()),
+        **cost
+    }
+
+def judge_node(state: AgentState):
+    """Have the critic evaluate every candidate concurrently and keep the best one.
+
+    Reviews still running at the turn's deadline are skipped (and stop at
+    their next model or tool call), and no review starts once the deadline
+    or token budget is used up.
+    """
+    with NodeUsage() as usage:
+        critiques = {}
+        if _judging_allowed(state):
+            requests = [_candidate_request(state, c) for c in state['candidates']]
+            calls = [_SideCall(_evaluate_candidate, request) for request in requests]
+            finished = _wait_finished(calls, _remaining_seconds(state), at_least_one=False)
+            critiques = {i: calls[i].future.result() for i in finished}
+    return _judge_update(state, critiques, usage)
+
+async def ajudge_node(state: AgentState):
+    """Async variant of judge_node used by graph.astream/ainvoke."""
+    with NodeUsage() as usage:
+        critiques = {}
+        if _judging_allowed(state):
+            requests = [_candidate_request(state, c) for c in state['candidates']]
+            tasks = [asyncio.create_task(_aevaluate_candidate(request)) for request in requests]
+            done, pending = await asyncio.wait(tasks, timeout=_remaining_seconds(state))
+            for task in pending:
+                task.cancel()
+            critiques = {i: task.result() for i, task in enumerate(tasks) if task in done}
+    return _judge_update(state, critiques, usage)
+
 workflow = StateGraph(AgentState)
 
-workflow.add_node("responder", responder_node)
-workflow.add_node("critic", critic_node)
+# Each node carries a sync and an async implementation: graph.invoke runs the
+# sync one, graph.astream/ainvoke run the async one on the event loop.
+workflow.add_node("responder", RunnableLambda(responder_node, afunc=aresponder_node, name="responder"))
+workflow.add_node("critic", RunnableLambda(critic_node, afunc=acritic_node, name="critic"))
 
 workflow.set_entry_point("responder")
 
@@ -328,3 +971,13 @@ workflow.add_conditional_edges(
 )
 
 app = workflow.compile()
+
+# Best-of-N mode: one parallel round of drafts, all scored by the critic in parallel
+best_of_n_workflow = StateGraph(AgentState)
+best_of_n_workflow.add_node("drafts", RunnableLambda(drafts_node, afunc=adrafts_node, name="drafts"))
+best_of_n_workflow.add_node("judge", RunnableLambda(judge_node, afunc=ajudge_node, name="judge"))
+best_of_n_workflow.set_entry_point("drafts")
+best_of_n_workflow.add_edge("drafts", "judge")
+best_of_n_workflow.add_edge("judge", END)
+
+best_of_n_app = best_of_n_workflow.compile()
@@ -0,0 +1,158 @@
+"""Write-behind queue for long-term memory ingestion."""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+import queue
+import threading
+import time
+from backend.config import (
+    MEMORY_INGEST_BATCH_SIZE, MEMORY_INGEST_FLUSH_INTERVAL, MEMORY_INGEST_MAX_RETRIES, MEMORY_INGEST_MAX_QUEUE
+)
+from backend.memory import get_memory_store
+
+# (collection name, text, metadata, attempts so far)
+_Item = Tuple[str, str, Dict[str, Any], int]
+
+
+class MemoryIngestionQueue:
+    """Background worker that batches memory writes per collection.
+
+    Writes are queued by the request path and flushed every flush_interval
+    seconds (or once batch_size items are waiting), so each collection gets a
+    single add_documents call per flush. Failed batches are retried up to
+    max_retries times before being dropped.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = MEMORY_INGEST_BATCH_SIZE,
+        flush_interval: float = MEMORY_INGEST_FLUSH_INTERVAL,
+        max_retries: int = MEMORY_INGEST_MAX_RETRIES,
+        max_queue: int = MEMORY_INGEST_MAX_QUEUE
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue: "queue.Queue[_Item]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        # Failed items waiting for their backoff to expire: (ready_at, item); worker-thread only
+        self._pending_retries: List[Tuple[float, _Item]] = []
+        self.enqueued = 0
+        self.stored = 0
+        self.dropped = 0
+        self.retries = 0
+        self.flushes = 0
+        self.last_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def start(self) -> None:
+        """Start the worker thread if it is not already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="memory-ingest", daemon=True)
+            self._thread.start()
+        print("[INGEST] Memory ingestion worker started")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop the worker after flushing everything still queued."""
+        with self._lock:
+            thread = self._thread
+            self._stopping.set()
+        if thread is not None:
+            thread.join(timeout=timeout)
+        print(f"[INGEST] Memory ingestion worker stopped ({self._queue.qsize()} items left)")
+
+    def enqueue(self, collection_name: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Queue a text for storage in a collection.
+
+        Returns:
+            True if queued, False if the queue is full and the write was dropped
+        """
+        self.start()
+        try:
+            self._queue.put_nowait((collection_name, text, metadata or {}, 0))
+        except queue.Full:
+            self.dropped += 1
+            print(f"[INGEST] Queue full, dropping memory write for {collection_name}")
+            return False
+        self.enqueued += 1
+        return True
+
+    def _drain(self, first: Optional[_Item]) -> List[_Item]:
+        items = [first] if first is not None else []
+        now = time.monotonic()
+        ready = [item for ready_at, item in self._pending_retries if ready_at <= now]
+        self._pending_retries = [(r, item) for r, item in self._pending_retries if r > now]
+        items.extend(ready)
+        while len(items) < self.batch_size:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                first = None
+            items = self._drain(first)
+            if items:
+                self._flush(items)
+            if self._stopping.is_set() and self._queue.empty() and not self._pending_retries:
+                return
+
+    def _flush(self, items: List[_Item]) -> None:
+        started = time.monotonic()
+        by_collection: Dict[str, List[_Item]] = defaultdict(list)
+        for item in items:
+            by_collection[item[0]].append(item)
+
+        for collection_name, batch in by_collection.items():
+            try:
+                get_memory_store(collection_name).store(
+                    [text for _, text, _, _ in batch],
+                    [metadata for _, _, metadata, _ in batch]
+                )
+                self.stored += len(batch)
+            except Exception as e:
+                print(f"[INGEST] Error storing {len(batch)} memories in {collection_name}: {e}")
+                self._retry(batch)
+
+        elapsed = time.monotonic() - started
+        self.flushes += 1
+        self.last_flush_seconds = elapsed
+        self.total_flush_seconds += elapsed
+
+    def _retry(self, batch: List[_Item]) -> None:
+        for collection_name, text, metadata, attempts in batch:
+            if attempts >= self.max_retries:
+                self.dropped += 1
+                print(f"[INGEST] Dropping memory write for {collection_name} after {attempts + 1} attempts")
+                continue
+            # Exponential backoff: flush_interval, 2x, 4x, ...
+            ready_at = time.monotonic() + self.flush_interval * (2 ** attempts)
+            self._pending_retries.append((ready_at, (collection_name, text, metadata, attempts + 1)))
+            self.retries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, throughput and flush latency metrics."""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "pending_retries": len(self._pending_retries),
+            "enqueued": self.enqueued,
+            "stored": self.stored,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "flushes": self.flushes,
+            "last_flush_seconds": self.last_flush_seconds,
+            "avg_flush_seconds": self.total_flush_seconds / self.flushes if self.flushes else 0.0,
+            "running": self._thread is not None and self._thread.is_alive()
+        }
+
+
+memory_ingestion = MemoryIngestionQueue()
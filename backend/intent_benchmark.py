@@ -0,0 +1,159 @@
+"""Accuracy and latency of the intent router on a labelled query set.
+
+Run with: python -m backend.intent_benchmark
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import statistics
+import time
+from backend.intent_router import Intent, IntentRouter, intent_router
+
+LABELLED_QUERIES: List[Tuple[str, Intent]] = [
+    # Memory recall
+    ("What did we discuss yesterday?", Intent.MEMORY),
+    ("Do you remember my name?", Intent.MEMORY),
+    ("What topics we covered so far?", Intent.MEMORY),
+    ("Summarize our conversation", Intent.MEMORY),
+    ("What did I tell you about my dog?", Intent.MEMORY),
+    ("You told me something about Rust lifetimes, what was it?", Intent.MEMORY),
+    ("Go back to the recipe I mentioned earlier", Intent.MEMORY),
+    ("Last time you suggested a book, which one?", Intent.MEMORY),
+    ("Did I mention where I work?", Intent.MEMORY),
+    ("Recall the plan we talked about", Intent.MEMORY),
+    ("In our previous conversation you gave me a list", Intent.MEMORY),
+    ("What was the first question I asked you?", Intent.MEMORY),
+    ("Can you repeat what you said about taxes?", Intent.MEMORY),
+    ("We spoke about my trip to Japan, any more tips?", Intent.MEMORY),
+    # Web search
+    ("Latest news on the stock market", Intent.SEARCH),
+    ("What's the weather in Hyderabad today?", Intent.SEARCH),
+    ("Who won the cricket match last night?", Intent.SEARCH),
+    ("Current price of bitcoin", Intent.SEARCH),
+    ("Breaking news about the election", Intent.SEARCH),
+    ("What is happening in Ukraine right now?", Intent.SEARCH),
+    ("Football scores this weekend", Intent.SEARCH),
+    ("Apple stock price", Intent.SEARCH),
+    ("When was the new iPhone released this year?", Intent.SEARCH),
+    ("Who is the current CEO of OpenAI?", Intent.SEARCH),
+    ("IPL 2025 points table", Intent.SEARCH),
+    ("Tonight's NBA game results", Intent.SEARCH),
+    ("Any recent updates on the Mars mission?", Intent.SEARCH),
+    ("What's the forecast for tomorrow in London?", Intent.SEARCH),
+    # Plain answers (several contain substrings of the old keywords)
+    ("I don't know how to reverse a linked list", Intent.PLAIN),
+    ("I wonder why the sky is blue", Intent.PLAIN),
+    ("Explain how photosynthesis works", Intent.PLAIN),
+    ("Write a poem about autumn", Intent.PLAIN),
+    ("What is the difference between TCP and UDP?", Intent.PLAIN),
+    ("Give me a snowy mountain haiku", Intent.PLAIN),
+    ("Translate 'good morning' into French", Intent.PLAIN),
+    ("How do I update a dictionary in Python?", Intent.PLAIN),
+    ("What is the capital of Australia?", Intent.PLAIN),
+    ("Help me write a cover letter for a data analyst role", Intent.PLAIN),
+    ("Why do cats knead blankets?", Intent.PLAIN),
+    ("Show me a matchbox car drawing idea", Intent.PLAIN),
+    ("Explain the gamete formation process", Intent.PLAIN),
+    ("How does virtual memory paging work?", Intent.PLAIN),
+    ("Suggest a name for my bakery", Intent.PLAIN),
+    ("What happened before the French Revolution?", Intent.PLAIN),
+    ("Solve 2x + 3 = 11", Intent.PLAIN),
+    ("Recommend a good novel on loss", Intent.PLAIN),
+]
+
+# The keyword lists and substring matching the router replaced, kept as the baseline
+_LEGACY_MEMORY_KEYWORDS = [
+    'remember', 'memory', 'earlier', 'before', 'we discussed', 'we talked', 'we spoke',
+    'topics we', 'what did we', 'past conversation', 'previous', 'last time',
+    'you told me', 'i told you', 'mentioned', 'our conversation'
+]
+_LEGACY_SEARCH_KEYWORDS = [
+    'news', 'latest', 'today', 'current', 'recent', 'now', 'update', 'happening',
+    'yesterday', 'last night', 'this week', 'this month', 'this year', '2024', '2025',
+    'match', 'game', 'score', 'result', 'won', 'lost', 'cricket', 'football', 'sports',
+    'weather', 'stock', 'price', 'election', 'breaking', 'announced', 'released'
+]
+
+
+def legacy_route(query: str) -> Intent:
+    """Route a query the way the old substring keyword lists did."""
+    query = query.lower()
+    memory_keywords = list(_LEGACY_MEMORY_KEYWORDS)
+    search_keywords = list(_LEGACY_SEARCH_KEYWORDS)
+    if any(keyword in query for keyword in memory_keywords):
+        return Intent.MEMORY
+    if any(keyword in query for keyword in search_keywords):
+        return Intent.SEARCH
+    return Intent.PLAIN
+
+
+def benchmark(
+    route: Callable[[str], Intent],
+    queries: List[Tuple[str, Intent]] = LABELLED_QUERIES,
+    repeat: int = 200
+) -> Dict[str, Any]:
+    """Measure a routing function's accuracy and per-query latency.
+
+    Args:
+        route: Function mapping a query to its intent
+        queries: (query, expected intent) pairs
+        repeat: Timed passes over the query set
+
+    Returns:
+        Dictionary with overall accuracy, per-intent precision/recall, the
+        misrouted queries and latency percentiles in microseconds
+    """
+    predictions = [route(query) for query, _ in queries]
+    per_intent = {}
+    for intent in Intent:
+        predicted = sum(1 for p in predictions if p == intent)
+        actual = sum(1 for _, expected in queries if expected == intent)
+        correct = sum(1 for p, (_, expected) in zip(predictions, queries) if p == intent == expected)
+        per_intent[intent.value] = {
+            "precision": round(correct / predicted, 3) if predicted else 0.0,
+            "recall": round(correct / actual, 3) if actual else 0.0
+        }
+
+    timings = []
+    for _ in range(repeat):
+        for query, _ in queries:
+            started = time.perf_counter()
+            route(query)
+            timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+
+    correct = sum(1 for p, (_, expected) in zip(predictions, queries) if p == expected)
+    return {
+        "queries": len(queries),
+        "accuracy": round(correct / len(queries), 3),
+        "per_intent": per_intent,
+        "misrouted": [
+            {"query": query, "expected": expected.value, "got": p.value}
+            for p, (query, expected) in zip(predictions, queries) if p != expected
+        ],
+        "latency_us": {
+            "mean": round(statistics.fmean(timings), 2),
+            "p50": round(timings[len(timings) // 2], 2),
+            "p99": round(timings[int(len(timings) * 0.99)], 2)
+        }
+    }
+
+
+def run(router: Optional[IntentRouter] = None, repeat: int = 200) -> Dict[str, Dict[str, Any]]:
+    """Benchmark the router against the legacy keyword lists on LABELLED_QUERIES."""
+    router = router or intent_router
+    return {
+        "router": benchmark(lambda query: router.route(query).intent, repeat=repeat),
+        "legacy_keywords": benchmark(legacy_route, repeat=repeat)
+    }
+
+
+if __name__ == "__main__":
+    for name, result in run().items():
+        latency = result["latency_us"]
+        print(
+            f"{name}: accuracy {result['accuracy']:.1%} on {result['queries']} queries, "
+            f"latency mean {latency['mean']}us p50 {latency['p50']}us p99 {latency['p99']}us"
+        )
+        for intent, metrics in result["per_intent"].items():
+            print(f"  {intent}: precision {metrics['precision']:.2f} recall {metrics['recall']:.2f}")
+        for miss in result["misrouted"]:
+            print(f"  misrouted: {miss['query']!r} expected {miss['expected']}, got {miss['got']}")
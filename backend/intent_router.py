@@ -0,0 +1,177 @@
+"""Query intent routing: memory recall, web search or a plain answer."""
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import enum
+import re
+from backend.config import INTENT_MIN_CONFIDENCE
+
+
+class Intent(str, enum.Enum):
+    MEMORY = "memory"
+    SEARCH = "search"
+    PLAIN = "plain"
+
+
+# (regex fragment, weight): how strongly a phrase on its own signals the intent.
+# Fragments are matched on word boundaries, so "now" does not match "know".
+MEMORY_PATTERNS: List[Tuple[str, float]] = [
+    (r"remember(?:s|ed)?", 0.9),
+    (r"recall", 0.7),
+    (r"remind me", 0.8),
+    (r"we (?:discussed|talked|spoke|covered|chatted|decided|agreed)", 0.95),
+    (r"topics we", 0.95),
+    (r"what did (?:we|i|you)", 0.9),
+    (r"did i (?:tell|mention|say|ask)", 0.9),
+    (r"(?:past|previous|earlier|our|last) (?:conversation|chat|discussion)s?", 0.95),
+    (r"last time", 0.8),
+    (r"you (?:told|asked) me", 0.9),
+    (r"i (?:told|asked) you", 0.9),
+    (r"you said", 0.8),
+    (r"(?:i|you|we) mentioned", 0.85),
+    (r"mentioned", 0.5),
+    (r"earlier", 0.5),
+    (r"previously", 0.5),
+    (r"previous", 0.4),
+    (r"before", 0.3),
+    (r"memory", 0.3),
+]
+
+SEARCH_PATTERNS: List[Tuple[str, float]] = [
+    (r"news", 0.9),
+    (r"headlines?", 0.9),
+    (r"breaking", 0.9),
+    (r"latest", 0.85),
+    (r"today(?:'s)?", 0.85),
+    (r"tonight(?:'s)?", 0.85),
+    (r"yesterday(?:'s)?", 0.85),
+    (r"last night", 0.85),
+    (r"this (?:week|weekend|month|year)", 0.8),
+    (r"right now", 0.8),
+    (r"weather", 0.9),
+    (r"forecast", 0.8),
+    (r"who won", 0.9),
+    (r"live", 0.5),
+    (r"current(?:ly)?", 0.6),
+    (r"recent(?:ly)?", 0.6),
+    (r"happening", 0.6),
+    (r"20[2-9]\d", 0.7),
+    (r"election(?:s)?", 0.7),
+    (r"stock(?:s)?", 0.6),
+    (r"price(?:s)?", 0.5),
+    (r"scores?", 0.6),
+    (r"announced", 0.6),
+    (r"released", 0.5),
+    (r"cricket|football|soccer|nba|nfl|ipl|sports?", 0.5),
+    (r"match(?:es)?|game", 0.4),
+    (r"won|lost|beat", 0.4),
+    (r"update(?:s|d)?", 0.4),
+    (r"now", 0.4),
+    (r"results?", 0.3),
+]
+
+# Rule scores in this range are treated as uncertain and handed to the classifier, if any
+_UNCERTAIN = (0.25, 0.75)
+
+
+class RouteDecision(NamedTuple):
+    intent: Intent
+    confidence: float
+    scores: Dict[Intent, float]
+    matches: List[str]
+
+    @property
+    def is_memory_question(self) -> bool:
+        return self.intent == Intent.MEMORY
+
+    @property
+    def needs_search(self) -> bool:
+        return self.intent == Intent.SEARCH
+
+
+class IntentRouter:
+    """Routes a query to memory, search or plain intent in a single regex pass.
+
+    All phrases are compiled into one word-boundary regex (longest phrases
+    first, so "who won" wins over "won") run over the lowercased query. A
+    matched phrase is mapped back to its pattern once and cached, which keeps
+    capture groups out of the hot regex. Each distinct phrase found adds
+    evidence for its intent, combined as 1 - prod(1 - weight). Memory wins
+    over search, since recall questions must not trigger a web search; an
+    intent is only chosen when its score reaches min_confidence.
+
+    An optional classifier (query -> {intent: probability}) is consulted only
+    when the rule scores are uncertain, and its scores are averaged in.
+    """
+
+    def __init__(
+        self,
+        memory_patterns: Sequence[Tuple[str, float]] = MEMORY_PATTERNS,
+        search_patterns: Sequence[Tuple[str, float]] = SEARCH_PATTERNS,
+        min_confidence: float = INTENT_MIN_CONFIDENCE,
+        classifier: Optional[Callable[[str], Dict[Intent, float]]] = None
+    ):
+        """Initialize the router.
+
+        Args:
+            memory_patterns: (regex fragment, weight) pairs signalling a memory question
+            search_patterns: (regex fragment, weight) pairs signalling a web search
+            min_confidence: Score an intent needs before it is chosen over plain
+            classifier: Optional local model scoring uncertain queries
+        """
+        self.min_confidence = min_confidence
+        self.classifier = classifier
+        patterns = [(p, w, Intent.MEMORY) for p, w in memory_patterns]
+        patterns += [(p, w, Intent.SEARCH) for p, w in search_patterns]
+        # Longer fragments first so multi-word phrases take precedence at the same position
+        self._patterns = sorted(patterns, key=lambda item: len(item[0]), reverse=True)
+        self._regex = re.compile(r"\b(?:" + "|".join(f"(?:{p})" for p, _, _ in self._patterns) + r")\b")
+        self._fragments = [re.compile(p) for p, _, _ in self._patterns]
+        # Matched phrase -> index into _patterns; bounded by the phrases the patterns can produce
+        self._phrase_index: Dict[str, int] = {}
+
+    def _pattern_index(self, phrase: str) -> int:
+        index = self._phrase_index.get(phrase)
+        if index is None:
+            index = next(i for i, fragment in enumerate(self._fragments) if fragment.fullmatch(phrase))
+            self._phrase_index[phrase] = index
+        return index
+
+    def scores(self, query: str) -> Tuple[Dict[Intent, float], List[str]]:
+        """Score the memory and search intents from the phrases found in query.
+
+        Returns:
+            Tuple of (score per intent, matched phrases)
+        """
+        seen = set()
+        matches = []
+        remaining = {Intent.MEMORY: 1.0, Intent.SEARCH: 1.0}
+        for phrase in self._regex.findall(query.lower()):
+            index = self._pattern_index(phrase)
+            if index in seen:
+                continue
+            seen.add(index)
+            _, weight, intent = self._patterns[index]
+            remaining[intent] *= 1.0 - weight
+            matches.append(phrase)
+        return {intent: round(1.0 - rest, 3) for intent, rest in remaining.items()}, matches
+
+    def route(self, query: str) -> RouteDecision:
+        """Decide the intent of a query.
+
+        Args:
+            query: The user's message
+
+        Returns:
+            RouteDecision with the intent, its confidence, per-intent scores and matched phrases
+        """
+        scores, matches = self.scores(query)
+        if self.classifier is not None and any(_UNCERTAIN[0] <= s < _UNCERTAIN[1] for s in scores.values()):
+            predicted = self.classifier(query)
+            scores = {intent: round((s + predicted.get(intent, 0.0)) / 2, 3) for intent, s in scores.items()}
+
+        for intent in (Intent.MEMORY, Intent.SEARCH):
+            if scores[intent] >= self.min_confidence:
+                return RouteDecision(intent, scores[intent], scores, matches)
+        return RouteDecision(Intent.PLAIN, round(1.0 - max(scores.values()), 3), scores, matches)
+
+
+intent_router = IntentRouter()
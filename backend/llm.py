@@ -1,14 +1,72 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from backend.config import GEMINI_API_KEY
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import threading
 import os
 
+
+class ClientRegistry:
+    """Process-wide registry of long-lived clients keyed by their configuration.
+
+    Keys are tuples whose first element is the client kind (e.g.
+    ``("llm", model_name, temperature)``), so a whole kind can be cleared at once.
+    Clients are built once and shared, which keeps their HTTP connection pools warm.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Hashable, Any] = {}
+        # Re-entrant: factories may themselves resolve other registered clients
+        self._lock = threading.RLock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the client registered under key, building it with factory on first use."""
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = factory()
+                self._clients[key] = client
+                print(f"[LLM] Registered client {key}")
+            return client
+
+    def set(self, key: Hashable, client: Any) -> None:
+        """Register (or swap in) a client under key."""
+        with self._lock:
+            self._clients[key] = client
+
+    def remove(self, key: Hashable) -> Optional[Any]:
+        """Remove and return the client registered under key, if any."""
+        with self._lock:
+            return self._clients.pop(key, None)
+
+    def clear(self, kind: Optional[str] = None) -> None:
+        """Drop all clients, or only those whose key starts with kind."""
+        with self._lock:
+            if kind is None:
+                self._clients.clear()
+            else:
+                for key in [k for k in self._clients if isinstance(k, tuple) and k and k[0] == kind]:
+                    del self._clients[key]
+
+    def keys(self) -> List[Hashable]:
+        return list(self._clients.keys())
+
+
+registry = ClientRegistry()
+
+
 def get_llm(model_name: str = "gemini-2.0-flash", temperature: float = 0.7):
-    """Get a LangChain LLM instance."""
+    """Get a shared LangChain LLM instance for this model and temperature."""
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY is required")
-    
-    return ChatGoogleGenerativeAI(
-        model=model_name,
-        temperature=temperature,
-        google_api_key=GEMINI_API_KEY
+
+    return registry.get_or_create(
+        ("llm", model_name, temperature),
+        lambda: ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=temperature,
+            google_api_key=GEMINI_API_KEY
+        )
     )
@@ -1,43 +1,196 @@
+import asyncio
 import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any
 from uuid import uuid4
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_core.documents import Document
-from langchain_chroma import Chroma
-import chromadb
-from chromadb.api import ClientAPI
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import InMemoryVectorStore, VectorStore
 import os
-from backend.config import GEMINI_API_KEY, CHROMA_API_KEY, CHROMA_TENANT, CHROMA_DATABASE
+from backend.config import (
+    GEMINI_API_KEY, CHROMA_API_KEY, CHROMA_TENANT, CHROMA_DATABASE, MEMORY_STORE_CACHE_SIZE,
+    EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_PATH, MEMORY_BACKEND, CHROMA_PERSIST_DIR, NUMPY_INDEX_DIR
+)
+from backend.llm import registry
 
-_client = None
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+
+class CachedEmbeddings(Embeddings):
+    """Content-addressed cache in front of an Embeddings object.
+    
+    Vectors are keyed by a SHA-256 of (model, kind, text), where kind separates
+    query and document embeddings since the model embeds them differently.
+    Lookups go to an in-memory LRU first, then to an optional SQLite file.
+    The async methods run the SQLite tier in a worker thread.
+    """
+    
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        namespace: str,
+        max_size: int = EMBEDDING_CACHE_SIZE,
+        path: Optional[str] = EMBEDDING_CACHE_PATH
+    ):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    def _key(self, kind: str, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\x00{kind}\x00{text}".encode("utf-8")).hexdigest()
+    
+    def _get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            if self._db is not None:
+                row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    vector = array("f", row[0]).tolist()
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector
+            self.misses += 1
+            return None
+    
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+    
+    def _put_many(self, items: List[tuple]) -> None:
+        with self._lock:
+            for key, vector in items:
+                self._remember(key, vector)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, array("f", vector).tobytes()) for key, vector in items]
+                )
+                self._db.commit()
+    
+    def _lookup(self, kind: str, texts: List[str]):
+        keys = [self._key(kind, text) for text in texts]
+        vectors = [self._get(key) for key in keys]
+        # Unique texts still to embed, so repeats within a batch are embedded once
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        return keys, vectors, missing
+    
+    def _fill(self, texts, keys, vectors, missing, computed) -> List[List[float]]:
+        by_text = {text: list(vector) for text, vector in zip(missing, computed)}
+        self._put_many([(keys[texts.index(text)], vector) for text, vector in by_text.items()])
+        return [vector if vector is not None else by_text[text] for text, vector in zip(texts, vectors)]
+    
+    async def _alookup(self, kind: str, texts: List[str]):
+        if self._db is None:
+            return self._lookup(kind, texts)
+        # SQLite reads would block the event loop
+        return await asyncio.to_thread(self._lookup, kind, texts)
+    
+    async def _afill(self, texts, keys, vectors, missing, computed) -> List[List[float]]:
+        if self._db is None:
+            return self._fill(texts, keys, vectors, missing, computed)
+        return await asyncio.to_thread(self._fill, texts, keys, vectors, missing, computed)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, vectors, missing = self._lookup("document", texts)
+        if not missing:
+            return vectors
+        computed = self.embeddings.embed_documents(missing)
+        return self._fill(texts, keys, vectors, missing, computed)
+    
+    def embed_query(self, text: str) -> List[float]:
+        keys, vectors, missing = self._lookup("query", [text])
+        if not missing:
+            return vectors[0]
+        return self._fill([text], keys, vectors, missing, [self.embeddings.embed_query(text)])[0]
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, vectors, missing = await self._alookup("document", texts)
+        if not missing:
+            return vectors
+        computed = await self.embeddings.aembed_documents(missing)
+        return await self._afill(texts, keys, vectors, missing, computed)
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, vectors, missing = await self._alookup("query", [text])
+        if not missing:
+            return vectors[0]
+        computed = [await self.embeddings.aembed_query(text)]
+        return (await self._afill([text], keys, vectors, missing, computed))[0]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the cache."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "size": len(self._cache)
+        }
+
+
+def get_embeddings() -> CachedEmbeddings:
+    """Get the shared, cached embeddings client."""
+    # Set the API key as environment variable for Google embeddings
+    if GEMINI_API_KEY:
+        os.environ["GOOGLE_API_KEY"] = GEMINI_API_KEY
+    
+    return registry.get_or_create(
+        ("embeddings", EMBEDDING_MODEL),
+        lambda: CachedEmbeddings(
+            GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL),
+            namespace=EMBEDDING_MODEL
+        )
+    )
+
+
+def embedding_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters of the shared embedding cache."""
+    return get_embeddings().stats()
 
 class LongTermMemoryStore:
+    """Long-term memory for one collection on top of a LangChain vector store.
+    
+    Subclasses provide the backend: _create_vectorstore, delete_all and
+    delete_collection. Pick one via MEMORY_BACKEND and create_memory_store().
+    """
+    
     def __init__(self, memory_collection_name: str = "default_collection"):
-        # Set the API key as environment variable for Google embeddings
-        if GEMINI_API_KEY:
-            os.environ["GOOGLE_API_KEY"] = GEMINI_API_KEY
-        
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004"
-        )
+        # One cached embeddings client is shared by every collection
+        self.embeddings = get_embeddings()
         self.collection_name = memory_collection_name
-        self.vectorstore = Chroma(
-            collection_name=memory_collection_name,
-            embedding_function=self.embeddings,
-            client=self._get_chroma_client()
-        )
+        self.vectorstore = self._create_vectorstore()
     
-    def store(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> List[str]:
-        """
-        Store texts in the vector store using add_documents method.
-        
-        Args:
-            texts: List of text strings to store
-            metadatas: Optional list of metadata dictionaries for each text
-            
-        Returns:
-            List of document IDs
-        """
+    def _create_vectorstore(self) -> VectorStore:
+        raise NotImplementedError
+    
+    def _vectorstore_filter(self, filter: Optional[Dict[str, Any]]) -> Any:
+        """Translate a metadata dict filter into what the backend expects."""
+        return filter
+    
+    def _build_documents(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None):
         if metadatas is None:
             metadatas = [{} for _ in texts]
         
@@ -49,12 +202,53 @@ class LongTermMemoryStore:
         
         # Generate unique IDs using uuid4
         ids = [str(uuid4()) for _ in range(len(documents))]
+        return documents, ids
+    
+    @staticmethod
+    def _format_results(results) -> List[Dict[str, Any]]:
+        formatted_results = []
+        for doc, score in results:
+            formatted_results.append({
+                "content": doc.page_content,
+                "metadata": doc.metadata,
+                "score": score
+            })
+        
+        return formatted_results
+    
+    def store(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+        """
+        Store texts in the vector store using add_documents method.
+        
+        Args:
+            texts: List of text strings to store
+            metadatas: Optional list of metadata dictionaries for each text
+            
+        Returns:
+            List of document IDs
+        """
+        documents, ids = self._build_documents(texts, metadatas)
         
         # Add documents to the vector store
         self.vectorstore.add_documents(documents=documents, ids=ids)
         
         return ids
     
+    async def astore(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+        """
+        Async variant of store using aadd_documents.
+        
+        Args:
+            texts: List of text strings to store
+            metadatas: Optional list of metadata dictionaries for each text
+            
+        Returns:
+            List of document IDs
+        """
+        documents, ids = self._build_documents(texts, metadatas)
+        await self.vectorstore.aadd_documents(documents=documents, ids=ids)
+        return ids
+    
     def search(
         self, 
         query: str, 
@@ -76,19 +270,35 @@ class LongTermMemoryStore:
         results = self.vectorstore.similarity_search_with_score(
             query=query,
             k=k,
-            filter=filter
+            filter=self._vectorstore_filter(filter)
         )
         
-        # Format results
-        formatted_results = []
-        for doc, score in results:
-            formatted_results.append({
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "score": score
-            })
+        return self._format_results(results)
+    
+    async def asearch(
+        self, 
+        query: str, 
+        k: int = 5,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async variant of search using asimilarity_search_with_score.
         
-        return formatted_results
+        Args:
+            query: Search query string
+            k: Number of results to return (default: 5)
+            filter: Optional metadata filter (e.g., {"source": "tweet"})
+            
+        Returns:
+            List of dictionaries containing content, metadata, and similarity score
+        """
+        results = await self.vectorstore.asimilarity_search_with_score(
+            query=query,
+            k=k,
+            filter=self._vectorstore_filter(filter)
+        )
+        
+        return self._format_results(results)
     
     def delete(self, ids: List[str]) -> None:
         """
@@ -118,6 +328,34 @@ class LongTermMemoryStore:
         Returns:
             True if successful, False otherwise
         """
+        raise NotImplementedError
+    
+    def delete_collection(self) -> bool:
+        """
+        Delete the entire collection from the backend.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        raise NotImplementedError
+    
+    def close(self) -> None:
+        """Release what the store holds open; called when it is evicted from the store cache."""
+
+
+class ChromaMemoryStore(LongTermMemoryStore):
+    """Memory store backed by a Chroma collection; subclasses choose the client."""
+    
+    def _create_vectorstore(self) -> VectorStore:
+        from langchain_chroma import Chroma
+        
+        return Chroma(
+            collection_name=self.collection_name,
+            embedding_function=self.embeddings,
+            client=self._get_chroma_client()
+        )
+    
+    def delete_all(self) -> bool:
         try:
             client = self._get_chroma_client()
             collection = client.get_collection(name=self.collection_name)
@@ -131,12 +369,6 @@ class LongTermMemoryStore:
             return False
     
     def delete_collection(self) -> bool:
-        """
-        Delete the entire collection from ChromaDB.
-        
-        Returns:
-            True if successful, False otherwise
-        """
         try:
             client = self._get_chroma_client()
             client.delete_collection(name=self.collection_name)
@@ -146,16 +378,206 @@ class LongTermMemoryStore:
             print(f"[MEMORY] Error deleting collection {self.collection_name}: {e}")
             return False
     
-    def _get_chroma_client(self) -> ClientAPI:
-        """Get or create Chroma client."""
-        global _client
-        if _client is None:
-            _client = chromadb.CloudClient(
+    def _get_chroma_client(self):
+        raise NotImplementedError
+
+
+class CloudChromaMemoryStore(ChromaMemoryStore):
+    """Chroma Cloud collections (requires CHROMA_API_KEY, CHROMA_TENANT, CHROMA_DATABASE)."""
+    
+    def _get_chroma_client(self):
+        """Get or create the shared Chroma Cloud client."""
+        import chromadb
+        
+        return registry.get_or_create(
+            ("chroma", "cloud"),
+            lambda: chromadb.CloudClient(
                 database=CHROMA_DATABASE,
                 tenant=CHROMA_TENANT,
                 api_key=CHROMA_API_KEY
             )
-        return _client
+        )
+
+
+class LocalChromaMemoryStore(ChromaMemoryStore):
+    """Embedded Chroma persisted on local disk under CHROMA_PERSIST_DIR."""
+    
+    def _get_chroma_client(self):
+        """Get or create the shared embedded Chroma client."""
+        import chromadb
+        
+        return registry.get_or_create(
+            ("chroma", "local", CHROMA_PERSIST_DIR),
+            lambda: chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+        )
+
+
+# Process-wide in-memory collections; they outlive store wrappers evicted from the LRU
+_in_memory_collections: Dict[str, InMemoryVectorStore] = {}
+_in_memory_lock = threading.Lock()
+
+
+class InMemoryMemoryStore(LongTermMemoryStore):
+    """In-process vector index; nothing is persisted across restarts."""
+    
+    def _create_vectorstore(self) -> VectorStore:
+        with _in_memory_lock:
+            vectorstore = _in_memory_collections.get(self.collection_name)
+            if vectorstore is None:
+                vectorstore = InMemoryVectorStore(embedding=self.embeddings)
+                _in_memory_collections[self.collection_name] = vectorstore
+            return vectorstore
+    
+    def _vectorstore_filter(self, filter: Optional[Dict[str, Any]]) -> Any:
+        if not filter:
+            return None
+        return lambda doc: all(doc.metadata.get(key) == value for key, value in filter.items())
+    
+    def update_document(self, document_id: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        # add_documents overwrites documents with the same id
+        document = Document(page_content=text, metadata=metadata or {})
+        self.vectorstore.add_documents(documents=[document], ids=[document_id])
+    
+    def delete_all(self) -> bool:
+        count = len(self.vectorstore.store)
+        self.vectorstore.store.clear()
+        print(f"[MEMORY] Deleted all {count} documents from collection {self.collection_name}")
+        return True
+    
+    def delete_collection(self) -> bool:
+        with _in_memory_lock:
+            _in_memory_collections.pop(self.collection_name, None)
+        print(f"[MEMORY] Deleted collection {self.collection_name}")
+        return True
+
+
+# Open NumPy indexes, one per collection, so evicted wrappers never double-append to the same files
+_numpy_indexes: Dict[str, Any] = {}
+
+
+class NumpyMemoryStore(LongTermMemoryStore):
+    """In-process NumPy index per collection, persisted as memory-mapped files under NUMPY_INDEX_DIR."""
+    
+    def _create_vectorstore(self) -> VectorStore:
+        from backend.vector_index import NumpyVectorStore, index_path
+        
+        with _in_memory_lock:
+            vectorstore = _numpy_indexes.get(self.collection_name)
+            if vectorstore is None:
+                vectorstore = NumpyVectorStore(
+                    embedding=self.embeddings,
+                    path=index_path(NUMPY_INDEX_DIR, self.collection_name)
+                )
+                _numpy_indexes[self.collection_name] = vectorstore
+            return vectorstore
+    
+    def update_document(self, document_id: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        # Re-adding an id tombstones the old row
+        document = Document(page_content=text, metadata=metadata or {})
+        self.vectorstore.add_documents(documents=[document], ids=[document_id])
+    
+    def delete_all(self) -> bool:
+        count = len(self.vectorstore)
+        self.vectorstore.destroy()
+        print(f"[MEMORY] Deleted all {count} documents from collection {self.collection_name}")
+        return True
+    
+    def delete_collection(self) -> bool:
+        with _in_memory_lock:
+            _numpy_indexes.pop(self.collection_name, None)
+        self.vectorstore.destroy()
+        print(f"[MEMORY] Deleted collection {self.collection_name}")
+        return True
+    
+    def close(self) -> None:
+        # Unmap the index and forget it; the next store for the collection reopens the files
+        with _in_memory_lock:
+            if _numpy_indexes.get(self.collection_name) is self.vectorstore:
+                del _numpy_indexes[self.collection_name]
+        self.vectorstore.close()
+
+
+MEMORY_BACKENDS = {
+    "chroma_cloud": CloudChromaMemoryStore,
+    "chroma_local": LocalChromaMemoryStore,
+    "in_memory": InMemoryMemoryStore,
+    "numpy": NumpyMemoryStore,
+}
+
+
+def create_memory_store(memory_collection_name: str = "default_collection") -> LongTermMemoryStore:
+    """
+    Create a memory store for a collection using the configured MEMORY_BACKEND.
+    
+    Args:
+        memory_collection_name: Name of the collection
+        
+    Returns:
+        LongTermMemoryStore for the configured backend
+    """
+    store_class = MEMORY_BACKENDS.get(MEMORY_BACKEND)
+    if store_class is None:
+        raise ValueError(
+            f"Unknown MEMORY_BACKEND '{MEMORY_BACKEND}'. Expected one of: {', '.join(MEMORY_BACKENDS)}"
+        )
+    return store_class(memory_collection_name=memory_collection_name)
+
+
+_store_cache: "OrderedDict[str, LongTermMemoryStore]" = OrderedDict()
+_store_cache_lock = threading.Lock()
+
+
+def get_memory_store(memory_collection_name: str = "default_collection") -> LongTermMemoryStore:
+    """
+    Get a cached LongTermMemoryStore for a collection.
+    
+    Stores are kept in a bounded LRU (MEMORY_STORE_CACHE_SIZE entries) so the
+    backend's collection lookup only happens on a cache miss. Evicted stores
+    are closed, which releases e.g. the memory map of a NumPy index.
+    
+    Args:
+        memory_collection_name: Name of the collection
+        
+    Returns:
+        LongTermMemoryStore instance for the collection
+    """
+    with _store_cache_lock:
+        store = _store_cache.get(memory_collection_name)
+        if store is not None:
+            _store_cache.move_to_end(memory_collection_name)
+            return store
+    
+    # Build outside the lock; the collection lookup may be a network call
+    store = create_memory_store(memory_collection_name=memory_collection_name)
+    
+    with _store_cache_lock:
+        existing = _store_cache.get(memory_collection_name)
+        if existing is not None:
+            _store_cache.move_to_end(memory_collection_name)
+            return existing
+        _store_cache[memory_collection_name] = store
+        evicted_stores = []
+        while len(_store_cache) > MEMORY_STORE_CACHE_SIZE:
+            evicted, evicted_store = _store_cache.popitem(last=False)
+            evicted_stores.append(evicted_store)
+            print(f"[MEMORY] Evicted store for collection {evicted} from cache")
+    for evicted_store in evicted_stores:
+        evicted_store.close()
+    return store
+
+
+def invalidate_memory_store(memory_collection_name: Optional[str] = None) -> None:
+    """
+    Drop a cached store (or all cached stores when no name is given).
+    
+    Args:
+        memory_collection_name: Collection whose store should be dropped
+    """
+    with _store_cache_lock:
+        if memory_collection_name is None:
+            _store_cache.clear()
+        else:
+            _store_cache.pop(memory_collection_name, None)
 
 
 def delete_group_memory(group_id: str) -> bool:
@@ -170,8 +592,10 @@ def delete_group_memory(group_id: str) -> bool:
     """
     try:
         collection_name = f"agent_{group_id}_memory"
-        memory_store = LongTermMemoryStore(memory_collection_name=collection_name)
+        memory_store = get_memory_store(memory_collection_name=collection_name)
+        # The cached wrapper points at the collection being deleted
+        invalidate_memory_store(collection_name)
         return memory_store.delete_collection()
     except Exception as e:
         print(f"[MEMORY] Error deleting group memory for {group_id}: {e}")
-        return False      
\ No newline at end of file
+        return False
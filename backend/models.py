@@ -1,10 +1,37 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+import random
+import threading
+import time
 import uuid
 import enum
 from backend.database import Base
 
+_message_id_lock = threading.Lock()
+_last_message_id = (0, 0)
+
+
+def time_ordered_id() -> str:
+    """Generate a UUIDv7-style id that sorts in creation order within this process.
+
+    Messages written in one transaction share the same server timestamp, so
+    the id is what keeps them in insertion order under (created_at, id).
+    """
+    global _last_message_id
+    with _message_id_lock:
+        ms = time.time_ns() // 1_000_000
+        last_ms, seq = _last_message_id
+        if ms > last_ms:
+            seq = random.getrandbits(10)
+        else:
+            ms, seq = last_ms, seq + 1
+            if seq > 0xFFF:
+                ms, seq = ms + 1, 0
+        _last_message_id = (ms, seq)
+    value = (ms << 80) | (0x7 << 76) | (seq << 64) | (0b10 << 62) | random.getrandbits(62)
+    return str(uuid.UUID(int=value))
+
 
 class AgentType(str, enum.Enum):
     MANUAL = "manual"
@@ -32,6 +59,10 @@ class Group(Base):
     description = Column(Text, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
 
+    members = relationship(
+        "GroupMember", back_populates="group", cascade="all, delete-orphan", passive_deletes=True
+    )
+
 
 class GroupMember(Base):
     __tablename__ = "group_members"
@@ -40,17 +71,25 @@ class GroupMember(Base):
     group_id = Column(String, ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
     agent_id = Column(String, ForeignKey("agents.id", ondelete="CASCADE"), nullable=False)
 
+    group = relationship("Group", back_populates="members")
+    agent = relationship("Agent")
+
 
 class Message(Base):
     __tablename__ = "messages"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String, primary_key=True, default=time_ordered_id)
     group_id = Column(String, ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
     sender_id = Column(String, nullable=True)
     sender_type = Column(String, nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
 
+    # Serves keyset pagination over (created_at, id) within a group
+    __table_args__ = (
+        Index("ix_messages_group_created_id", "group_id", "created_at", "id"),
+    )
+
 
 class Conversation(Base):
     __tablename__ = "conversations"
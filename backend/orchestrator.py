@@ -1,68 +1,298 @@
 """Critic agent orchestration for chat system using LangGraph."""
-from typing import Optional, Dict, Any, List, AsyncGenerator
-from langchain_core.messages import HumanMessage, SystemMessage
-from backend.graph import app as graph_app
-from backend.memory import LongTermMemoryStore
+from typing import Optional, Dict, Any, List, AsyncGenerator, Awaitable, Callable, NamedTuple, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from langchain_core.messages import AIMessageChunk, HumanMessage, SystemMessage
+from backend.config import (
+    PREFETCH_MEMORY_TIMEOUT, PREFETCH_SEARCH_TIMEOUT, PREFETCH_HISTORY_TIMEOUT, GRAPH_MODE, CONTEXT_PROMPT_RESERVE,
+    RESPONDER_MODEL
+)
+from backend.graph import (
+    app as graph_app, best_of_n_app, AgentState, route_query,
+    fetch_search_results, afetch_search_results, format_search_context
+)
+from backend.agents.critic import is_approved, critique_score
+from backend.budget import turn_deadline, turn_token_budget
+from backend.context_budget import ContextBudget
+from backend.memory import get_memory_store
+from backend.ingestion import memory_ingestion
+from backend.response_cache import response_cache, Scope
+import asyncio
 import json
+import time
 
-def process_multi_agent_chat(
+# Worker threads for the sync prefetch path
+_prefetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch")
+
+# Token budget for the responder model's prompt
+_context_budget = ContextBudget(RESPONDER_MODEL)
+
+def _memory_collection_name(agent_id: str) -> str:
+    return f"agent_{agent_id}_memory"
+
+def _format_memories(memories: List[Dict[str, Any]], max_tokens: int) -> str:
+    """Format retrieved memories, most relevant first, within max_tokens."""
+    items = _context_budget.fit([f"- {mem['content']}" for mem in memories or []], max_tokens)
+    if not items:
+        return ""
+    return "Relevant memories:\n" + "\n".join(items)
+
+def _format_history(conversation_history: Optional[list], max_tokens: int) -> str:
+    """Format recent conversation within max_tokens, dropping the oldest messages first."""
+    # Use recent conversation history as context
+    if not conversation_history:
+        return ""
+    newest_first = [f"{msg['role']}: {msg['content']}" for msg in reversed(conversation_history)]
+    items = _context_budget.fit(newest_first, max_tokens)
+    if not items:
+        return ""
+    return "Recent conversation:\n" + "\n".join(reversed(items))
+
+def _format_summary(summary: Optional[str]) -> str:
+    return f"Conversation summary so far:\n{summary}" if summary else ""
+
+def _chunk_text(chunk: AIMessageChunk) -> str:
+    """Extract the text of a streamed message chunk (content may be a list of parts)."""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            parts.append(part.get("text", ""))
+    return "".join(parts)
+
+def _fetch_memories(user_message: str, agent_id: str) -> List[Dict[str, Any]]:
+    memory_store = get_memory_store(_memory_collection_name(agent_id))
+    return memory_store.search(query=user_message, k=3)
+
+async def _afetch_memories(user_message: str, agent_id: str) -> List[Dict[str, Any]]:
+    memory_store = await asyncio.to_thread(get_memory_store, _memory_collection_name(agent_id))
+    return await memory_store.asearch(query=user_message, k=3)
+
+class Prefetched(NamedTuple):
+    context: str
+    search_context: Optional[str]
+    history: Optional[list]
+    allocation: Dict[str, int]
+
+def _merge_prefetched(
+    fetched: Dict[str, Any],
+    memory_type: str,
+    conversation_history: Optional[list],
+    needs_search: bool,
+    reserved: int
+) -> Prefetched:
+    """Fit whatever the prefetch sources returned into the responder's context budget.
+    
+    The rolling conversation summary is short and bounded, so it is always kept
+    and counted as reserved rather than competing with the other sections.
+    """
+    summary = _format_summary(fetched.get("summary")) if memory_type in ("short", "long") else ""
+    memories = fetched.get("memory", []) if memory_type == "long" else []
+    history = fetched.get("history", conversation_history) if memory_type == "short" else None
+    search_results = fetched.get("search", []) if needs_search else []
+    
+    # Size each section untrimmed (raw search results slightly overestimate), then
+    # let the budget decide how much of each to keep
+    allocation = _context_budget.allocate({
+        "memory": _context_budget.count("\n".join(m["content"] for m in memories)),
+        "history": _context_budget.count("\n".join(m["content"] for m in history or [])),
+        "search": _context_budget.count(str(search_results)) if search_results else 0
+    }, reserved + _context_budget.count(summary))
+    
+    context = ""
+    if memory_type == "long":
+        context = _format_memories(memories, allocation["memory"])
+    elif memory_type == "short":
+        context = _format_history(history, allocation["history"])
+    context = "\n\n".join(section for section in (summary, context) if section)
+    
+    # "" tells the responder the search was already attempted (even if it timed out)
+    search_context = None
+    if needs_search:
+        search_context = format_search_context(search_results, allocation["search"]) if search_results else ""
+    return Prefetched(context, search_context, history, allocation)
+
+def _reserved_tokens(user_message: str, agent_description: Optional[str]) -> int:
+    """Prompt tokens taken before any context: fixed prompt text, role and question."""
+    return CONTEXT_PROMPT_RESERVE + _context_budget.count(user_message) + _context_budget.count(agent_description)
+
+def _prefetch_context(
     user_message: str,
     agent_id: str,
-    agent_description: Optional[str] = None, 
+    memory_type: str,
     conversation_history: Optional[list] = None,
-    store_memory: bool = True,
-    memory_type: str = "long"
-) -> Dict[str, Any]:
-    """Process a user message through the LangGraph workflow.
+    load_history: Optional[Callable[[], list]] = None,
+    needs_search: Optional[bool] = None,
+    reserved: int = CONTEXT_PROMPT_RESERVE,
+    load_summary: Optional[Callable[[], Optional[str]]] = None
+) -> Prefetched:
+    """Fetch memory, web search, history and the conversation summary concurrently, each under its own deadline.
+    
+    Sources that fail or miss their deadline are dropped, so the wait is bounded
+    by the slowest source that finishes rather than the sum of all of them.
     
-    Args:
-        user_message: The user's message
-        agent_id: Unique identifier for the agent
-        agent_description: Optional description
-        conversation_history: Recent conversation messages
-        store_memory: Whether to store this conversation
-        memory_type: "short" or "long"
-        
     Returns:
-        Dictionary with user message, manual agent response, and critic response
+        Prefetched context, search context, recent history (short memory) and
+        the token allocation used to fit them
     """
+    if needs_search is None:
+        _, needs_search = route_query(user_message)
     
-    # Context retrieval
-    context = ""
+    sources: Dict[str, Tuple[Callable[[], Any], float]] = {}
     if memory_type == "long":
-        # Initialize memory store
+        sources["memory"] = (lambda: _fetch_memories(user_message, agent_id), PREFETCH_MEMORY_TIMEOUT)
+    elif memory_type == "short" and conversation_history is None and load_history is not None:
+        sources["history"] = (load_history, PREFETCH_HISTORY_TIMEOUT)
+    if memory_type in ("short", "long") and load_summary is not None:
+        sources["summary"] = (load_summary, PREFETCH_HISTORY_TIMEOUT)
+    if needs_search:
+        sources["search"] = (lambda: fetch_search_results(user_message.lower()), PREFETCH_SEARCH_TIMEOUT)
+    
+    started = time.monotonic()
+    futures = {name: _prefetch_pool.submit(fn) for name, (fn, _) in sources.items()}
+    fetched: Dict[str, Any] = {}
+    for name, future in futures.items():
+        remaining = max(0.0, sources[name][1] - (time.monotonic() - started))
         try:
-            memory_store = LongTermMemoryStore(
-                memory_collection_name=f"agent_{agent_id}_memory"
-            )
-            memories = memory_store.search(query=user_message, k=3)
-            if memories:
-                context = "Relevant memories:\n" + "\n".join([
-                    f"- {mem['content'][:150]}..." for mem in memories
-                ])
+            fetched[name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            print(f"[PREFETCH] {name} timed out after {sources[name][1]}s")
         except Exception as e:
-            print(f"Memory initialization/retrieval error: {e}")
-            
-    elif memory_type == "short":
-        # Use recent conversation history as context
-        if conversation_history:
-            context = "Recent conversation:\n" + "\n".join([
-                f"{msg['role']}: {msg['content'][:100]}..." 
-                for msg in conversation_history[-5:]
-            ])
-            
-    # Prepare initial messages
-    initial_messages = []
-    if context:
-        initial_messages.append(SystemMessage(content=f"Context for this conversation:\n{context}"))
+            print(f"[PREFETCH] {name} error: {type(e).__name__}: {e}")
+    
+    print(f"[PREFETCH] Fetched {list(fetched)} of {list(sources)} in {time.monotonic() - started:.2f}s")
+    return _merge_prefetched(fetched, memory_type, conversation_history, needs_search, reserved)
+
+async def _aprefetch_context(
+    user_message: str,
+    agent_id: str,
+    memory_type: str,
+    conversation_history: Optional[list] = None,
+    load_history: Optional[Callable[[], Awaitable[list]]] = None,
+    needs_search: Optional[bool] = None,
+    reserved: int = CONTEXT_PROMPT_RESERVE,
+    load_summary: Optional[Callable[[], Awaitable[Optional[str]]]] = None
+) -> Prefetched:
+    """Async variant of _prefetch_context running the sources as concurrent tasks."""
+    if needs_search is None:
+        _, needs_search = route_query(user_message)
+    
+    sources: Dict[str, Tuple[Awaitable[Any], float]] = {}
+    if memory_type == "long":
+        sources["memory"] = (_afetch_memories(user_message, agent_id), PREFETCH_MEMORY_TIMEOUT)
+    elif memory_type == "short" and conversation_history is None and load_history is not None:
+        sources["history"] = (load_history(), PREFETCH_HISTORY_TIMEOUT)
+    if memory_type in ("short", "long") and load_summary is not None:
+        sources["summary"] = (load_summary(), PREFETCH_HISTORY_TIMEOUT)
+    if needs_search:
+        sources["search"] = (afetch_search_results(user_message.lower()), PREFETCH_SEARCH_TIMEOUT)
+    
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *[asyncio.wait_for(awaitable, timeout) for awaitable, timeout in sources.values()],
+        return_exceptions=True
+    )
+    fetched: Dict[str, Any] = {}
+    for name, result in zip(sources, results):
+        if isinstance(result, asyncio.TimeoutError):
+            print(f"[PREFETCH] {name} timed out after {sources[name][1]}s")
+        elif isinstance(result, BaseException):
+            print(f"[PREFETCH] {name} error: {type(result).__name__}: {result}")
+        else:
+            fetched[name] = result
     
+    print(f"[PREFETCH] Fetched {list(fetched)} of {list(sources)} in {time.monotonic() - started:.2f}s")
+    return _merge_prefetched(fetched, memory_type, conversation_history, needs_search, reserved)
+
+def _response_cacheable(memory_type: str, is_memory_question: bool, needs_search: bool) -> bool:
+    """Only answers that don't depend on time or on the conversation so far are cached."""
+    return response_cache.enabled and memory_type != "short" and not is_memory_question and not needs_search
+
+def _lookup_cached_response(
+    user_message: str,
+    agent_id: str,
+    agent_description: Optional[str],
+    memory_type: str,
+    is_memory_question: bool,
+    needs_search: bool
+) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[Scope, Any]]]:
+    """Check the semantic response cache.
+    
+    Returns:
+        Tuple of (cache hit or None, (scope, query vector) to store the answer under, or None)
+    """
+    if not _response_cacheable(memory_type, is_memory_question, needs_search):
+        response_cache.record_bypass()
+        return None, None
+    vector = response_cache.embed(user_message)
+    if vector is None:
+        return None, None
+    scope = response_cache.scope(agent_id, agent_description)
+    return response_cache.lookup(scope, user_message, vector), (scope, vector)
+
+async def _alookup_cached_response(
+    user_message: str,
+    agent_id: str,
+    agent_description: Optional[str],
+    memory_type: str,
+    is_memory_question: bool,
+    needs_search: bool
+) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[Scope, Any]]]:
+    """Async variant of _lookup_cached_response."""
+    if not _response_cacheable(memory_type, is_memory_question, needs_search):
+        response_cache.record_bypass()
+        return None, None
+    vector = await response_cache.aembed(user_message)
+    if vector is None:
+        return None, None
+    scope = response_cache.scope(agent_id, agent_description)
+    return response_cache.lookup(scope, user_message, vector), (scope, vector)
+
+def _cache_approved_response(
+    cache_key: Optional[Tuple[Scope, Any]],
+    user_message: str,
+    final_response: str,
+    critic_response: Dict[str, Any]
+) -> None:
+    if cache_key is None or not final_response:
+        return
+    if is_approved(critic_response):
+        scope, vector = cache_key
+        response_cache.store(scope, user_message, vector, final_response, critic_response)
+
+def _enqueue_conversation(agent_id: str, user_message: str, final_response: str) -> None:
+    conversation_text = f"User: {user_message}\nResponse: {final_response}"
+    memory_ingestion.enqueue(
+        _memory_collection_name(agent_id),
+        conversation_text,
+        {"type": "conversation", "agent_id": agent_id}
+    )
+
+def _graph():
+    """Return the compiled graph for GRAPH_MODE ("revise" or "best_of_n")."""
+    return best_of_n_app if GRAPH_MODE == "best_of_n" else graph_app
+
+def _build_inputs(
+    user_message: str,
+    agent_description: Optional[str],
+    memory_type: str,
+    prefetched: Prefetched,
+    deadline: Optional[float] = None,
+    token_budget: Optional[int] = None
+) -> AgentState:
+    """Build the initial graph state for a user message."""
+    # Prepare initial messages; retrieved context goes into the responder's system
+    # prompt via memory_context, so it isn't repeated here
+    initial_messages = []
     if agent_description:
         initial_messages.append(SystemMessage(content=f"Your role: {agent_description}"))
         
     initial_messages.append(HumanMessage(content=user_message))
     
-    from backend.graph import AgentState
-    inputs: AgentState = {
+    return {
         "messages": initial_messages,
         "feedback_count": 0,
         "memory_type": memory_type,
@@ -70,28 +300,145 @@ def process_multi_agent_chat(
         "final_response": "",
         "all_responses": [],
         "revision_history": [],
-        "memory_context": context if context else None  # Pass memory context to responder
+        "memory_context": prefetched.context or None,  # Pass memory context to responder
+        "search_context": prefetched.search_context,
+        "context_allocation": prefetched.allocation,
+        "speculative_draft": None,
+        "candidates": [],
+        "deadline": deadline,
+        "token_budget": token_budget,
+        "tokens_used": 0,
+        "node_latency": {},
+        "node_tokens": {},
+        "budget": {},
+        "best_response": None,
+        "best_score": None,
+        "recent_history": prefetched.history
     }
+
+def process_multi_agent_chat(
+    user_message: str,
+    agent_id: str,
+    agent_description: Optional[str] = None, 
+    conversation_history: Optional[list] = None,
+    store_memory: bool = True,
+    memory_type: str = "long",
+    load_history: Optional[Callable[[], list]] = None,
+    deadline_seconds: Optional[float] = None,
+    token_budget: Optional[int] = None,
+    load_summary: Optional[Callable[[], Optional[str]]] = None
+) -> Dict[str, Any]:
+    """Process a user message through the LangGraph workflow.
     
-    final_state = graph_app.invoke(inputs)
+    Args:
+        user_message: The user's message
+        agent_id: Unique identifier for the agent
+        agent_description: Optional description
+        conversation_history: Recent conversation messages
+        store_memory: Whether to store this conversation
+        memory_type: "short" or "long"
+        load_history: Optional loader for recent messages, used for short memory
+            when conversation_history is not given
+        deadline_seconds: Stop revising once another cycle won't finish within this
+            many seconds of the request (None = CHAT_DEADLINE_SECONDS)
+        token_budget: Stop revising once another cycle won't fit in this many LLM
+            tokens (None = CHAT_TOKEN_BUDGET)
+        load_summary: Optional loader for the rolling conversation summary, added
+            to the context for short and long memory
+        
+    Returns:
+        Dictionary with user message, manual agent response, and critic response
+    """
+    deadline = turn_deadline(deadline_seconds)
+    is_memory_question, needs_search = route_query(user_message)
+    
+    # Near-identical questions reuse an earlier approved answer without running the graph
+    cached, cache_key = _lookup_cached_response(
+        user_message, agent_id, agent_description, memory_type, is_memory_question, needs_search
+    )
+    if cached:
+        return _cached_result(user_message, cached, agent_id, store_memory, memory_type)
+    
+    # Context retrieval: memory, web search and history are prefetched concurrently
+    prefetched = _prefetch_context(
+        user_message, agent_id, memory_type, conversation_history, load_history, needs_search,
+        _reserved_tokens(user_message, agent_description), load_summary
+    )
+    inputs = _build_inputs(
+        user_message, agent_description, memory_type, prefetched, deadline, turn_token_budget(token_budget)
+    )
     
+    final_state = _graph().invoke(inputs)
+    return _chat_result(final_state, user_message, agent_id, store_memory, memory_type, cache_key)
+
+async def aprocess_multi_agent_chat(
+    user_message: str,
+    agent_id: str,
+    agent_description: Optional[str] = None, 
+    conversation_history: Optional[list] = None,
+    store_memory: bool = True,
+    memory_type: str = "long",
+    load_history: Optional[Callable[[], Awaitable[list]]] = None,
+    deadline_seconds: Optional[float] = None,
+    token_budget: Optional[int] = None,
+    load_summary: Optional[Callable[[], Awaitable[Optional[str]]]] = None
+) -> Dict[str, Any]:
+    """Async variant of process_multi_agent_chat for use from async routes."""
+    deadline = turn_deadline(deadline_seconds)
+    is_memory_question, needs_search = route_query(user_message)
+    
+    cached, cache_key = await _alookup_cached_response(
+        user_message, agent_id, agent_description, memory_type, is_memory_question, needs_search
+    )
+    if cached:
+        return _cached_result(user_message, cached, agent_id, store_memory, memory_type)
+    
+    prefetched = await _aprefetch_context(
+        user_message, agent_id, memory_type, conversation_history, load_history, needs_search,
+        _reserved_tokens(user_message, agent_description), load_summary
+    )
+    inputs = _build_inputs(
+        user_message, agent_description, memory_type, prefetched, deadline, turn_token_budget(token_budget)
+    )
+    
+    final_state = await _graph().ainvoke(inputs)
+    return _chat_result(final_state, user_message, agent_id, store_memory, memory_type, cache_key)
+
+def _cached_result(
+    user_message: str,
+    cached: Dict[str, Any],
+    agent_id: str,
+    store_memory: bool,
+    memory_type: str
+) -> Dict[str, Any]:
+    # A cached turn is still part of the conversation, so it is remembered like any other
+    if store_memory and memory_type == "long":
+        _enqueue_conversation(agent_id, user_message, cached["response"])
+    return {
+        "user_message": user_message,
+        "manual_agent_response": cached["response"],
+        "critic_agent_response": cached["critic_response"],
+        "all_responses": [cached["response"]],
+        "cached": True
+    }
+
+def _chat_result(
+    final_state: Dict[str, Any],
+    user_message: str,
+    agent_id: str,
+    store_memory: bool,
+    memory_type: str,
+    cache_key: Optional[Tuple[Scope, Any]] = None
+) -> Dict[str, Any]:
     final_response = final_state.get("final_response", "")
     all_responses = final_state.get("all_responses", [])
     critic_response = final_state.get("critic_response", {})
     
-    # Store in memory if enabled and long term
+    _cache_approved_response(cache_key, user_message, final_response, critic_response)
+    
+    # Store in memory if enabled and long term (written behind by the ingestion worker)
     if store_memory and memory_type == "long":
-        try:
-            memory_store = LongTermMemoryStore(
-                memory_collection_name=f"agent_{agent_id}_memory"
-            )
-            conversation_text = f"User: {user_message}\nResponse: {final_response}"
-            memory_store.store(
-                [conversation_text], 
-                [{"type": "conversation", "agent_id": agent_id}]
-            )
-        except Exception as e:
-            print(f"Memory storage error (continuing without memory): {e}")
+        _enqueue_conversation(agent_id, user_message, final_response)
 
     return {
         "user_message": user_message,
@@ -106,58 +453,77 @@ async def stream_multi_agent_chat(
     agent_description: Optional[str] = None, 
     conversation_history: Optional[list] = None,
     store_memory: bool = True,
-    memory_type: str = "long"
+    memory_type: str = "long",
+    load_history: Optional[Callable[[], Awaitable[list]]] = None,
+    deadline_seconds: Optional[float] = None,
+    token_budget: Optional[int] = None,
+    load_summary: Optional[Callable[[], Awaitable[Optional[str]]]] = None
 ) -> AsyncGenerator[str, None]:
     """Stream the multi-agent chat process using SSE."""
+    deadline = turn_deadline(deadline_seconds)
+    is_memory_question, needs_search = route_query(user_message)
     
-    # Context retrieval (same as above)
-    context = ""
-    if memory_type == "long":
-        try:
-            memory_store = LongTermMemoryStore(
-                memory_collection_name=f"agent_{agent_id}_memory"
-            )
-            memories = memory_store.search(query=user_message, k=3)
-            if memories:
-                context = "Relevant memories:\n" + "\n".join([
-                    f"- {mem['content'][:150]}..." for mem in memories
-                ])
-        except Exception as e:
-            print(f"Memory initialization/retrieval error: {e}")
-            
-    elif memory_type == "short":
-        if conversation_history:
-            context = "Recent conversation:\n" + "\n".join([
-                f"{msg['role']}: {msg['content'][:100]}..." 
-                for msg in conversation_history[-5:]
-            ])
-            
-    initial_messages = []
-    if context:
-        initial_messages.append(SystemMessage(content=f"Context for this conversation:\n{context}"))
-    if agent_description:
-        initial_messages.append(SystemMessage(content=f"Your role: {agent_description}"))
-    initial_messages.append(HumanMessage(content=user_message))
+    # A cache hit is streamed back straight away as a single approved iteration
+    cached, cache_key = await _alookup_cached_response(
+        user_message, agent_id, agent_description, memory_type, is_memory_question, needs_search
+    )
+    if cached:
+        critic_resp = cached["critic_response"]
+        if store_memory and memory_type == "long":
+            _enqueue_conversation(agent_id, user_message, cached["response"])
+        yield json.dumps({
+            "type": "responder",
+            "iteration": 1,
+            "content": cached["response"],
+            "is_revision": False,
+            "cached": True
+        }) + "\n"
+        yield json.dumps({
+            "type": "critic",
+            "iteration": 1,
+            "content": critic_resp,
+            "verdict": critic_resp.get("verdict", "unknown"),
+            "feedback": critic_resp.get("feedback", "")
+        }) + "\n"
+        yield json.dumps({
+            "type": "complete",
+            "total_iterations": 1,
+            "final_response": cached["response"],
+            "cached": True
+        }) + "\n"
+        return
     
-    from backend.graph import AgentState
-    inputs: AgentState = {
-        "messages": initial_messages,
-        "feedback_count": 0,
-        "memory_type": memory_type,
-        "critic_response": {},
-        "final_response": "",
-        "all_responses": [],
-        "revision_history": [],
-        "memory_context": context if context else None  # Pass memory context to responder
-    }
+    # Context retrieval (same as above, without blocking the event loop)
+    prefetched = await _aprefetch_context(
+        user_message, agent_id, memory_type, conversation_history, load_history, needs_search,
+        _reserved_tokens(user_message, agent_description), load_summary
+    )
+    inputs = _build_inputs(
+        user_message, agent_description, memory_type, prefetched, deadline, turn_token_budget(token_budget)
+    )
     
     # Track iteration count and responses
     iteration = 0
     all_responses = []  # Track all responses to pick best one
     current_response = ""
+    critic_response = {}
+    budget_response = None  # Best draft chosen by the critic when the budget ran out
     
-    # Stream events from the graph
-    async for event in graph_app.astream(inputs):
+    # Stream events from the graph: "messages" carries LLM token chunks,
+    # "updates" carries each node's output once it finishes
+    async for mode, event in _graph().astream(inputs, stream_mode=["updates", "messages"]):
+        if mode == "messages":
+            message, metadata = event
+            if metadata.get("langgraph_node") == "responder" and isinstance(message, AIMessageChunk):
+                delta = _chunk_text(message)
+                if delta:
+                    yield json.dumps({
+                        "type": "responder_delta",
+                        "iteration": iteration + 1,
+                        "content": delta
+                    }) + "\n"
+            continue
+        
         print(f"[ORCHESTRATOR] Event keys: {event.keys()}")
         for key, value in event.items():
             print(f"[ORCHESTRATOR] Key: {key}, Value keys: {value.keys() if isinstance(value, dict) else type(value)}")
@@ -177,15 +543,62 @@ async def stream_multi_agent_chat(
                     all_responses.append(current_response)
                 
                 # Yield responder's output with iteration info
+                revision = (value.get("revision_history") or [{}])[-1]
                 yield json.dumps({
                     "type": "responder",
                     "iteration": iteration,
                     "content": current_response,
-                    "is_revision": iteration > 1
+                    "is_revision": iteration > 1,
+                    "speculative": revision.get("speculative", False),
+                    "refined": revision.get("refined", False)
+                }) + "\n"
+            elif key == "drafts":
+                # Best-of-N: report every candidate as soon as all drafts are written
+                for candidate in value.get("candidates", []):
+                    yield json.dumps({
+                        "type": "candidate",
+                        "index": candidate["index"],
+                        "temperature": candidate["temperature"],
+                        "content": candidate["response"]
+                    }) + "\n"
+            elif key == "judge":
+                for candidate in value.get("candidates", []):
+                    critique = candidate.get("critique", {})
+                    yield json.dumps({
+                        "type": "candidate_critic",
+                        "index": candidate["index"],
+                        "verdict": critique.get("verdict", "unknown"),
+                        "score": critique_score(critique),
+                        "feedback": critique.get("feedback", "")
+                    }) + "\n"
+                # The selected candidate is then reported like a single approved iteration
+                iteration = 1
+                current_response = value.get("final_response", "")
+                critic_response = value.get("critic_response", {})
+                if current_response:
+                    all_responses.append(current_response)
+                selected = (value.get("revision_history") or [{}])[-1].get("candidate")
+                yield json.dumps({
+                    "type": "responder",
+                    "iteration": iteration,
+                    "content": current_response,
+                    "is_revision": False,
+                    "candidate": selected
+                }) + "\n"
+                yield json.dumps({
+                    "type": "critic",
+                    "iteration": iteration,
+                    "content": critic_response,
+                    "verdict": critic_response.get("verdict", "unknown"),
+                    "feedback": critic_response.get("feedback", "")
                 }) + "\n"
+                budget = value.get("budget") or {}
+                if budget:
+                    yield json.dumps({"type": "budget", "iteration": iteration, **budget}) + "\n"
             elif key == "critic":
                 # Yield critic's output with iteration info
                 critic_resp = value.get("critic_response", {})
+                critic_response = critic_resp
                 print(f"[ORCHESTRATOR] Critic output: {critic_resp}")
                 yield json.dumps({
                     "type": "critic",
@@ -194,32 +607,32 @@ async def stream_multi_agent_chat(
                     "verdict": critic_resp.get("verdict", "unknown"),
                     "feedback": critic_resp.get("feedback", "")
                 }) + "\n"
+                budget = value.get("budget") or {}
+                if budget:
+                    yield json.dumps({"type": "budget", "iteration": iteration, **budget}) + "\n"
+                if budget.get("exhausted") and value.get("final_response"):
+                    budget_response = value["final_response"]
     
-    # Pick the best response: prefer last valid response, fallback to any valid, then current
-    if all_responses:
+    # Pick the best response: the critic's best draft if the budget ran out, else prefer
+    # last valid response, fallback to any valid, then current
+    if budget_response:
+        final_response = budget_response
+    elif all_responses:
         final_response = all_responses[-1]  # Use last valid response
     else:
         final_response = current_response  # Fallback to whatever we have
     
     print(f"[ORCHESTRATOR] Final response selection: {len(all_responses)} valid responses, using: {final_response[:100] if final_response else 'EMPTY'}...")
     
+    # Cache and store memory (written behind by the ingestion worker) before the
+    # final event, since consumers may close the stream as soon as they see it
+    _cache_approved_response(cache_key, user_message, final_response, critic_response)
+    if store_memory and memory_type == "long" and final_response:
+        _enqueue_conversation(agent_id, user_message, final_response)
+    
     # Yield final event to signal completion
     yield json.dumps({
         "type": "complete",
         "total_iterations": iteration,
         "final_response": final_response
     }) + "\n"
-    
-    # Store memory after streaming is complete
-    if store_memory and memory_type == "long" and final_response:
-        try:
-            memory_store = LongTermMemoryStore(
-                memory_collection_name=f"agent_{agent_id}_memory"
-            )
-            conversation_text = f"User: {user_message}\nResponse: {final_response}"
-            memory_store.store(
-                [conversation_text], 
-                [{"type": "conversation", "agent_id": agent_id}]
-            )
-        except Exception as e:
-            print(f"Memory storage error: {e}")
@@ -0,0 +1,227 @@
+"""Write-behind persistence for streamed chat turns."""
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import time
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.config import (
+    TURN_PERSIST_BATCH_SIZE, TURN_PERSIST_FLUSH_INTERVAL, TURN_PERSIST_MAX_RETRIES, TURN_PERSIST_MAX_QUEUE
+)
+from backend.database import AsyncSessionLocal
+from backend import models
+
+# (group id, user message, responder content, critic text, attempts so far)
+_Turn = Tuple[str, str, str, Optional[str], int]
+
+
+class TurnPersistenceQueue:
+    """Background task that batches streamed chat turns into bulk inserts.
+
+    Streams hand their finished turn over and close immediately. Once a turn
+    arrives the worker waits up to flush_interval seconds (or until batch_size
+    turns are waiting) so concurrent streams share a flush, then resolves the
+    agents of every group in the batch with one query and writes all of their
+    messages in a single transaction. Failed batches are retried up to
+    max_retries times before being dropped.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = TURN_PERSIST_BATCH_SIZE,
+        flush_interval: float = TURN_PERSIST_FLUSH_INTERVAL,
+        max_retries: int = TURN_PERSIST_MAX_RETRIES,
+        max_queue: int = TURN_PERSIST_MAX_QUEUE
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.max_queue = max_queue
+        self._queue: Optional["asyncio.Queue[_Turn]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Failed turns waiting for their backoff to expire: (ready_at, turn)
+        self._pending_retries: List[Tuple[float, _Turn]] = []
+        self.enqueued = 0
+        self.stored = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.retries = 0
+        self.flushes = 0
+        self.last_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def start(self) -> None:
+        """Start the worker on the running event loop if it is not already running."""
+        if self._task is not None and not self._task.done():
+            return
+        self._stopping = False
+        self._queue = self._carry_over_queue()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="turn-persistence")
+        print("[PERSIST] Turn persistence worker started")
+
+    def _carry_over_queue(self) -> "asyncio.Queue[_Turn]":
+        """Queue for a new worker, holding every turn the previous one left behind.
+
+        The turns are moved rather than the old queue reused as is, since an
+        asyncio queue stays bound to the loop its first waiter ran on.
+        """
+        queue: "asyncio.Queue[_Turn]" = asyncio.Queue(maxsize=self.max_queue)
+        while self._queue is not None and not self._queue.empty():
+            queue.put_nowait(self._queue.get_nowait())
+        return queue
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop the worker after writing everything still queued."""
+        self._stopping = True
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+        print(f"[PERSIST] Turn persistence worker stopped ({self._queue.qsize() if self._queue else 0} turns left)")
+
+    def enqueue(
+        self,
+        group_id: str,
+        user_message: str,
+        responder_content: str,
+        critic_text: Optional[str] = None
+    ) -> bool:
+        """Queue a finished turn for writing.
+
+        Returns:
+            True if queued, False if the queue is full and the turn was dropped
+        """
+        self.start()
+        try:
+            self._queue.put_nowait((group_id, user_message, responder_content, critic_text, 0))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"[PERSIST] Queue full, dropping streamed turn for group {group_id}")
+            return False
+        self.enqueued += 1
+        return True
+
+    def _drain(self, first: Optional[_Turn]) -> List[_Turn]:
+        turns = [first] if first is not None else []
+        now = time.monotonic()
+        ready = [turn for ready_at, turn in self._pending_retries if ready_at <= now]
+        self._pending_retries = [(r, turn) for r, turn in self._pending_retries if r > now]
+        # Retried turns are older than anything still queued, so they are written first
+        turns = ready + turns
+        while len(turns) < self.batch_size:
+            try:
+                turns.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return turns
+
+    async def _linger(self) -> None:
+        """Give turns from concurrent streams time to join the batch."""
+        deadline = time.monotonic() + self.flush_interval
+        while self._queue.qsize() < self.batch_size - 1 and not self._stopping:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 0.05))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                first = None
+            if first is not None:
+                await self._linger()
+            turns = self._drain(first)
+            if turns:
+                await self._flush(turns)
+            if self._stopping and self._queue.empty() and not self._pending_retries:
+                return
+
+    async def _flush(self, turns: List[_Turn]) -> None:
+        started = time.monotonic()
+        try:
+            async with AsyncSessionLocal() as db:
+                rows, written = await self._message_rows(db, turns)
+                if rows:
+                    await db.execute(insert(models.Message), rows)
+                await db.commit()
+            self.stored += written
+        except Exception as e:
+            print(f"[PERSIST] Error writing {len(turns)} streamed turns: {e}")
+            self._retry(turns)
+
+        elapsed = time.monotonic() - started
+        self.flushes += 1
+        self.last_flush_seconds = elapsed
+        self.total_flush_seconds += elapsed
+
+    async def _message_rows(self, db: AsyncSession, turns: List[_Turn]) -> Tuple[List[Dict[str, Any]], int]:
+        """Build message rows for the turns whose group still exists.
+
+        Returns:
+            Tuple of (message rows, number of turns they cover)
+        """
+        group_ids = {turn[0] for turn in turns}
+        # One outer join resolves every group in the batch, including groups without agents
+        result = await db.execute(
+            select(models.Group.id, models.Agent.id, models.Agent.agent_type)
+            .outerjoin(models.GroupMember, models.GroupMember.group_id == models.Group.id)
+            .outerjoin(models.Agent, models.Agent.id == models.GroupMember.agent_id)
+            .where(models.Group.id.in_(group_ids))
+        )
+        agents: Dict[str, Dict[str, str]] = {}
+        for group_id, agent_id, agent_type in result.all():
+            group_agents = agents.setdefault(group_id, {})
+            if agent_id is not None:
+                group_agents.setdefault(str(agent_type), agent_id)
+
+        rows = []
+        written = 0
+        for group_id, user_message, responder_content, critic_text, _ in turns:
+            if group_id not in agents:
+                print(f"[PERSIST] Group {group_id} no longer exists, skipping streamed turn")
+                self.skipped += 1
+                continue
+            written += 1
+            rows.append({"group_id": group_id, "sender_id": None, "sender_type": "user", "content": user_message})
+            assistant_id = agents[group_id].get("manual")
+            if assistant_id and responder_content:
+                rows.append({"group_id": group_id, "sender_id": assistant_id, "sender_type": "agent", "content": responder_content})
+            critic_id = agents[group_id].get("critic")
+            if critic_id and critic_text:
+                rows.append({"group_id": group_id, "sender_id": critic_id, "sender_type": "agent", "content": critic_text})
+        return rows, written
+
+    def _retry(self, turns: List[_Turn]) -> None:
+        for group_id, user_message, responder_content, critic_text, attempts in turns:
+            if attempts >= self.max_retries:
+                self.dropped += 1
+                print(f"[PERSIST] Dropping streamed turn for group {group_id} after {attempts + 1} attempts")
+                continue
+            # Exponential backoff: flush_interval, 2x, 4x, ...
+            ready_at = time.monotonic() + self.flush_interval * (2 ** attempts)
+            self._pending_retries.append(
+                (ready_at, (group_id, user_message, responder_content, critic_text, attempts + 1))
+            )
+            self.retries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, throughput and flush latency metrics."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "pending_retries": len(self._pending_retries),
+            "enqueued": self.enqueued,
+            "stored": self.stored,
+            "dropped": self.dropped,
+            "skipped": self.skipped,
+            "retries": self.retries,
+            "flushes": self.flushes,
+            "last_flush_seconds": self.last_flush_seconds,
+            "avg_flush_seconds": self.total_flush_seconds / self.flushes if self.flushes else 0.0,
+            "running": self._task is not None and not self._task.done()
+        }
+
+
+turn_persistence = TurnPersistenceQueue()
@@ -0,0 +1,209 @@
+"""Semantic cache of critic-approved responses, scoped per group."""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import asyncio
+import hashlib
+import itertools
+import re
+import threading
+import time
+import numpy as np
+from backend.config import (
+    RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_THRESHOLD, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_EMBED_TIMEOUT
+)
+from backend.memory import get_embeddings
+
+# (agent/group id, hash of the agent description)
+Scope = Tuple[str, str]
+
+_embed_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="response-cache")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an the and or but if of to in on at by for with from about as into is are was were be been being "
+    "do does did doing have has had i me my we our you your it its this that these those there here "
+    "what which who whom how can could would should will shall may might must please tell explain "
+    "give show let us s t d ll m re ve".split()
+)
+
+
+def query_terms(query: str) -> frozenset:
+    """Normalized content words of a query: lowercased, punctuation and stopwords dropped.
+
+    Embeddings alone can rate "capital of France" and "capital of Spain" as
+    near-identical, so a hit must also agree on these terms.
+    """
+    return frozenset(w for w in _WORD_RE.findall(query.lower()) if w not in _STOPWORDS)
+
+
+class _Entry:
+    __slots__ = ("query", "terms", "vector", "response", "critic_response", "expires_at")
+
+    def __init__(self, query: str, vector: np.ndarray, response: str, critic_response: Dict[str, Any], expires_at: float):
+        self.query = query
+        self.terms = query_terms(query)
+        self.vector = vector
+        self.response = response
+        self.critic_response = critic_response
+        self.expires_at = expires_at
+
+
+class SemanticResponseCache:
+    """TTL + LRU cache of approved answers, looked up by query embedding similarity.
+
+    Entries are grouped by scope so one group's answers are never served to
+    another, and a lookup only compares against its own scope. A hit needs a
+    cosine similarity of at least threshold and the same normalized content
+    words (query_terms) as the cached query. max_entries bounds the cache as a
+    whole; the least recently used entry is evicted first. Query embeddings
+    are bounded by embed_timeout so a slow embedding API never delays a turn
+    by more than that; the turn simply skips the cache.
+    """
+
+    def __init__(
+        self,
+        threshold: float = RESPONSE_CACHE_THRESHOLD,
+        ttl: float = RESPONSE_CACHE_TTL,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        enabled: bool = RESPONSE_CACHE_ENABLED,
+        embed_timeout: float = RESPONSE_CACHE_EMBED_TIMEOUT
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.embed_timeout = embed_timeout
+        self._scopes: Dict[Scope, Dict[int, _Entry]] = {}
+        self._lru: "OrderedDict[Tuple[Scope, int], None]" = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+        self.embed_timeouts = 0
+
+    @staticmethod
+    def scope(agent_id: str, agent_description: Optional[str] = None) -> Scope:
+        """Build the cache scope for a group; answers depend on the agent's role too."""
+        description_hash = hashlib.sha1((agent_description or "").encode("utf-8")).hexdigest()[:12]
+        return (agent_id, description_hash)
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def embed(self, query: str) -> Optional[np.ndarray]:
+        """Embed a query for lookup/store; None if embedding fails."""
+        try:
+            future = _embed_pool.submit(get_embeddings().embed_query, query)
+            return self._normalize(future.result(timeout=self.embed_timeout))
+        except FutureTimeout:
+            return self._embed_timed_out()
+        except Exception as e:
+            print(f"[RESPONSE_CACHE] Embedding error: {type(e).__name__}: {e}")
+            return None
+
+    async def aembed(self, query: str) -> Optional[np.ndarray]:
+        """Async variant of embed."""
+        try:
+            vector = await asyncio.wait_for(get_embeddings().aembed_query(query), self.embed_timeout)
+            return self._normalize(vector)
+        except asyncio.TimeoutError:
+            return self._embed_timed_out()
+        except Exception as e:
+            print(f"[RESPONSE_CACHE] Embedding error: {type(e).__name__}: {e}")
+            return None
+
+    def _embed_timed_out(self) -> None:
+        self.embed_timeouts += 1
+        print(f"[RESPONSE_CACHE] Embedding timed out after {self.embed_timeout}s, skipping cache")
+        return None
+
+    def lookup(self, scope: Scope, query: str, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Return the most similar live answer in scope with the same content words, if it clears the threshold."""
+        now = time.monotonic()
+        terms = query_terms(query)
+        with self._lock:
+            entries = self._scopes.get(scope, {})
+            for entry_id in [i for i, e in entries.items() if e.expires_at < now]:
+                self._remove(scope, entry_id)
+            entry_ids = [i for i, e in entries.items() if e.terms == terms]
+            if not entry_ids:
+                self.misses += 1
+                return None
+
+            similarities = np.stack([entries[i].vector for i in entry_ids]) @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            entry = entries[entry_ids[best]]
+            self._lru.move_to_end((scope, entry_ids[best]))
+            self.hits += 1
+        print(f"[RESPONSE_CACHE] Hit (similarity {similarity:.3f}) for cached query: {entry.query[:80]}")
+        return {
+            "response": entry.response,
+            "critic_response": entry.critic_response,
+            "similarity": similarity,
+            "query": entry.query
+        }
+
+    def store(self, scope: Scope, query: str, vector: np.ndarray, response: str, critic_response: Dict[str, Any]) -> None:
+        """Cache an approved answer under scope."""
+        with self._lock:
+            entry_id = next(self._ids)
+            self._scopes.setdefault(scope, {})[entry_id] = _Entry(
+                query, vector, response, critic_response, time.monotonic() + self.ttl
+            )
+            self._lru[(scope, entry_id)] = None
+            self.stores += 1
+            while len(self._lru) > self.max_entries:
+                (old_scope, old_id), _ = self._lru.popitem(last=False)
+                self._remove(old_scope, old_id)
+
+    def _remove(self, scope: Scope, entry_id: int) -> None:
+        entries = self._scopes.get(scope)
+        if entries is not None:
+            entries.pop(entry_id, None)
+            if not entries:
+                del self._scopes[scope]
+        self._lru.pop((scope, entry_id), None)
+
+    def record_bypass(self) -> None:
+        self.bypassed += 1
+
+    def invalidate(self, agent_id: str) -> None:
+        """Drop every cached answer for a group (e.g. when its history is deleted)."""
+        with self._lock:
+            for scope in [s for s in self._scopes if s[0] == agent_id]:
+                for entry_id in list(self._scopes[scope]):
+                    self._remove(scope, entry_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.clear()
+            self._lru.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/bypass counters for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "embed_timeouts": self.embed_timeouts,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._lru)
+        }
+
+
+response_cache = SemanticResponseCache()
@@ -1,41 +1,143 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from backend.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Any, List, Optional, Set, Tuple
+from datetime import datetime
+from backend.database import get_db, AsyncSessionLocal
 from backend import models, schemas
-from backend.orchestrator import process_multi_agent_chat, stream_multi_agent_chat
-from backend.memory import delete_group_memory
+from backend.orchestrator import aprocess_multi_agent_chat, stream_multi_agent_chat
+from backend.memory import delete_group_memory, embedding_cache_stats
+from backend.search_cache import search_cache
+from backend.ingestion import memory_ingestion
+from backend.persistence import turn_persistence
+from backend.response_cache import response_cache
+from backend.short_memory import short_term_memory
+from backend.summarizer import conversation_summarizer
+from backend.agents.critic import critic_tier_stats, critic_parse_stats
+from backend.graph import speculation_stats
 from fastapi.responses import StreamingResponse
+import asyncio
+import base64
+import json
 
 router = APIRouter()
 
 
+async def _load_recent_history(group_id: str, limit: int = 10) -> list:
+    """Load the group's most recent messages as orchestrator conversation history.
+    
+    Uses its own session because it runs concurrently with the other prefetch sources.
+    """
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(models.Message)
+            .where(models.Message.group_id == group_id)
+            .order_by(models.Message.created_at.desc(), models.Message.id.desc())
+            .limit(limit)
+        )).scalars().all()
+        return [{"role": m.sender_type, "content": m.content} for m in reversed(rows)]
+
+
+async def _recent_history(group_id: str) -> list:
+    """Return the group's recent messages from short-term memory, loading them on a miss."""
+    return await short_term_memory.aget_or_load(
+        group_id, lambda: _load_recent_history(group_id, short_term_memory.messages_per_group)
+    )
+
+
+def _remember_messages(group_id: str, rows: List[dict]) -> None:
+    """Add newly written message rows to the group's short-term memory."""
+    short_term_memory.extend(group_id, [{"role": r["sender_type"], "content": r["content"]} for r in rows])
+
+
+def _group_response(group: models.Group, agent_ids: Optional[List[str]] = None) -> dict:
+    return {
+        "id": group.id,
+        "name": group.name,
+        "description": group.description,
+        "agentIds": agent_ids if agent_ids is not None else [m.agent_id for m in group.members],
+        "created_at": group.created_at
+    }
+
+
+async def _get_group_with_members(db: AsyncSession, group_id: str) -> Optional[models.Group]:
+    return (await db.execute(
+        select(models.Group)
+        .options(selectinload(models.Group.members))
+        .where(models.Group.id == group_id)
+    )).scalar_one_or_none()
+
+
+async def _group_agent_types(group_id: str) -> Optional[Set[str]]:
+    """Return the agent types ("manual", "critic", ...) of a group's members, or None if the group is gone.
+
+    Uses its own session because it runs while the stream is generating.
+    """
+    async with AsyncSessionLocal() as db:
+        result = (await db.execute(
+            select(models.Group.id, models.Agent.agent_type)
+            .outerjoin(models.GroupMember, models.GroupMember.group_id == models.Group.id)
+            .outerjoin(models.Agent, models.Agent.id == models.GroupMember.agent_id)
+            .where(models.Group.id == group_id)
+        )).all()
+    if not result:
+        return None
+    return {str(agent_type) for _, agent_type in result if agent_type is not None}
+
+
+def _streamed_rows(
+    agent_types: Optional[Set[str]],
+    user_message: str,
+    responder_content: str,
+    critic_text: Optional[str]
+) -> List[dict]:
+    """The rows the turn writer will persist for a streamed turn, given the group's agent types."""
+    if agent_types is None:
+        return []
+    rows = [{"sender_type": "user", "content": user_message}]
+    if "manual" in agent_types and responder_content:
+        rows.append({"sender_type": "agent", "content": responder_content})
+    if "critic" in agent_types and critic_text:
+        rows.append({"sender_type": "agent", "content": critic_text})
+    return rows
+
+
+async def _get_group_agents(db: AsyncSession, group_id: str) -> List[models.Agent]:
+    """Load a group's agents in a single join query."""
+    return list((await db.execute(
+        select(models.Agent)
+        .join(models.GroupMember, models.GroupMember.agent_id == models.Agent.id)
+        .where(models.GroupMember.group_id == group_id)
+    )).scalars().all())
+
+
 @router.get("/api/agents", response_model=List[schemas.AgentResponse])
-def get_agents(db: Session = Depends(get_db)):
-    agents = db.query(models.Agent).all()
+async def get_agents(db: AsyncSession = Depends(get_db)):
+    agents = (await db.execute(select(models.Agent))).scalars().all()
     return agents
 
 
 @router.get("/api/agents/{agent_id}", response_model=schemas.AgentResponse)
-def get_agent(agent_id: str, db: Session = Depends(get_db)):
-    agent = db.query(models.Agent).filter(models.Agent.id == agent_id).first()
+async def get_agent(agent_id: str, db: AsyncSession = Depends(get_db)):
+    agent = await db.get(models.Agent, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     return agent
 
 
 @router.post("/api/agents", response_model=schemas.AgentResponse)
-def create_agent(agent: schemas.AgentCreate, db: Session = Depends(get_db)):
+async def create_agent(agent: schemas.AgentCreate, db: AsyncSession = Depends(get_db)):
     db_agent = models.Agent(**agent.model_dump())
     db.add(db_agent)
-    db.commit()
-    db.refresh(db_agent)
+    await db.commit()
+    await db.refresh(db_agent)
     return db_agent
 
 
 @router.patch("/api/agents/{agent_id}", response_model=schemas.AgentResponse)
-def update_agent(agent_id: str, updates: schemas.AgentUpdate, db: Session = Depends(get_db)):
-    agent = db.query(models.Agent).filter(models.Agent.id == agent_id).first()
+async def update_agent(agent_id: str, updates: schemas.AgentUpdate, db: AsyncSession = Depends(get_db)):
+    agent = await db.get(models.Agent, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
@@ -52,14 +154,14 @@ def update_agent(agent_id: str, updates: schemas.AgentUpdate, db: Session = Depe
     for key, value in update_data.items():
         setattr(agent, key, value)
     
-    db.commit()
-    db.refresh(agent)
+    await db.commit()
+    await db.refresh(agent)
     return agent
 
 
 @router.delete("/api/agents/{agent_id}")
-def delete_agent(agent_id: str, db: Session = Depends(get_db)):
-    agent = db.query(models.Agent).filter(models.Agent.id == agent_id).first()
+async def delete_agent(agent_id: str, db: AsyncSession = Depends(get_db)):
+    agent = await db.get(models.Agent, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
@@ -70,231 +172,254 @@ def delete_agent(agent_id: str, db: Session = Depends(get_db)):
             detail=f"Cannot delete default {agent.agent_type} agent. This is a core system agent."
         )
     
-    db.delete(agent)
-    db.commit()
+    await db.delete(agent)
+    await db.commit()
     return {"message": "Agent deleted"}
 
 
 @router.get("/api/groups", response_model=List[schemas.GroupResponse])
-def get_groups(db: Session = Depends(get_db)):
-    groups = db.query(models.Group).all()
-    result = []
-    for group in groups:
-        members = db.query(models.GroupMember).filter(
-            models.GroupMember.group_id == group.id
-        ).all()
-        agent_ids = [m.agent_id for m in members]
-        result.append({
-            "id": group.id,
-            "name": group.name,
-            "description": group.description,
-            "agentIds": agent_ids,
-            "created_at": group.created_at
-        })
-    return result
+async def get_groups(db: AsyncSession = Depends(get_db)):
+    # Members for all groups are loaded in one extra query
+    groups = (await db.execute(
+        select(models.Group).options(selectinload(models.Group.members))
+    )).scalars().all()
+    return [_group_response(group) for group in groups]
 
 
 @router.get("/api/groups/{group_id}", response_model=schemas.GroupResponse)
-def get_group(group_id: str, db: Session = Depends(get_db)):
-    group = db.query(models.Group).filter(models.Group.id == group_id).first()
+async def get_group(group_id: str, db: AsyncSession = Depends(get_db)):
+    group = await _get_group_with_members(db, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    members = db.query(models.GroupMember).filter(
-        models.GroupMember.group_id == group_id
-    ).all()
-    agent_ids = [m.agent_id for m in members]
-    
-    return {
-        "id": group.id,
-        "name": group.name,
-        "description": group.description,
-        "agentIds": agent_ids,
-        "created_at": group.created_at
-    }
+    return _group_response(group)
 
 
 @router.post("/api/groups", response_model=schemas.GroupResponse)
-def create_group(group_data: schemas.GroupCreate, db: Session = Depends(get_db)):
+async def create_group(group_data: schemas.GroupCreate, db: AsyncSession = Depends(get_db)):
     db_group = models.Group(
         name=group_data.name,
         description=group_data.description
     )
     db.add(db_group)
-    db.commit()
-    db.refresh(db_group)
+    await db.commit()
+    await db.refresh(db_group)
     
-    for agent_id in group_data.agentIds:
-        member = models.GroupMember(group_id=db_group.id, agent_id=agent_id)
-        db.add(member)
-    db.commit()
+    db.add_all([
+        models.GroupMember(group_id=db_group.id, agent_id=agent_id)
+        for agent_id in group_data.agentIds
+    ])
+    await db.commit()
     
-    return {
-        "id": db_group.id,
-        "name": db_group.name,
-        "description": db_group.description,
-        "agentIds": group_data.agentIds,
-        "created_at": db_group.created_at
-    }
+    return _group_response(db_group, group_data.agentIds)
 
 
 @router.patch("/api/groups/{group_id}", response_model=schemas.GroupResponse)
-def update_group(group_id: str, updates: schemas.GroupUpdate, db: Session = Depends(get_db)):
-    group = db.query(models.Group).filter(models.Group.id == group_id).first()
+async def update_group(group_id: str, updates: schemas.GroupUpdate, db: AsyncSession = Depends(get_db)):
+    group = await _get_group_with_members(db, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
+    # Membership is not changed here, so read it before the refresh
+    agent_ids = [m.agent_id for m in group.members]
     
     update_data = updates.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(group, key, value)
     
-    db.commit()
-    db.refresh(group)
+    await db.commit()
+    await db.refresh(group)
     
-    members = db.query(models.GroupMember).filter(
-        models.GroupMember.group_id == group_id
-    ).all()
-    agent_ids = [m.agent_id for m in members]
-    
-    return {
-        "id": group.id,
-        "name": group.name,
-        "description": group.description,
-        "agentIds": agent_ids,
-        "created_at": group.created_at
-    }
+    return _group_response(group, agent_ids)
 
 
 @router.delete("/api/groups/{group_id}")
-def delete_group(group_id: str, db: Session = Depends(get_db)):
-    group = db.query(models.Group).filter(models.Group.id == group_id).first()
+async def delete_group(group_id: str, db: AsyncSession = Depends(get_db)):
+    group = await db.get(models.Group, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    delete_group_memory(group_id)
-    
-    db.query(models.Message).filter(models.Message.group_id == group_id).delete()
-    db.query(models.Conversation).filter(models.Conversation.group_id == group_id).delete()
-    db.query(models.Memory).filter(models.Memory.group_id == group_id).delete()
-    db.query(models.GroupMember).filter(
-        models.GroupMember.group_id == group_id
-    ).delete()
-    db.delete(group)
-    db.commit()
+    await asyncio.to_thread(delete_group_memory, group_id)
+    response_cache.invalidate(group_id)
+    
+    await db.execute(delete(models.Message).where(models.Message.group_id == group_id))
+    await db.execute(delete(models.Conversation).where(models.Conversation.group_id == group_id))
+    await db.execute(delete(models.Memory).where(models.Memory.group_id == group_id))
+    await db.execute(delete(models.GroupMember).where(models.GroupMember.group_id == group_id))
+    await db.delete(group)
+    await db.commit()
+    short_term_memory.invalidate(group_id)
+    conversation_summarizer.invalidate(group_id)
     return {"message": "Group and all associated memory deleted"}
 
 
 @router.post("/api/groups/{group_id}/agents/{agent_id}")
-def add_agent_to_group(group_id: str, agent_id: str, db: Session = Depends(get_db)):
-    group = db.query(models.Group).filter(models.Group.id == group_id).first()
+async def add_agent_to_group(group_id: str, agent_id: str, db: AsyncSession = Depends(get_db)):
+    group = await db.get(models.Group, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    agent = db.query(models.Agent).filter(models.Agent.id == agent_id).first()
+    agent = await db.get(models.Agent, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    existing = db.query(models.GroupMember).filter(
-        models.GroupMember.group_id == group_id,
-        models.GroupMember.agent_id == agent_id
-    ).first()
+    existing = (await db.execute(
+        select(models.GroupMember).where(
+            models.GroupMember.group_id == group_id,
+            models.GroupMember.agent_id == agent_id
+        )
+    )).scalars().first()
     
     if existing:
         raise HTTPException(status_code=400, detail="Agent already in group")
     
     member = models.GroupMember(group_id=group_id, agent_id=agent_id)
     db.add(member)
-    db.commit()
+    await db.commit()
     
     return {"message": "Agent added to group"}
 
 
 @router.delete("/api/groups/{group_id}/agents/{agent_id}")
-def remove_agent_from_group(group_id: str, agent_id: str, db: Session = Depends(get_db)):
-    member = db.query(models.GroupMember).filter(
-        models.GroupMember.group_id == group_id,
-        models.GroupMember.agent_id == agent_id
-    ).first()
+async def remove_agent_from_group(group_id: str, agent_id: str, db: AsyncSession = Depends(get_db)):
+    member = (await db.execute(
+        select(models.GroupMember).where(
+            models.GroupMember.group_id == group_id,
+            models.GroupMember.agent_id == agent_id
+        )
+    )).scalars().first()
     
     if not member:
         raise HTTPException(status_code=404, detail="Agent not in group")
     
-    db.delete(member)
-    db.commit()
+    await db.delete(member)
+    await db.commit()
     return {"message": "Agent removed from group"}
 
 
-@router.get("/api/groups/{group_id}/messages", response_model=List[schemas.MessageResponse])
-def get_messages(group_id: str, db: Session = Depends(get_db)):
-    messages = db.query(models.Message).filter(
-        models.Message.group_id == group_id
-    ).order_by(models.Message.created_at).all()
-    
-    return [
-        {
-            "id": m.id,
-            "groupId": m.group_id,
-            "senderId": m.sender_id,
-            "senderType": m.sender_type,
-            "content": m.content,
-            "createdAt": m.created_at
-        }
-        for m in messages
-    ]
+def _message_response(m: models.Message) -> dict:
+    return {
+        "id": m.id,
+        "groupId": m.group_id,
+        "senderId": m.sender_id,
+        "senderType": m.sender_type,
+        "content": m.content,
+        "createdAt": m.created_at
+    }
+
+
+def _encode_cursor(m: models.Message) -> str:
+    raw = f"{m.created_at.isoformat()}|{m.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), message_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/api/groups/{group_id}/messages", response_model=schemas.MessagePage)
+async def get_messages(
+    group_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    """Return a page of messages in chronological order.
+
+    Without a cursor this is the newest page. `before` pages back into older
+    history and `after` pages forward; `nextCursor` continues in the same
+    direction. Pages are keyed on (created_at, id), so each one is an index
+    range scan no matter how deep into the history it is.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+
+    query = select(models.Message).where(models.Message.group_id == group_id)
+    if after:
+        created_at, message_id = _decode_cursor(after)
+        query = query.where(or_(
+            models.Message.created_at > created_at,
+            and_(models.Message.created_at == created_at, models.Message.id > message_id)
+        )).order_by(models.Message.created_at.asc(), models.Message.id.asc())
+    else:
+        if before:
+            created_at, message_id = _decode_cursor(before)
+            query = query.where(or_(
+                models.Message.created_at < created_at,
+                and_(models.Message.created_at == created_at, models.Message.id < message_id)
+            ))
+        query = query.order_by(models.Message.created_at.desc(), models.Message.id.desc())
+
+    # One extra row tells us whether another page exists
+    messages = list((await db.execute(query.limit(limit + 1))).scalars().all())
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    next_cursor = _encode_cursor(messages[-1]) if has_more else None
+    if not after:
+        messages.reverse()
+
+    return {
+        "messages": [_message_response(m) for m in messages],
+        "nextCursor": next_cursor,
+        "hasMore": has_more
+    }
 
 
 @router.delete("/api/groups/{group_id}/messages")
-def delete_group_messages(group_id: str, db: Session = Depends(get_db)):
-    group = db.query(models.Group).filter(models.Group.id == group_id).first()
+async def delete_group_messages(group_id: str, db: AsyncSession = Depends(get_db)):
+    group = await db.get(models.Group, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    delete_group_memory(group_id)
+    await asyncio.to_thread(delete_group_memory, group_id)
+    response_cache.invalidate(group_id)
     
-    db.query(models.Message).filter(models.Message.group_id == group_id).delete()
-    db.query(models.Conversation).filter(models.Conversation.group_id == group_id).delete()
-    db.query(models.Memory).filter(models.Memory.group_id == group_id).delete()
-    db.commit()
+    await db.execute(delete(models.Message).where(models.Message.group_id == group_id))
+    await db.execute(delete(models.Conversation).where(models.Conversation.group_id == group_id))
+    await db.execute(delete(models.Memory).where(models.Memory.group_id == group_id))
+    await db.commit()
+    short_term_memory.invalidate(group_id)
+    conversation_summarizer.invalidate(group_id)
     return {"message": "Chat history and memory deleted"}
 
 
+async def _insert_messages(db: AsyncSession, rows: List[dict]) -> List[models.Message]:
+    """Bulk-insert message rows in one statement, returning them with server timestamps."""
+    result = await db.scalars(
+        insert(models.Message).returning(models.Message, sort_by_parameter_order=True),
+        rows
+    )
+    return list(result.all())
+
+
 @router.post("/api/groups/{group_id}/messages", response_model=List[schemas.MessageResponse])
-def send_message(group_id: str, message: schemas.MessageCreate, db: Session = Depends(get_db)):
-    group = db.query(models.Group).filter(models.Group.id == group_id).first()
+async def send_message(group_id: str, message: schemas.MessageCreate, db: AsyncSession = Depends(get_db)):
+    group = await db.get(models.Group, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    user_msg = models.Message(
-        group_id=group_id,
-        sender_id=message.senderId,
-        sender_type=message.senderType,
-        content=message.content
-    )
-    db.add(user_msg)
-    db.commit()
-    db.refresh(user_msg)
+    user_row = {
+        "group_id": group_id,
+        "sender_id": message.senderId,
+        "sender_type": message.senderType,
+        "content": message.content
+    }
     
     # If this is an agent message (not from user), just save it and return
     if message.senderType == "agent":
-        return [
-            {
-                "id": user_msg.id,
-                "groupId": user_msg.group_id,
-                "senderId": user_msg.sender_id,
-                "senderType": user_msg.sender_type,
-                "content": user_msg.content,
-                "createdAt": user_msg.created_at
-            }
-        ]
-    
-    members = db.query(models.GroupMember).filter(
-        models.GroupMember.group_id == group_id
-    ).all()
-    agent_ids = [m.agent_id for m in members]
-    
-    agents = db.query(models.Agent).filter(
-        models.Agent.id.in_(agent_ids)
-    ).all()
+        saved = await _insert_messages(db, [user_row])
+        await db.commit()
+        _remember_messages(group_id, [user_row])
+        return [_message_response(m) for m in saved]
+    
+    agents = await _get_group_agents(db, group_id)
+    # Release the connection while the agents run; the turn is written afterwards
+    await db.commit()
     
     manual_agent = None
     critic_agent = None
@@ -304,7 +429,7 @@ def send_message(group_id: str, message: schemas.MessageCreate, db: Session = De
         elif str(a.agent_type) == "critic":
             critic_agent = a
     
-    response_messages = []
+    message_rows = [user_row]
     
     if manual_agent is not None or critic_agent is not None:
         # Extract agent description safely
@@ -315,200 +440,147 @@ def send_message(group_id: str, message: schemas.MessageCreate, db: Session = De
             agent_description = "A helpful AI assistant"
         
         # Process with critic agent - memory retrieval happens in orchestrator via vector search
-        result = process_multi_agent_chat(
+        result = await aprocess_multi_agent_chat(
             user_message=message.content,
             agent_id=group_id,
             agent_description=agent_description,
-            conversation_history=None,  # Not needed - orchestrator uses vector memory
-            store_memory=True
+            conversation_history=None,  # Loaded by the orchestrator's prefetch for short memory
+            store_memory=True,
+            memory_type=message.memory_type or "long",
+            load_history=lambda: _recent_history(group_id),
+            load_summary=lambda: conversation_summarizer.aget(group_id)
         )
         
-        # Get the final response (could be from all_responses or manual_agent_response)
+        # The graph's final response: the approved draft, the judge's pick in best-of-N
+        # mode, or the best draft so far when the turn ran out of time or tokens
         final_response = result.get("manual_agent_response", "")
-        all_responses = result.get("all_responses", [])
         
-        # Use the last response from all_responses if available, otherwise use manual_agent_response
-        if all_responses:
-            final_response = all_responses[-1]
+        # Ensure critic response is stored as text; serialize if dict
+        critic_content = result.get("critic_agent_response", "")
+        if isinstance(critic_content, dict):
+            critic_content = json.dumps(critic_content, ensure_ascii=False)
         
         if manual_agent and final_response:
-            manual_msg = models.Message(
-                group_id=group_id,
-                sender_id=manual_agent.id,
-                sender_type="agent",
-                content=final_response
-            )
-            db.add(manual_msg)
-            db.commit()
-            db.refresh(manual_msg)
-            response_messages.append(manual_msg)
+            message_rows.append({
+                "group_id": group_id,
+                "sender_id": manual_agent.id,
+                "sender_type": "agent",
+                "content": final_response
+            })
         
         if critic_agent:
-            # Ensure critic response is stored as text; serialize if dict
-            critic_content = result["critic_agent_response"]
-            if isinstance(critic_content, dict):
-                import json
-                critic_content = json.dumps(critic_content, ensure_ascii=False)
-            critic_msg = models.Message(
-                group_id=group_id,
-                sender_id=critic_agent.id,
-                sender_type="agent",
-                content=critic_content
-            )
-            db.add(critic_msg)
-            db.commit()
-            db.refresh(critic_msg)
-            response_messages.append(critic_msg)
+            message_rows.append({
+                "group_id": group_id,
+                "sender_id": critic_agent.id,
+                "sender_type": "agent",
+                "content": critic_content
+            })
         
-        # Serialize critic response in conversation if it's a dict
-        import json
-        critic_conv = result.get("critic_agent_response", "")
-        if isinstance(critic_conv, dict):
-            critic_conv = json.dumps(critic_conv, ensure_ascii=False)
-        conversation = models.Conversation(
-            group_id=group_id,
-            user_message=message.content,
-            manual_agent_response=final_response,
-            critic_agent_response=critic_conv
-        )
-        db.add(conversation)
-        db.commit()
-        
-        # Store basic facts as memories (simplified - no LLM extraction for now)
-        facts_to_store = [
-            f"User asked: {message.content[:100]}",
-            f"Response: {final_response[:100]}" if final_response else ""
-        ]
-        for fact in [f for f in facts_to_store if f]:
-            memory = models.Memory(
-                group_id=group_id,
-                content=fact,
-                importance="normal"
-            )
-            db.add(memory)
-        db.commit()
+        await db.execute(insert(models.Conversation), [{
+            "group_id": group_id,
+            "user_message": message.content,
+            "manual_agent_response": final_response,
+            "critic_agent_response": critic_content
+        }])
     
-    all_messages = [user_msg] + response_messages
+    # The whole turn is written in one transaction: messages and conversation
+    all_messages = await _insert_messages(db, message_rows)
+    await db.commit()
+    _remember_messages(group_id, message_rows)
+    # The turn is folded into the group's rolling summary (a Memory row) in the background
+    if len(message_rows) > 1:
+        conversation_summarizer.enqueue(group_id, message.content, final_response)
     
-    return [
-        {
-            "id": m.id,
-            "groupId": m.group_id,
-            "senderId": m.sender_id,
-            "senderType": m.sender_type,
-            "content": m.content,
-            "createdAt": m.created_at
-        }
-        for m in all_messages
-    ]
+    return [_message_response(m) for m in all_messages]
 
 
 
 @router.post("/api/chat", response_model=schemas.AgentChatResponse)
-def chat_with_agents(request: schemas.AgentChatRequest):
+async def chat_with_agents(request: schemas.AgentChatRequest):
     # Use a default agent_id if not provided
     agent_id = "default_agent"
-    result = process_multi_agent_chat(
+    result = await aprocess_multi_agent_chat(
         user_message=request.message,
         agent_id=agent_id,
         agent_description=request.agent_description,
-        store_memory=True
+        store_memory=True,
+        deadline_seconds=request.deadline_seconds,
+        token_budget=request.token_budget
     )
     return result
 
 
+def _format_critic_text(critic_content: Any) -> Optional[str]:
+    """Format a streamed critic response as the message text saved for the critic agent."""
+    if not critic_content:
+        return None
+    if isinstance(critic_content, dict):
+        verdict = critic_content.get('verdict', 'N/A')
+        feedback = critic_content.get('feedback', 'No feedback provided')
+        return f"**Verdict:** {verdict}\n\n**Feedback:** {feedback}"
+    return str(critic_content)
+
+
 @router.post("/api/chat/stream")
-async def chat_with_agents_stream(request: schemas.AgentChatRequest, db: Session = Depends(get_db)):
+async def chat_with_agents_stream(request: schemas.AgentChatRequest):
     # Use a default agent_id if not provided
     agent_id = request.group_id or "default_agent"
     
-    # Collect the streamed content
-    responder_content = ""
-    critic_content = None
-    
     async def generate_and_save():
-        nonlocal responder_content, critic_content
+        # Collect the streamed content
+        responder_content = ""
+        critic_content = None
+        # Resolved while the answer streams; decides which rows the short-term memory mirrors
+        agent_types = asyncio.create_task(_group_agent_types(request.group_id)) if request.group_id else None
         
-        async for chunk in stream_multi_agent_chat(
-            user_message=request.message,
-            agent_id=agent_id,
-            agent_description=request.agent_description,
-            store_memory=True,
-            memory_type=request.memory_type or "long"
-        ):
-            # Parse the chunk to track content
-            try:
-                import json
-                data = json.loads(chunk.strip())
+        try:
+            async for chunk in stream_multi_agent_chat(
+                user_message=request.message,
+                agent_id=agent_id,
+                agent_description=request.agent_description,
+                store_memory=True,
+                memory_type=request.memory_type or "long",
+                load_history=(
+                    (lambda: _recent_history(request.group_id))
+                    if request.group_id else None
+                ),
+                load_summary=(
+                    (lambda: conversation_summarizer.aget(request.group_id))
+                    if request.group_id else None
+                ),
+                deadline_seconds=request.deadline_seconds,
+                token_budget=request.token_budget
+            ):
+                # Parse the chunk to track content
+                try:
+                    data = json.loads(chunk.strip())
+                except ValueError:
+                    data = {}
                 if data.get("type") == "responder":
                     responder_content = data.get("content", "")
                 elif data.get("type") == "critic":
                     critic_content = data.get("content")
-            except:
-                pass
-            yield chunk
-        
-        # After streaming completes, save messages to database if group_id provided
-        if request.group_id:
-            try:
-                # Get group and agents
-                group = db.query(models.Group).filter(models.Group.id == request.group_id).first()
-                if group:
-                    members = db.query(models.GroupMember).filter(
-                        models.GroupMember.group_id == request.group_id
-                    ).all()
-                    agent_ids = [m.agent_id for m in members]
-                    agents = db.query(models.Agent).filter(models.Agent.id.in_(agent_ids)).all()
-                    
-                    assistant_agent = None
-                    critic_agent = None
-                    for a in agents:
-                        if str(a.agent_type) == "manual":
-                            assistant_agent = a
-                        elif str(a.agent_type) == "critic":
-                            critic_agent = a
-                    
-                    # Save user message
-                    user_msg = models.Message(
-                        group_id=request.group_id,
-                        sender_id=None,
-                        sender_type="user",
-                        content=request.message
-                    )
-                    db.add(user_msg)
-                    db.commit()
-                    
-                    # Save assistant response
-                    if assistant_agent and responder_content:
-                        assistant_msg = models.Message(
-                            group_id=request.group_id,
-                            sender_id=assistant_agent.id,
-                            sender_type="agent",
-                            content=responder_content
-                        )
-                        db.add(assistant_msg)
-                        db.commit()
-                    
-                    # Save critic response as separate message
-                    if critic_agent and critic_content:
-                        # Format critic response nicely
-                        if isinstance(critic_content, dict):
-                            verdict = critic_content.get('verdict', 'N/A')
-                            feedback = critic_content.get('feedback', 'No feedback provided')
-                            critic_text = f"**Verdict:** {verdict}\n\n**Feedback:** {feedback}"
-                        else:
-                            critic_text = str(critic_content)
-                        
-                        critic_msg = models.Message(
-                            group_id=request.group_id,
-                            sender_id=critic_agent.id,
-                            sender_type="agent",
-                            content=critic_text
-                        )
-                        db.add(critic_msg)
-                        db.commit()
-            except Exception as e:
-                print(f"Error saving messages: {e}")
+                elif data.get("type") == "complete":
+                    responder_content = data.get("final_response") or responder_content
+                    # Hand the turn to the background writer and close the stream right away
+                    if request.group_id:
+                        critic_text = _format_critic_text(critic_content)
+                        turn_persistence.enqueue(request.group_id, request.message, responder_content, critic_text)
+                        # Mirrors the rows the writer persists, which depend on the group's agents
+                        try:
+                            rows = _streamed_rows(await agent_types, request.message, responder_content, critic_text)
+                            _remember_messages(request.group_id, rows)
+                        except Exception as e:
+                            print(f"[MEMORY] Could not resolve agents for group {request.group_id}: {type(e).__name__}: {e}")
+                            short_term_memory.invalidate(request.group_id)
+                        conversation_summarizer.enqueue(request.group_id, request.message, responder_content)
+                    yield chunk
+                    return
+                yield chunk
+        finally:
+            # A stream that ends early (client gone) never needs the lookup
+            if agent_types is not None and not agent_types.done():
+                agent_types.cancel()
     
     return StreamingResponse(
         generate_and_save(),
@@ -517,10 +589,10 @@ async def chat_with_agents_stream(request: schemas.AgentChatRequest, db: Session
 
 
 @router.post("/api/init-default-agents")
-def init_default_agents(db: Session = Depends(get_db)):
-    existing_agents = db.query(models.Agent).filter(
-        models.Agent.agent_type.in_(["manual", "critic"])
-    ).all()
+async def init_default_agents(db: AsyncSession = Depends(get_db)):
+    existing_agents = (await db.execute(
+        select(models.Agent).where(models.Agent.agent_type.in_(["manual", "critic"]))
+    )).scalars().all()
     
     if len(existing_agents) >= 2:
         return {"message": "Default agents already exist", "agents": [a.id for a in existing_agents]}
@@ -545,22 +617,22 @@ def init_default_agents(db: Session = Depends(get_db)):
     
     db.add(manual_agent)
     db.add(critic_agent)
-    db.commit()
+    await db.commit()
     
-    db.refresh(manual_agent)
-    db.refresh(critic_agent)
+    await db.refresh(manual_agent)
+    await db.refresh(critic_agent)
     
     default_group = models.Group(
         name="Multi-Agent Chat",
         description="Chat with the Assistant and Critic agents"
     )
     db.add(default_group)
-    db.commit()
-    db.refresh(default_group)
+    await db.commit()
+    await db.refresh(default_group)
     
     db.add(models.GroupMember(group_id=default_group.id, agent_id=manual_agent.id))
     db.add(models.GroupMember(group_id=default_group.id, agent_id=critic_agent.id))
-    db.commit()
+    await db.commit()
     
     return {
         "message": "Default agents and group created",
@@ -568,3 +640,19 @@ def init_default_agents(db: Session = Depends(get_db)):
         "critic_agent_id": critic_agent.id,
         "group_id": default_group.id
     }
+
+
+@router.get("/api/metrics")
+async def get_metrics():
+    return {
+        "memory_ingestion": memory_ingestion.stats(),
+        "turn_persistence": turn_persistence.stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "search_cache": search_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "critic_tiers": critic_tier_stats(),
+        "critic_parsing": critic_parse_stats(),
+        "speculative_revision": speculation_stats(),
+        "short_term_memory": short_term_memory.stats(),
+        "conversation_summary": conversation_summarizer.stats()
+    }
@@ -75,11 +75,21 @@ class MessageResponse(BaseModel):
         from_attributes = True
 
 
+class MessagePage(BaseModel):
+    messages: List[MessageResponse]
+    # Pass back as `before` (or `after`, when paging forward) to get the next page
+    nextCursor: Optional[str] = None
+    hasMore: bool = False
+
+
 class AgentChatRequest(BaseModel):
     message: str
     agent_description: Optional[str] = None
     memory_type: Optional[str] = "long"
     group_id: Optional[str] = None
+    # Per-request limits for the revision loop (defaults: CHAT_DEADLINE_SECONDS / CHAT_TOKEN_BUDGET, 0 = no limit)
+    deadline_seconds: Optional[float] = None
+    token_budget: Optional[int] = None
 
 
 class AgentChatResponse(BaseModel):
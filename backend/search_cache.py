@@ -0,0 +1,217 @@
+"""Shared TTL cache for Tavily web search results."""
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import os
+import re
+import threading
+import time
+from backend.config import (
+    TAVILY_API_KEY, SEARCH_CACHE_NEWS_TTL, SEARCH_CACHE_EVERGREEN_TTL, SEARCH_CACHE_MAX_ENTRIES
+)
+from backend.llm import registry
+
+# Queries about things that change quickly get the short "news" TTL
+_NEWS_PATTERN = re.compile(
+    r"\b(news|latest|today|tonight|current|currently|recent|now|live|update[sd]?|happening|"
+    r"yesterday|this (?:week|month|year)|last night|score[sd]?|match(?:es)?|result[sd]?|"
+    r"weather|forecast|stocks?|prices?|election|breaking|announced|released)\b"
+)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache keying: case, whitespace and trailing punctuation."""
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.rstrip("?!.")
+
+
+def freshness_class(query: str) -> str:
+    """Classify a query as "news" (time-sensitive) or "evergreen"."""
+    return "news" if _NEWS_PATTERN.search(normalize_query(query)) else "evergreen"
+
+
+def get_tavily_tool(topic: str = "general", max_results: int = 5):
+    """Get the shared TavilySearch client for this topic and result count."""
+    from langchain_tavily import TavilySearch
+
+    if TAVILY_API_KEY:
+        os.environ["TAVILY_API_KEY"] = TAVILY_API_KEY
+    return registry.get_or_create(
+        ("tools", "tavily", topic, max_results),
+        lambda: TavilySearch(max_results=max_results, topic=topic)
+    )
+
+
+class _LeaderCancelled(Exception):
+    """The coroutine running a shared search was cancelled before it finished."""
+
+
+def _cacheable(result: Any) -> bool:
+    """Only real result sets are cached; Tavily reports failures as {"error": ...}."""
+    return isinstance(result, dict) and "error" not in result and bool(result.get("results"))
+
+
+class _Flight:
+    """An in-progress search that concurrent identical callers wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SearchCache:
+    """TTL + LRU cache of search results with single-flight deduplication.
+
+    Entries are keyed by (normalized query, topic, max_results). News queries
+    expire after news_ttl seconds, everything else after evergreen_ttl.
+    Concurrent identical misses share one Tavily call. Error payloads and
+    empty result sets are handed to the waiting callers but not cached.
+    """
+
+    def __init__(
+        self,
+        news_ttl: float = SEARCH_CACHE_NEWS_TTL,
+        evergreen_ttl: float = SEARCH_CACHE_EVERGREEN_TTL,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES
+    ):
+        self.ttls = {"news": news_ttl, "evergreen": evergreen_ttl}
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._flights: Dict[Tuple, _Flight] = {}
+        self._aflights: Dict[Tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.uncached = 0
+
+    def _key(self, query: str, topic: str, max_results: int) -> Tuple:
+        return (normalize_query(query), topic, max_results)
+
+    def _get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def _set(self, key: Tuple, result: Any) -> None:
+        if not _cacheable(result):
+            with self._lock:
+                self.uncached += 1
+            return
+        ttl = self.ttls[freshness_class(key[0])]
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def search(self, query: str, topic: str = "general", max_results: int = 5) -> Any:
+        """Search with caching; blocks while an identical search is in flight."""
+        key = self._key(query, topic, max_results)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = get_tavily_tool(topic, max_results).invoke(query)
+            self._set(key, flight.result)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    async def asearch(self, query: str, topic: str = "general", max_results: int = 5) -> Any:
+        """Async variant of search; concurrent identical coroutines share one call.
+
+        If the coroutine running the shared call is cancelled (e.g. by its
+        caller's timeout), the callers waiting on it retry as a cache miss.
+        """
+        key = self._key(query, topic, max_results)
+        while True:
+            cached = self._get(key)
+            if cached is not None:
+                return cached
+
+            with self._lock:
+                future = self._aflights.get(key)
+                leader = future is None
+                if leader:
+                    future = self._aflights[key] = asyncio.get_running_loop().create_future()
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                return await self._alead(key, future, query, topic, max_results)
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                continue
+
+    async def _alead(self, key: Tuple, future: asyncio.Future, query: str, topic: str, max_results: int) -> Any:
+        """Run the shared search and resolve the future the other callers wait on."""
+        try:
+            result = await get_tavily_tool(topic, max_results).ainvoke(query)
+            self._set(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Never cancel the shared future: that would cancel unrelated waiting requests
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._aflights.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/coalesced counters for the cache."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "uncached": self.uncached,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "size": len(self._entries)
+        }
+
+
+search_cache = SearchCache()
@@ -0,0 +1,123 @@
+"""In-process short-term memory: a ring buffer of recent messages per group."""
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from collections import OrderedDict, deque
+import threading
+from backend.config import SHORT_MEMORY_MESSAGES, SHORT_MEMORY_MAX_GROUPS, SHORT_MEMORY_MAX_CHARS
+
+
+class ShortTermMemory:
+    """Bounded per-group buffers of recent {"role", "content"} messages.
+
+    Each group keeps at most messages_per_group messages; older ones fall off
+    the front. Across groups, at most max_groups buffers and max_chars
+    characters of content are held, and the least recently used (idle) groups
+    are evicted first. A group that isn't buffered is filled from its persisted
+    messages on first use, after which short-memory turns read it without
+    touching the database.
+    """
+
+    def __init__(
+        self,
+        messages_per_group: int = SHORT_MEMORY_MESSAGES,
+        max_groups: int = SHORT_MEMORY_MAX_GROUPS,
+        max_chars: int = SHORT_MEMORY_MAX_CHARS
+    ):
+        self.messages_per_group = messages_per_group
+        self.max_groups = max_groups
+        self.max_chars = max_chars
+        self._groups: "OrderedDict[str, deque]" = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, group_id: str) -> Optional[List[Dict[str, str]]]:
+        """Return the group's buffered messages (oldest first), or None if not buffered."""
+        with self._lock:
+            buffer = self._groups.get(group_id)
+            if buffer is None:
+                self.misses += 1
+                return None
+            self._groups.move_to_end(group_id)
+            self.hits += 1
+            return list(buffer)
+
+    def load(self, group_id: str, messages: Iterable[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Replace the group's buffer with persisted messages (oldest first)."""
+        with self._lock:
+            self._drop(group_id)
+            buffer = deque(maxlen=self.messages_per_group)
+            self._groups[group_id] = buffer
+            for message in messages:
+                self._push(buffer, message)
+            self._evict()
+            return list(buffer)
+
+    def get_or_load(self, group_id: str, loader: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, str]]:
+        """Return the group's recent messages, filling the buffer with loader() on a miss."""
+        messages = self.get(group_id)
+        if messages is None:
+            messages = self.load(group_id, loader())
+        return messages
+
+    async def aget_or_load(self, group_id: str, loader: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, str]]:
+        """Async variant of get_or_load."""
+        messages = self.get(group_id)
+        if messages is None:
+            messages = self.load(group_id, await loader())
+        return messages
+
+    def extend(self, group_id: str, messages: Iterable[Dict[str, str]]) -> None:
+        """Append new messages to the group's buffer if it is buffered.
+
+        Groups that aren't buffered are left alone; they are filled from the
+        database the next time they are read.
+        """
+        with self._lock:
+            buffer = self._groups.get(group_id)
+            if buffer is None:
+                return
+            self._groups.move_to_end(group_id)
+            for message in messages:
+                self._push(buffer, message)
+            self._evict()
+
+    def invalidate(self, group_id: str) -> None:
+        """Forget a group's buffer (e.g. when its history is deleted)."""
+        with self._lock:
+            self._drop(group_id)
+
+    def _push(self, buffer: deque, message: Dict[str, Any]) -> None:
+        if len(buffer) == buffer.maxlen:
+            self._chars -= len(buffer[0]["content"])
+        entry = {"role": str(message["role"]), "content": str(message["content"] or "")}
+        buffer.append(entry)
+        self._chars += len(entry["content"])
+
+    def _drop(self, group_id: str) -> None:
+        buffer = self._groups.pop(group_id, None)
+        if buffer is not None:
+            self._chars -= sum(len(m["content"]) for m in buffer)
+
+    def _evict(self) -> None:
+        # Never evict the group just touched (last in LRU order)
+        while len(self._groups) > 1 and (len(self._groups) > self.max_groups or self._chars > self.max_chars):
+            group_id = next(iter(self._groups))
+            self._drop(group_id)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return buffer occupancy and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "groups": len(self._groups),
+            "chars": self._chars,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+short_term_memory = ShortTermMemory()
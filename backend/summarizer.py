@@ -0,0 +1,327 @@
+"""Rolling per-group conversation summaries, updated in the background turn by turn."""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import time
+from langchain_core.messages import HumanMessage
+from sqlalchemy import select
+from backend.config import (
+    SUMMARY_ENABLED, SUMMARY_MODEL, SUMMARY_MAX_WORDS, SUMMARY_FLUSH_INTERVAL,
+    SUMMARY_MAX_RETRIES, SUMMARY_MAX_QUEUE, SUMMARY_CACHE_SIZE, SUMMARY_MAX_CONCURRENCY
+)
+from backend.context_budget import ContextBudget
+from backend.database import AsyncSessionLocal
+from backend.llm import get_llm
+from backend import models
+
+SUMMARY_PROMPT = """You keep a running summary of a conversation between a user and an AI assistant.
+
+Current summary:
+{summary}
+
+New exchanges:
+{turns}
+
+Rewrite the summary so it also covers the new exchanges. Keep what the user told you about themselves, their preferences, decisions, facts and figures that were settled, topics discussed and open questions; drop greetings and small talk. Write plain prose in at most {max_words} words and reply with the summary only."""
+
+# Each side of a turn is cut to this many tokens before it is folded in
+_TURN_MAX_TOKENS = 400
+
+# (group id, user message, response, group generation, attempts so far)
+_Turn = Tuple[str, str, str, int, int]
+
+
+def summary_memory_id(group_id: str) -> str:
+    """Id of the Memory row holding a group's rolling summary."""
+    return f"summary-{group_id}"
+
+
+class ConversationSummarizer:
+    """Background task that keeps one rolling summary per group.
+
+    Finished turns are queued and folded into the group's existing summary by
+    a small model, so the cost of an update depends on the new turns rather
+    than on the length of the conversation. Turns that arrive together are
+    folded in one call per group, with at most max_concurrency calls in
+    flight. Each summary is stored as a single
+    high-importance Memory row (id summary_memory_id(group_id)) and the
+    latest summaries are kept in an LRU cache for the chat prefetch.
+    Deleting a group's history bumps its generation, which discards turns
+    and folds that started before the delete.
+    """
+
+    def __init__(
+        self,
+        model_name: str = SUMMARY_MODEL,
+        max_words: int = SUMMARY_MAX_WORDS,
+        flush_interval: float = SUMMARY_FLUSH_INTERVAL,
+        max_retries: int = SUMMARY_MAX_RETRIES,
+        max_queue: int = SUMMARY_MAX_QUEUE,
+        cache_size: int = SUMMARY_CACHE_SIZE,
+        max_concurrency: int = SUMMARY_MAX_CONCURRENCY,
+        enabled: bool = SUMMARY_ENABLED
+    ):
+        self.model_name = model_name
+        self.max_words = max_words
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.max_queue = max_queue
+        self.cache_size = cache_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.enabled = enabled
+        self._budget = ContextBudget(model_name)
+        self._queue: Optional["asyncio.Queue[_Turn]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Failed turns waiting for their backoff to expire: (ready_at, turn)
+        self._pending_retries: List[Tuple[float, _Turn]] = []
+        # group id -> summary, or None when the group is known to have none yet
+        self._cache: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.enqueued = 0
+        self.folds = 0
+        self.folded = 0
+        self.updates = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.retries = 0
+        self.hits = 0
+        self.misses = 0
+        self.last_fold_seconds = 0.0
+        self.total_fold_seconds = 0.0
+
+    def start(self) -> None:
+        """Start the worker on the running event loop if it is not already running."""
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._stopping = False
+        self._queue = self._carry_over_queue()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="conversation-summarizer")
+        print("[SUMMARY] Conversation summarizer started")
+
+    def _carry_over_queue(self) -> "asyncio.Queue[_Turn]":
+        """Queue for a new worker, holding every turn the previous one left behind.
+
+        The turns are moved rather than the old queue reused as is, since an
+        asyncio queue stays bound to the loop its first waiter ran on.
+        """
+        queue: "asyncio.Queue[_Turn]" = asyncio.Queue(maxsize=self.max_queue)
+        while self._queue is not None and not self._queue.empty():
+            queue.put_nowait(self._queue.get_nowait())
+        return queue
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop the worker after folding everything still queued."""
+        self._stopping = True
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+            print(f"[SUMMARY] Conversation summarizer stopped ({self._queue.qsize() if self._queue else 0} turns left)")
+
+    def enqueue(self, group_id: str, user_message: str, response: str) -> bool:
+        """Queue a finished turn to be folded into the group's summary.
+
+        Returns:
+            True if queued, False if summaries are disabled or the queue is full
+        """
+        if not self.enabled:
+            return False
+        self.start()
+        turn = (group_id, user_message, response or "", self._generations.get(group_id, 0), 0)
+        try:
+            self._queue.put_nowait(turn)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"[SUMMARY] Queue full, dropping turn for group {group_id}")
+            return False
+        self.enqueued += 1
+        return True
+
+    def get(self, group_id: str) -> Optional[str]:
+        """Return the group's cached summary without touching the database."""
+        return self._cache.get(group_id)
+
+    async def aget(self, group_id: str) -> Optional[str]:
+        """Return the group's summary, reading its Memory row on a cache miss."""
+        if group_id in self._cache:
+            self._cache.move_to_end(group_id)
+            self.hits += 1
+            return self._cache[group_id]
+        self.misses += 1
+        generation = self._generations.get(group_id, 0)
+        async with AsyncSessionLocal() as db:
+            row = await db.get(models.Memory, summary_memory_id(group_id))
+        summary = row.content if row is not None else None
+        if generation == self._generations.get(group_id, 0):
+            self._remember(group_id, summary)
+        return summary
+
+    def invalidate(self, group_id: str) -> None:
+        """Forget a group's summary and discard its queued turns (e.g. when its history is deleted)."""
+        self._generations[group_id] = self._generations.get(group_id, 0) + 1
+        self._cache.pop(group_id, None)
+        self._pending_retries = [(r, turn) for r, turn in self._pending_retries if turn[0] != group_id]
+
+    def _remember(self, group_id: str, summary: Optional[str]) -> None:
+        self._cache[group_id] = summary
+        self._cache.move_to_end(group_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _drain(self, first: Optional[_Turn]) -> List[_Turn]:
+        turns = [first] if first is not None else []
+        now = time.monotonic()
+        ready = [turn for ready_at, turn in self._pending_retries if ready_at <= now]
+        self._pending_retries = [(r, turn) for r, turn in self._pending_retries if r > now]
+        # Retried turns are older than anything still queued
+        turns = ready + turns
+        while True:
+            try:
+                turns.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return [turn for turn in turns if turn[3] == self._generations.get(turn[0], 0)]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                first = None
+            if first is not None and not self._stopping:
+                # Let the rest of a busy group's turns arrive so they share one fold
+                await asyncio.sleep(self.flush_interval)
+            turns = self._drain(first)
+            if turns:
+                await self._flush(turns)
+            if self._stopping and self._queue.empty() and not self._pending_retries:
+                return
+
+    async def _flush(self, turns: List[_Turn]) -> None:
+        by_group: Dict[str, List[_Turn]] = {}
+        for turn in turns:
+            by_group.setdefault(turn[0], []).append(turn)
+
+        # A burst across many groups would otherwise fire one LLM call per group at once
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fold(group_id: str, group_turns: List[_Turn]) -> Optional[str]:
+            async with semaphore:
+                return await self._fold(group_id, group_turns)
+
+        results = await asyncio.gather(
+            *[fold(group_id, group_turns) for group_id, group_turns in by_group.items()],
+            return_exceptions=True
+        )
+        summaries: Dict[str, Tuple[str, int]] = {}
+        for (group_id, group_turns), result in zip(by_group.items(), results):
+            if isinstance(result, BaseException):
+                print(f"[SUMMARY] Error folding {len(group_turns)} turns for group {group_id}: {result}")
+                self._retry(group_turns)
+            elif result:
+                summaries[group_id] = (result, group_turns[0][3])
+        if summaries:
+            await self._store(summaries, by_group)
+
+    async def _fold(self, group_id: str, turns: List[_Turn]) -> Optional[str]:
+        """Fold turns into the group's current summary and return the new summary."""
+        started = time.monotonic()
+        current = await self.aget(group_id)
+        exchanges = "\n\n".join(
+            f"User: {self._budget.truncate(user_message, _TURN_MAX_TOKENS)}\n"
+            f"Assistant: {self._budget.truncate(response, _TURN_MAX_TOKENS)}"
+            for _, user_message, response, _, _ in turns
+        )
+        prompt = SUMMARY_PROMPT.format(
+            summary=current or "(none yet)",
+            turns=exchanges,
+            max_words=self.max_words
+        )
+        llm = get_llm(model_name=self.model_name, temperature=0.0)
+        result = await llm.ainvoke([HumanMessage(content=prompt)])
+        content = result.content if isinstance(result.content, str) else str(result.content)
+        # Roughly two tokens per word leaves room for names and numbers but caps a runaway reply
+        summary = self._budget.truncate(content.strip(), self.max_words * 2)
+
+        elapsed = time.monotonic() - started
+        self.folds += 1
+        self.folded += len(turns)
+        self.last_fold_seconds = elapsed
+        self.total_fold_seconds += elapsed
+        print(f"[SUMMARY] Folded {len(turns)} turns into group {group_id}'s summary in {elapsed:.2f}s")
+        return summary or None
+
+    async def _store(self, summaries: Dict[str, Tuple[str, int]], by_group: Dict[str, List[_Turn]]) -> None:
+        """Upsert the new summaries in one transaction, skipping groups deleted meanwhile."""
+        current = {
+            group_id: entry for group_id, entry in summaries.items()
+            if entry[1] == self._generations.get(group_id, 0)
+        }
+        if not current:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                existing = set((await db.execute(
+                    select(models.Group.id).where(models.Group.id.in_(current))
+                )).scalars().all())
+                for group_id, (summary, _) in current.items():
+                    if group_id not in existing:
+                        print(f"[SUMMARY] Group {group_id} no longer exists, skipping summary")
+                        self.skipped += 1
+                        continue
+                    await db.merge(models.Memory(
+                        id=summary_memory_id(group_id),
+                        group_id=group_id,
+                        content=summary,
+                        importance="high"
+                    ))
+                await db.commit()
+        except Exception as e:
+            print(f"[SUMMARY] Error storing {len(current)} summaries: {e}")
+            for group_id in current:
+                self._retry(by_group[group_id])
+            return
+
+        for group_id, (summary, generation) in current.items():
+            if group_id in existing and generation == self._generations.get(group_id, 0):
+                self._remember(group_id, summary)
+                self.updates += 1
+
+    def _retry(self, turns: List[_Turn]) -> None:
+        for group_id, user_message, response, generation, attempts in turns:
+            if attempts >= self.max_retries:
+                self.dropped += 1
+                print(f"[SUMMARY] Dropping turn for group {group_id} after {attempts + 1} attempts")
+                continue
+            # Exponential backoff: flush_interval, 2x, 4x, ...
+            ready_at = time.monotonic() + self.flush_interval * (2 ** attempts)
+            self._pending_retries.append(
+                (ready_at, (group_id, user_message, response, generation, attempts + 1))
+            )
+            self.retries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, fold throughput and latency, and summary cache metrics."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "pending_retries": len(self._pending_retries),
+            "enqueued": self.enqueued,
+            "folds": self.folds,
+            "folded_turns": self.folded,
+            "updates": self.updates,
+            "dropped": self.dropped,
+            "skipped": self.skipped,
+            "retries": self.retries,
+            "last_fold_seconds": self.last_fold_seconds,
+            "avg_fold_seconds": self.total_fold_seconds / self.folds if self.folds else 0.0,
+            "cached_groups": len(self._cache),
+            "cache_hit_rate": self.hits / lookups if lookups else 0.0,
+            "running": self._task is not None and not self._task.done()
+        }
+
+
+conversation_summarizer = ConversationSummarizer()
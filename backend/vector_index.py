@@ -0,0 +1,419 @@
+"""In-process NumPy vector index with memory-mapped persistence."""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import uuid4
+import json
+import os
+import re
+import shutil
+import threading
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+_INITIAL_CAPACITY = 256
+# Compact once at least this share of rows are tombstoned (and there are enough of them)
+_COMPACT_RATIO = 0.25
+_COMPACT_MIN_DELETED = 64
+# Data files of one generation, and the file naming the current generation
+_DATA_FILES = ("vectors.npy", "meta.jsonl", "tombstones.txt")
+_CURRENT = "CURRENT"
+_GENERATION_RE = re.compile(r"gen-(\d+)")
+
+
+def _value_key(value: Any) -> str:
+    """Hashable key for a metadata value (values may be lists or dicts)."""
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class NumpyVectorStore(VectorStore):
+    """Cosine-similarity index over a contiguous float32 matrix.
+
+    Vectors are L2-normalized on insert and kept in ``vectors.npy``, a
+    memory-mapped file that grows append-only by doubling its capacity.
+    Row metadata is appended to ``meta.jsonl`` and deleted row numbers to
+    ``tombstones.txt``. Once enough rows are dead, compaction writes the live
+    rows to a new generation directory (``gen-N``) and switches to it with a
+    single rename of the ``CURRENT`` file, so a crash leaves either the old or
+    the new generation, never a mix; unfinished generations are removed on open.
+    Search is a single matrix-vector product plus ``argpartition`` top-k.
+    Metadata filters are answered from an inverted index of (key, value) ->
+    rows, so a filtered search builds its row mask without visiting rows.
+
+    Scores returned by similarity_search_with_score are cosine distances
+    (1 - cosine similarity), so lower is more similar, matching Chroma.
+    """
+
+    def __init__(self, embedding: Embeddings, path: str):
+        self._embedding = embedding
+        self.path = path
+        self._lock = threading.RLock()
+        self._reset()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def _reset(self) -> None:
+        self._vectors: Optional[np.ndarray] = None
+        # 0 is the index directory itself; compaction moves the data to gen-1, gen-2, ...
+        self._generation = 0
+        self._count = 0
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_by_id: Dict[str, int] = {}
+        # (metadata key, value key) -> rows holding that value, dead rows included
+        self._postings: Dict[Tuple[str, str], List[int]] = {}
+        self._deleted = 0
+        self._closed = False
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    # -- persistence -------------------------------------------------------
+
+    def _generation_dir(self, generation: int) -> str:
+        return self.path if generation == 0 else os.path.join(self.path, f"gen-{generation}")
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self._generation_dir(self._generation), name)
+
+    def _read_generation(self) -> int:
+        try:
+            with open(os.path.join(self.path, _CURRENT), encoding="utf-8") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return 0
+
+    def _discard_other_generations(self) -> None:
+        """Remove every generation but the current one (interrupted or superseded compactions)."""
+        for name in os.listdir(self.path):
+            match = _GENERATION_RE.fullmatch(name)
+            if match and int(match.group(1)) != self._generation:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        if self._generation:
+            for name in _DATA_FILES:
+                if os.path.exists(os.path.join(self.path, name)):
+                    os.remove(os.path.join(self.path, name))
+
+    def _load(self) -> None:
+        self._generation = self._read_generation()
+        self._discard_other_generations()
+        if os.path.exists(self._file("meta.jsonl")):
+            with open(self._file("meta.jsonl"), encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        self._ids.append(row["id"])
+                        self._texts.append(row["text"])
+                        self._metadatas.append(row["metadata"])
+        if os.path.exists(self._file("vectors.npy")):
+            self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+
+        # A crash between the two appends can leave one side longer; trust the shorter
+        stored_rows = self._vectors.shape[0] if self._vectors is not None else 0
+        self._count = min(len(self._ids), stored_rows)
+        del self._ids[self._count:], self._texts[self._count:], self._metadatas[self._count:]
+
+        self._alive = np.zeros(stored_rows, dtype=bool)
+        self._alive[:self._count] = True
+        if os.path.exists(self._file("tombstones.txt")):
+            with open(self._file("tombstones.txt"), encoding="utf-8") as f:
+                for row in f.read().split():
+                    if int(row) < self._count:
+                        self._alive[int(row)] = False
+        self._row_by_id = {
+            doc_id: row for row, doc_id in enumerate(self._ids) if self._alive[row]
+        }
+        self._deleted = self._count - int(self._alive[:self._count].sum())
+        self._postings = {}
+        self._index_metadata(0, self._metadatas)
+
+    def _index_metadata(self, start: int, metadatas: List[Dict[str, Any]]) -> None:
+        for offset, metadata in enumerate(metadatas):
+            for key, value in metadata.items():
+                self._postings.setdefault((key, _value_key(value)), []).append(start + offset)
+
+    def _ensure_capacity(self, dim: int, needed: int) -> None:
+        if self._vectors is not None and self._vectors.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {self._vectors.shape[1]}")
+        capacity = self._vectors.shape[0] if self._vectors is not None else 0
+        if needed <= capacity:
+            return
+        new_capacity = max(_INITIAL_CAPACITY, capacity)
+        while new_capacity < needed:
+            new_capacity *= 2
+        tmp_path = self._file("vectors.npy.tmp")
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, dim))
+        if self._vectors is not None:
+            grown[:self._count] = self._vectors[:self._count]
+        grown.flush()
+        del grown
+        self._vectors = None
+        os.replace(tmp_path, self._file("vectors.npy"))
+        self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive[:new_capacity]
+        self._alive = alive
+
+    def _append(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]], vectors: np.ndarray) -> None:
+        if len(set(ids)) < len(ids):
+            # An id repeated within the batch keeps only its last occurrence
+            last = sorted({doc_id: i for i, doc_id in enumerate(ids)}.values())
+            ids = [ids[i] for i in last]
+            texts = [texts[i] for i in last]
+            metadatas = [metadatas[i] for i in last]
+            vectors = vectors[last]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        with self._lock:
+            self._reopen_if_closed()
+            # Re-adding an existing id replaces it
+            replaced = [doc_id for doc_id in ids if doc_id in self._row_by_id]
+            if replaced:
+                self._tombstone(replaced)
+
+            start = self._count
+            self._ensure_capacity(vectors.shape[1], start + len(ids))
+            self._vectors[start:start + len(ids)] = vectors
+            self._vectors.flush()
+            with open(self._file("meta.jsonl"), "a", encoding="utf-8") as f:
+                for doc_id, text, metadata in zip(ids, texts, metadatas):
+                    f.write(json.dumps({"id": doc_id, "text": text, "metadata": metadata}) + "\n")
+            for offset, doc_id in enumerate(ids):
+                self._row_by_id[doc_id] = start + offset
+                self._alive[start + offset] = True
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(metadatas)
+            self._index_metadata(start, metadatas)
+            self._count = start + len(ids)
+            self._maybe_compact()
+
+    def _tombstone(self, ids: Iterable[str]) -> None:
+        # Tombstones record row numbers, so a re-added id keeps its new row
+        with open(self._file("tombstones.txt"), "a", encoding="utf-8") as f:
+            for doc_id in ids:
+                row = self._row_by_id.pop(doc_id, None)
+                if row is not None:
+                    self._alive[row] = False
+                    self._deleted += 1
+                    f.write(f"{row}\n")
+
+    def compact(self) -> None:
+        """Rewrite the index without tombstoned rows, as a new generation."""
+        with self._lock:
+            self._reopen_if_closed()
+            if self._vectors is None:
+                return
+            keep = np.flatnonzero(self._alive[:self._count])
+            dim = self._vectors.shape[1]
+            capacity = max(_INITIAL_CAPACITY, int(len(keep) * 2))
+            generation = self._generation + 1
+            directory = self._generation_dir(generation)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+
+            compacted = np.lib.format.open_memmap(
+                os.path.join(directory, "vectors.npy"), mode="w+", dtype=np.float32, shape=(capacity, dim)
+            )
+            compacted[:len(keep)] = self._vectors[keep]
+            compacted.flush()
+            del compacted
+            ids = [self._ids[i] for i in keep]
+            texts = [self._texts[i] for i in keep]
+            metadatas = [self._metadatas[i] for i in keep]
+            with open(os.path.join(directory, "meta.jsonl"), "w", encoding="utf-8") as f:
+                for doc_id, text, metadata in zip(ids, texts, metadatas):
+                    f.write(json.dumps({"id": doc_id, "text": text, "metadata": metadata}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            # The single switch: until CURRENT is replaced, a reopen still sees the old generation
+            current_tmp = os.path.join(self.path, _CURRENT + ".tmp")
+            with open(current_tmp, "w", encoding="utf-8") as f:
+                f.write(str(generation))
+                f.flush()
+                os.fsync(f.fileno())
+            self._vectors = None
+            os.replace(current_tmp, os.path.join(self.path, _CURRENT))
+            self._generation = generation
+            self._discard_other_generations()
+            self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+
+            self._ids, self._texts, self._metadatas = ids, texts, metadatas
+            self._count = len(keep)
+            self._alive = np.zeros(capacity, dtype=bool)
+            self._alive[:self._count] = True
+            self._row_by_id = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._postings = {}
+            self._index_metadata(0, self._metadatas)
+            self._deleted = 0
+            print(f"[MEMORY] Compacted index {self.path} to {self._count} rows (generation {generation})")
+
+    def _maybe_compact(self) -> None:
+        if self._deleted >= _COMPACT_MIN_DELETED and self._deleted >= _COMPACT_RATIO * self._count:
+            self.compact()
+
+    def destroy(self) -> None:
+        """Delete every file of this index, leaving it empty and ready for new rows."""
+        with self._lock:
+            self._vectors = None
+            shutil.rmtree(self.path, ignore_errors=True)
+            # The instance stays registered and cached, so later writes need the directory
+            os.makedirs(self.path, exist_ok=True)
+            self._reset()
+
+    def close(self) -> None:
+        """Release the memory map and in-memory rows; the next use reloads them from disk."""
+        with self._lock:
+            self._reset()
+            self._closed = True
+
+    def _reopen_if_closed(self) -> None:
+        if self._closed:
+            self._reset()
+            self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._reopen_if_closed()
+            return len(self._row_by_id)
+
+    # -- VectorStore interface --------------------------------------------
+
+    def _prepare(self, documents: List[Document], ids: Optional[List[str]]):
+        ids = list(ids) if ids else [doc.id or str(uuid4()) for doc in documents]
+        texts = [doc.page_content for doc in documents]
+        metadatas = [dict(doc.metadata) for doc in documents]
+        return ids, texts, metadatas
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        if not documents:
+            return []
+        ids, texts, metadatas = self._prepare(documents, ids)
+        vectors = np.asarray(self._embedding.embed_documents(texts), dtype=np.float32)
+        self._append(ids, texts, metadatas, vectors)
+        return ids
+
+    async def aadd_documents(self, documents: List[Document], ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        if not documents:
+            return []
+        ids, texts, metadatas = self._prepare(documents, ids)
+        vectors = np.asarray(await self._embedding.aembed_documents(texts), dtype=np.float32)
+        self._append(ids, texts, metadatas, vectors)
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+        return self.add_documents(documents, ids=ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            self._reopen_if_closed()
+            self._tombstone(ids)
+            self._maybe_compact()
+        return True
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        with self._lock:
+            self._reopen_if_closed()
+            rows = [self._row_by_id[doc_id] for doc_id in ids if doc_id in self._row_by_id]
+            return [
+                Document(id=self._ids[row], page_content=self._texts[row], metadata=self._metadatas[row])
+                for row in rows
+            ]
+
+    def _top_k(self, query_vector: np.ndarray, k: int, filter: Optional[Dict[str, Any]]) -> List[Tuple[Document, float]]:
+        norm = np.linalg.norm(query_vector)
+        if norm:
+            query_vector = query_vector / norm
+        with self._lock:
+            self._reopen_if_closed()
+            if self._vectors is None or self._count == 0 or k <= 0:
+                return []
+            scores = self._vectors[:self._count] @ query_vector
+            mask = self._alive[:self._count].copy()
+            for key, value in (filter or {}).items():
+                rows = self._postings.get((key, _value_key(value)))
+                if not rows:
+                    return []
+                column = np.zeros(self._count, dtype=bool)
+                column[rows] = True
+                mask &= column
+            candidates = np.flatnonzero(mask)
+            if len(candidates) == 0:
+                return []
+            candidate_scores = scores[candidates]
+            if k < len(candidates):
+                top = np.argpartition(-candidate_scores, k - 1)[:k]
+            else:
+                top = np.arange(len(candidates))
+            top = top[np.argsort(-candidate_scores[top])]
+            return [
+                (
+                    Document(
+                        id=self._ids[candidates[i]],
+                        page_content=self._texts[candidates[i]],
+                        metadata=self._metadatas[candidates[i]]
+                    ),
+                    float(1.0 - candidate_scores[i])
+                )
+                for i in top
+            ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        query_vector = np.asarray(self._embedding.embed_query(query), dtype=np.float32)
+        return self._top_k(query_vector, k, filter)
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        query_vector = np.asarray(await self._embedding.aembed_query(query), dtype=np.float32)
+        return self._top_k(query_vector, k, filter)
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self._top_k(np.asarray(embedding, dtype=np.float32), k, filter)]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        path: Optional[str] = None,
+        **kwargs: Any
+    ) -> "NumpyVectorStore":
+        if path is None:
+            raise ValueError("NumpyVectorStore.from_texts requires a path")
+        store = cls(embedding=embedding, path=path)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+
+def index_path(root: str, collection_name: str) -> str:
+    """Directory for a collection's index files (collection name made filesystem-safe)."""
+    return os.path.join(root, re.sub(r"[^A-Za-z0-9_.-]", "_", collection_name))
@@ -1,6 +1,6 @@
 import { useEffect, useRef, useState } from 'react';
 import { useUIStore } from '@/lib/store';
-import { useAgents, useGroups, useMessages, useSendMessage, useDeleteGroupMessages, type GroupWithAgents } from '@/lib/hooks';
+import { useAgents, useGroups, useMessages, useSendMessage, useDeleteGroupMessages, addStreamedTurn, type GroupWithAgents } from '@/lib/hooks';
 import { queryClient } from '@/lib/queryClient';
 import { ChatMessage } from './ChatMessage';
 import { ChatInput } from './ChatInput';
@@ -65,7 +65,13 @@ export function ChatArea() {
 
   const { data: agents = [] } = useAgents();
   const { data: groups = [] } = useGroups();
-  const { data: messages = [], isLoading: messagesLoading } = useMessages(selectedGroupId);
+  const {
+    messages,
+    isLoading: messagesLoading,
+    hasOlder,
+    loadOlder,
+    isLoadingOlder,
+  } = useMessages(selectedGroupId);
   const sendMessageMutation = useSendMessage();
   const deleteMessagesMutation = useDeleteGroupMessages();
 
@@ -94,11 +100,37 @@ export function ChatArea() {
       .filter((a): a is Agent => a !== undefined)
     : [];
 
+  // Keyed on the newest message so loading older history doesn't jump to the bottom
+  const lastMessageId = messages[messages.length - 1]?.id;
+
   useEffect(() => {
     if (scrollRef.current) {
       scrollRef.current.scrollTop = scrollRef.current.scrollHeight;
     }
-  }, [messages.length, optimisticUserMessage, sendMessageMutation.isPending, streamIterations.length]);
+  }, [lastMessageId, optimisticUserMessage, sendMessageMutation.isPending, streamIterations.length]);
+
+  const buildStreamedTurn = (
+    userMessage: Message,
+    finalResponse: string | undefined,
+    critic: { verdict?: string; feedback?: string } | null,
+  ): Message[] => {
+    const turn: Message[] = [userMessage];
+    const assistant = groupAgentsList.find((a) => a.agent_type === 'manual');
+    const criticAgent = groupAgentsList.find((a) => a.agent_type === 'critic');
+    const base = { groupId: userMessage.groupId, senderType: 'agent', createdAt: userMessage.createdAt };
+    if (assistant && finalResponse) {
+      turn.push({ ...base, id: `temp-${Date.now()}-assistant`, senderId: assistant.id, content: finalResponse });
+    }
+    if (criticAgent && critic) {
+      turn.push({
+        ...base,
+        id: `temp-${Date.now()}-critic`,
+        senderId: criticAgent.id,
+        content: `**Verdict:** ${critic.verdict ?? 'N/A'}\n\n**Feedback:** ${critic.feedback || 'No feedback provided'}`,
+      });
+    }
+    return turn;
+  };
 
   const handleSendMessage = async (content: string) => {
     if (selectedGroupId) {
@@ -115,6 +147,11 @@ export function ChatArea() {
       setStreamIterations([]);
       setCurrentIteration(0);
 
+      // The server writes the finished turn in the background, so it is shown
+      // from the stream first and reconciled with the stored messages afterwards
+      let completedTurn: Message[] | null = null;
+      let lastCritic: { verdict?: string; feedback?: string } | null = null;
+
       try {
         const response = await fetch('/api/chat/stream', {
           method: 'POST',
@@ -169,8 +206,27 @@ export function ChatArea() {
                       isRevision: data.is_revision || false
                     }];
                   });
+                } else if (data.type === 'responder_delta') {
+                  // Token-level delta for the iteration currently being generated
+                  const iteration = data.iteration || 1;
+                  setCurrentIteration(iteration);
+                  setStreamIterations(prev => {
+                    const existing = prev.find(i => i.iteration === iteration);
+                    if (existing) {
+                      return prev.map(i => i.iteration === iteration
+                        ? { ...i, response: i.response + data.content }
+                        : i
+                      );
+                    }
+                    return [...prev, {
+                      iteration,
+                      response: data.content,
+                      isRevision: iteration > 1
+                    }];
+                  });
                 } else if (data.type === 'critic') {
                   const iteration = data.iteration || currentIteration;
+                  lastCritic = { verdict: data.verdict, feedback: data.feedback };
                   console.log(`[UI] Received critic feedback for iteration ${iteration}:`, data.verdict);
                   // Update the iteration with critic feedback
                   setStreamIterations(prev => 
@@ -185,6 +241,7 @@ export function ChatArea() {
                   );
                 } else if (data.type === 'complete') {
                   console.log(`[UI] Completed with ${data.total_iterations} iterations`);
+                  completedTurn = buildStreamedTurn(newOptimisticMessage, data.final_response, lastCritic);
                 }
               } catch (e) {
                 console.error('Error parsing JSON:', e);
@@ -201,8 +258,12 @@ export function ChatArea() {
         setStreamingContent("");
         setStreamIterations([]);
         setCurrentIteration(0);
-        // Refetch messages to show the saved messages from backend
-        queryClient.invalidateQueries({ queryKey: ['/api/groups', selectedGroupId, 'messages'] });
+        if (completedTurn) {
+          // Kept on screen until a refetch returns the stored turn
+          addStreamedTurn(selectedGroupId, completedTurn);
+        } else {
+          queryClient.invalidateQueries({ queryKey: ['/api/groups', selectedGroupId, 'messages'] });
+        }
       }
     }
   };
@@ -299,6 +360,20 @@ export function ChatArea() {
             <EmptyState type="no-messages" />
           ) : (
             <>
+              {hasOlder && (
+                <div className="flex justify-center">
+                  <Button
+                    variant="ghost"
+                    size="sm"
+                    onClick={() => loadOlder()}
+                    disabled={isLoadingOlder}
+                    data-testid="button-load-older"
+                  >
+                    {isLoadingOlder && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                    Load older messages
+                  </Button>
+                </div>
+              )}
               {messages.map((message) => {
                 const agent = message.senderId
                   ? agents.find((a) => a.id === message.senderId)
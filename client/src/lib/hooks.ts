@@ -1,4 +1,4 @@
-import { useQuery, useMutation } from '@tanstack/react-query';
+import { useQuery, useMutation, useInfiniteQuery, type InfiniteData } from '@tanstack/react-query';
 import { queryClient, apiRequest } from './queryClient';
 import type { Agent, Group, Message, InsertAgent, InsertGroup } from '@shared/schema';
 
@@ -6,6 +6,12 @@ export interface GroupWithAgents extends Group {
   agentIds: string[];
 }
 
+export interface MessagePage {
+  messages: Message[];
+  nextCursor: string | null;
+  hasMore: boolean;
+}
+
 export function useAgents() {
   return useQuery<Agent[]>({
     queryKey: ['/api/agents'],
@@ -126,11 +132,103 @@ export function useRemoveAgentFromGroup() {
   });
 }
 
+// Streamed turns the server is still writing behind, per group. Their rows stay
+// in the newest page across refetches until a fetch returns the stored turn.
+interface PendingTurn {
+  rows: Message[];
+  knownIds: Set<string>;
+}
+const pendingTurns = new Map<string, PendingTurn[]>();
+// Refetch delays while a streamed turn is pending; it is dropped after the last one
+const RECONCILE_DELAYS_MS = [250, 500, 1000, 2000, 4000];
+
+function withPendingTurns(groupId: string, page: MessagePage): MessagePage {
+  const pending = pendingTurns.get(groupId);
+  if (!pending) return page;
+  // A turn is written in one transaction, so a new user row with its text means the whole turn is stored
+  const storedUserRows = page.messages.filter((m) => m.senderType === 'user');
+  const remaining = pending.filter((turn) => {
+    const [userRow] = turn.rows;
+    const match = storedUserRows.findIndex((m) => !turn.knownIds.has(m.id) && m.content === userRow.content);
+    if (match === -1) return true;
+    storedUserRows.splice(match, 1);
+    return false;
+  });
+  if (remaining.length === 0) {
+    pendingTurns.delete(groupId);
+    return page;
+  }
+  pendingTurns.set(groupId, remaining);
+  return { ...page, messages: [...page.messages, ...remaining.flatMap((turn) => turn.rows)] };
+}
+
 export function useMessages(groupId: string | null) {
-  return useQuery<Message[]>({
+  const query = useInfiniteQuery({
     queryKey: ['/api/groups', groupId, 'messages'],
+    queryFn: async ({ pageParam }) => {
+      const params = pageParam ? `?before=${encodeURIComponent(pageParam)}` : '';
+      const res = await apiRequest('GET', `/api/groups/${groupId}/messages${params}`);
+      const page = (await res.json()) as MessagePage;
+      return pageParam || !groupId ? page : withPendingTurns(groupId, page);
+    },
+    initialPageParam: null as string | null,
+    // Each page holds older messages than the one before it
+    getNextPageParam: (lastPage) => (lastPage.hasMore ? lastPage.nextCursor : null),
     enabled: !!groupId,
   });
+
+  const messages = query.data
+    ? [...query.data.pages].reverse().flatMap((page) => page.messages)
+    : [];
+
+  return {
+    messages,
+    isLoading: query.isLoading,
+    hasOlder: query.hasNextPage,
+    loadOlder: query.fetchNextPage,
+    isLoadingOlder: query.isFetchingNextPage,
+  };
+}
+
+// Append messages to the newest cached page, e.g. a streamed turn the server is still writing
+export function appendMessagesToCache(groupId: string, messages: Message[]) {
+  queryClient.setQueryData<InfiniteData<MessagePage, string | null>>(
+    ['/api/groups', groupId, 'messages'],
+    (data) => {
+      if (!data || data.pages.length === 0) return data;
+      const [newest, ...older] = data.pages;
+      return {
+        ...data,
+        pages: [{ ...newest, messages: [...newest.messages, ...messages] }, ...older],
+      };
+    },
+  );
+}
+
+// Show a streamed turn (user row first) right away and keep it until a refetch returns it from the server
+export function addStreamedTurn(groupId: string, rows: Message[]) {
+  const data = queryClient.getQueryData<InfiniteData<MessagePage, string | null>>(['/api/groups', groupId, 'messages']);
+  const turn: PendingTurn = { rows, knownIds: new Set(data?.pages.flatMap((page) => page.messages.map((m) => m.id)) ?? []) };
+  pendingTurns.set(groupId, [...(pendingTurns.get(groupId) ?? []), turn]);
+  appendMessagesToCache(groupId, rows);
+  reconcileStreamedTurn(groupId, turn, 0);
+}
+
+function reconcileStreamedTurn(groupId: string, turn: PendingTurn, attempt: number) {
+  setTimeout(async () => {
+    await queryClient.refetchQueries({ queryKey: ['/api/groups', groupId, 'messages'] });
+    const pending = pendingTurns.get(groupId) ?? [];
+    if (!pending.includes(turn)) return;
+    if (attempt + 1 < RECONCILE_DELAYS_MS.length) {
+      reconcileStreamedTurn(groupId, turn, attempt + 1);
+      return;
+    }
+    // The server never stored it (e.g. the write was dropped); show what it has
+    const remaining = pending.filter((t) => t !== turn);
+    if (remaining.length) pendingTurns.set(groupId, remaining);
+    else pendingTurns.delete(groupId);
+    queryClient.invalidateQueries({ queryKey: ['/api/groups', groupId, 'messages'] });
+  }, RECONCILE_DELAYS_MS[attempt]);
 }
 
 export function useSendMessage() {
@@ -155,6 +253,7 @@ export function useDeleteGroupMessages() {
       await apiRequest('DELETE', `/api/groups/${groupId}/messages`);
     },
     onSuccess: (_, groupId) => {
+      pendingTurns.delete(groupId);
       queryClient.invalidateQueries({ queryKey: ['/api/groups', groupId, 'messages'] });
     },
   });
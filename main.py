@@ -3,18 +3,30 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
+import asyncio
 import os
 
-from backend.database import init_db
+from backend.database import init_db, close_db
 from backend.routes import router
+from backend.ingestion import memory_ingestion
+from backend.persistence import turn_persistence
+from backend.summarizer import conversation_summarizer
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting up application...")
-    init_db()
+    await init_db()
     print("Database initialized")
+    memory_ingestion.start()
+    turn_persistence.start()
+    conversation_summarizer.start()
     yield
     print("Shutting down application...")
+    # Flush queued chat turns, summaries and memory writes before exiting
+    await turn_persistence.stop()
+    await conversation_summarizer.stop()
+    await asyncio.to_thread(memory_ingestion.stop)
+    await close_db()
 
 app = FastAPI(title="Multi-Agent Chat API", version="1.0.0", lifespan=lifespan)
 
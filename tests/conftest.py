@@ -0,0 +1,4 @@
+import os
+
+# backend.config refuses to import without a database URL; tests never connect to it
+os.environ.setdefault("AIVEN_DATABASE_URL", "sqlite:///:memory:")
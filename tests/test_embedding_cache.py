@@ -0,0 +1,86 @@
+"""CachedEmbeddings: LRU and SQLite tiers, batch de-duplication and the async path."""
+import asyncio
+import threading
+from typing import List
+import pytest
+from langchain_core.embeddings import Embeddings
+from backend.memory import CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.embedded: List[str] = []
+
+    def _vector(self, text: str, kind: float) -> List[float]:
+        return [float(len(text)), kind, 0.5]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return [self._vector(text, 1.0) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.embedded.append(text)
+        return self._vector(text, 2.0)
+
+
+@pytest.fixture
+def inner():
+    return CountingEmbeddings()
+
+
+def test_repeated_texts_are_embedded_once(inner):
+    cache = CachedEmbeddings(inner, namespace="test", path=None)
+    vectors = cache.embed_documents(["a", "bb", "a"])
+    assert vectors == [[1.0, 1.0, 0.5], [2.0, 1.0, 0.5], [1.0, 1.0, 0.5]]
+    assert cache.embed_documents(["bb"]) == [[2.0, 1.0, 0.5]]
+    assert inner.embedded == ["a", "bb"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_queries_and_documents_are_cached_separately(inner):
+    cache = CachedEmbeddings(inner, namespace="test", path=None)
+    assert cache.embed_documents(["a"]) == [[1.0, 1.0, 0.5]]
+    assert cache.embed_query("a") == [1.0, 2.0, 0.5]
+    assert inner.embedded == ["a", "a"]
+
+
+def test_lru_evicts_the_oldest_vector(inner):
+    cache = CachedEmbeddings(inner, namespace="test", max_size=2, path=None)
+    cache.embed_documents(["a", "b", "c"])
+    cache.embed_documents(["a"])
+    assert inner.embedded == ["a", "b", "c", "a"]
+    assert cache.stats()["size"] == 2
+
+
+def test_disk_tier_survives_a_new_instance(inner, tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    CachedEmbeddings(inner, namespace="test", path=path).embed_documents(["a", "bb"])
+    reopened = CachedEmbeddings(inner, namespace="test", path=path)
+    assert reopened.embed_documents(["bb", "a"]) == [[2.0, 1.0, 0.5], [1.0, 1.0, 0.5]]
+    assert inner.embedded == ["a", "bb"]
+    assert reopened.stats()["disk_hits"] == 2
+    other_model = CachedEmbeddings(inner, namespace="other", path=path)
+    other_model.embed_documents(["a"])
+    assert inner.embedded == ["a", "bb", "a"]
+
+
+def test_async_disk_tier_runs_off_the_event_loop_thread(inner, tmp_path, monkeypatch):
+    cache = CachedEmbeddings(inner, namespace="test", path=str(tmp_path / "embeddings.db"))
+    threads = set()
+    lookup = cache._lookup
+
+    def recording_lookup(kind, texts):
+        threads.add(threading.get_ident())
+        return lookup(kind, texts)
+
+    monkeypatch.setattr(cache, "_lookup", recording_lookup)
+
+    async def run():
+        first = await cache.aembed_query("hello")
+        second = await cache.aembed_documents(["hello", "hello"])
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == [5.0, 2.0, 0.5]
+    assert second == [[5.0, 1.0, 0.5], [5.0, 1.0, 0.5]]
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,61 @@
+"""IntentRouter: labelled routing, word boundaries, precedence and the classifier hook."""
+import pytest
+from backend.intent_benchmark import LABELLED_QUERIES
+from backend.intent_router import Intent, IntentRouter
+
+
+@pytest.fixture
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize("query,expected", LABELLED_QUERIES)
+def test_labelled_queries(router, query, expected):
+    assert router.route(query).intent == expected
+
+
+def test_keywords_match_whole_words_only(router):
+    scores, matches = router.scores("I know the snowy gamete")
+    assert matches == []
+    assert scores == {Intent.MEMORY: 0.0, Intent.SEARCH: 0.0}
+
+
+def test_longer_phrase_wins_and_evidence_combines(router):
+    decision = router.route("Who won the election?")
+    assert decision.matches == ["who won", "election"]
+    assert decision.scores[Intent.SEARCH] == pytest.approx(1 - 0.1 * 0.3)
+    assert decision.needs_search and not decision.is_memory_question
+
+
+def test_memory_takes_precedence_over_search(router):
+    decision = router.route("What did we discuss about the latest news?")
+    assert decision.intent == Intent.MEMORY
+    assert decision.scores[Intent.SEARCH] >= router.min_confidence
+
+
+def test_repeated_phrases_count_once(router):
+    assert router.scores("news news news")[0][Intent.SEARCH] == 0.9
+
+
+def test_below_min_confidence_is_plain():
+    decision = IntentRouter(min_confidence=0.95).route("latest python release")
+    assert decision.intent == Intent.PLAIN
+    assert decision.confidence == pytest.approx(1 - decision.scores[Intent.SEARCH])
+
+
+def test_classifier_is_only_consulted_when_uncertain():
+    calls = []
+
+    def classifier(query):
+        calls.append(query)
+        return {Intent.SEARCH: 1.0}
+
+    router = IntentRouter(classifier=classifier)
+    assert router.route("Explain how photosynthesis works").intent == Intent.PLAIN
+    assert router.route("breaking news").intent == Intent.SEARCH
+    assert calls == []
+
+    decision = router.route("any updates?")
+    assert calls == ["any updates?"]
+    assert decision.scores[Intent.SEARCH] == pytest.approx((0.4 + 1.0) / 2)
+    assert decision.intent == Intent.SEARCH
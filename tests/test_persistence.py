@@ -0,0 +1,143 @@
+"""TurnPersistenceQueue: batched writes, ordering, retries and skipped groups."""
+import asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from backend import models, persistence
+from backend.database import Base
+from backend.persistence import TurnPersistenceQueue
+
+
+class FlakySessions:
+    """Session factory whose first `failures` sessions fail to open."""
+
+    def __init__(self, sessions, failures=0):
+        self.sessions = sessions
+        self.failures = failures
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        return self.sessions()
+
+
+async def _database(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as db:
+        db.add_all([
+            models.Group(id="g1", name="Group"),
+            models.Agent(id="assistant", name="Assistant", role="assistant", agent_type="manual"),
+            models.Agent(id="critic", name="Critic", role="critic", agent_type="critic"),
+            models.GroupMember(group_id="g1", agent_id="assistant"),
+            models.GroupMember(group_id="g1", agent_id="critic"),
+        ])
+        await db.commit()
+    return engine, sessions
+
+
+async def _contents(sessions):
+    async with sessions() as db:
+        rows = (await db.execute(
+            select(models.Message).order_by(models.Message.created_at, models.Message.id)
+        )).scalars().all()
+    return [(m.sender_type, m.sender_id, m.content) for m in rows]
+
+
+def _run(tmp_path, monkeypatch, scenario, failures=0, **queue_args):
+    async def run():
+        engine, sessions = await _database(tmp_path / "chat.db")
+        monkeypatch.setattr(persistence, "AsyncSessionLocal", FlakySessions(sessions, failures))
+        queue = TurnPersistenceQueue(flush_interval=0.01, **queue_args)
+        await scenario(queue)
+        await queue.stop(timeout=5)
+        contents = await _contents(sessions)
+        await engine.dispose()
+        return queue, contents
+
+    return asyncio.run(run())
+
+
+def test_turns_are_written_in_order_with_their_agents(tmp_path, monkeypatch):
+    async def scenario(queue):
+        for i in range(3):
+            queue.enqueue("g1", f"question {i}", f"answer {i}", f"critique {i}")
+
+    queue, contents = _run(tmp_path, monkeypatch, scenario, batch_size=10)
+    expected = []
+    for i in range(3):
+        expected += [
+            ("user", None, f"question {i}"),
+            ("agent", "assistant", f"answer {i}"),
+            ("agent", "critic", f"critique {i}"),
+        ]
+    assert contents == expected
+    assert queue.stats()["stored"] == 3
+    assert queue.stats()["flushes"] == 1
+
+
+def test_batches_respect_batch_size(tmp_path, monkeypatch):
+    async def scenario(queue):
+        for i in range(5):
+            queue.enqueue("g1", f"question {i}", f"answer {i}")
+
+    queue, contents = _run(tmp_path, monkeypatch, scenario, batch_size=2)
+    assert [content for _, _, content in contents][::2] == [f"question {i}" for i in range(5)]
+    assert queue.stats()["flushes"] == 3
+
+
+def test_failed_batch_is_retried(tmp_path, monkeypatch):
+    async def scenario(queue):
+        queue.enqueue("g1", "question", "answer")
+
+    queue, contents = _run(tmp_path, monkeypatch, scenario, failures=2, max_retries=3)
+    assert [content for _, _, content in contents] == ["question", "answer"]
+    assert queue.stats()["retries"] == 2
+    assert queue.stats()["dropped"] == 0
+
+
+def test_turn_is_dropped_after_max_retries(tmp_path, monkeypatch):
+    async def scenario(queue):
+        queue.enqueue("g1", "question", "answer")
+
+    queue, contents = _run(tmp_path, monkeypatch, scenario, failures=10, max_retries=2)
+    assert contents == []
+    assert queue.stats()["retries"] == 2
+    assert queue.stats()["dropped"] == 1
+
+
+def test_turns_for_deleted_groups_are_skipped(tmp_path, monkeypatch):
+    async def scenario(queue):
+        queue.enqueue("gone", "lost question", "lost answer")
+        queue.enqueue("g1", "question", "answer")
+
+    queue, contents = _run(tmp_path, monkeypatch, scenario)
+    assert [content for _, _, content in contents] == ["question", "answer"]
+    assert queue.stats()["skipped"] == 1
+
+
+def test_retried_turns_drain_ahead_of_newer_turns():
+    async def run():
+        queue = TurnPersistenceQueue(batch_size=10)
+        queue._queue = asyncio.Queue()
+        old = ("g1", "old question", "old answer", None, 1)
+        queue._pending_retries = [(0.0, old)]
+        queue._queue.put_nowait(("g1", "newest question", "newest answer", None, 0))
+        return queue._drain(("g1", "new question", "new answer", None, 0))
+
+    assert [turn[1] for turn in asyncio.run(run())] == ["old question", "new question", "newest question"]
+
+
+def test_restart_keeps_turns_left_by_the_previous_worker(tmp_path, monkeypatch):
+    async def scenario(queue):
+        # A worker that died (or timed out stopping) left turns behind
+        queue.enqueue("g1", "question", "answer")
+        queue._task.cancel()
+        await asyncio.sleep(0)
+        queue.enqueue("g1", "later question", "later answer")
+
+    queue, contents = _run(tmp_path, monkeypatch, scenario)
+    assert [content for _, _, content in contents] == ["question", "answer", "later question", "later answer"]
+    assert queue.stats()["stored"] == 2
@@ -0,0 +1,33 @@
+"""SemanticResponseCache: hits need both the similarity threshold and the same content words."""
+import numpy as np
+from backend.response_cache import SemanticResponseCache, query_terms
+
+VECTOR = np.full(4, 0.5, dtype=np.float32)
+APPROVED = {"verdict": "approved"}
+
+
+def make_cache() -> SemanticResponseCache:
+    cache = SemanticResponseCache(threshold=0.9, enabled=True)
+    cache.store(cache.scope("g1"), "What is the capital of France?", VECTOR, "Paris", APPROVED)
+    return cache
+
+
+def test_query_terms_drop_case_punctuation_and_stopwords():
+    assert query_terms("What's the capital of France?") == {"capital", "france"}
+
+
+def test_rephrased_question_with_same_terms_hits():
+    cache = make_cache()
+    hit = cache.lookup(cache.scope("g1"), "what is the capital of france", VECTOR)
+    assert hit["response"] == "Paris"
+
+
+def test_similar_embedding_with_different_terms_misses():
+    cache = make_cache()
+    assert cache.lookup(cache.scope("g1"), "What is the capital of Spain?", VECTOR) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_other_scope_misses():
+    cache = make_cache()
+    assert cache.lookup(cache.scope("g2"), "What is the capital of France?", VECTOR) is None
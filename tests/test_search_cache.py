@@ -0,0 +1,142 @@
+"""SearchCache: TTL expiry, error non-caching and single-flight sharing."""
+import asyncio
+import types
+import pytest
+from backend import search_cache as search_cache_module
+from backend.search_cache import SearchCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class FakeTavily:
+    """Stands in for TavilySearch, returning the queued results in order."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+        self.release = None
+
+    def _next(self):
+        self.calls += 1
+        return self.results.pop(0) if len(self.results) > 1 else self.results[0]
+
+    def invoke(self, query):
+        return self._next()
+
+    async def ainvoke(self, query):
+        if self.release is not None:
+            await self.release.wait()
+        return self._next()
+
+
+RESULTS = {"results": [{"url": "https://example.com", "content": "hit"}]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(search_cache_module, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture
+def tavily(monkeypatch):
+    tavily = FakeTavily([RESULTS])
+    monkeypatch.setattr(search_cache_module, "get_tavily_tool", lambda topic, max_results: tavily)
+    return tavily
+
+
+def test_hit_within_ttl_and_miss_after_expiry(clock, tavily):
+    cache = SearchCache(news_ttl=10, evergreen_ttl=100)
+    assert cache.search("Python decorators") == RESULTS
+    clock.now += 99
+    assert cache.search("python decorators?") == RESULTS
+    assert tavily.calls == 1
+    clock.now += 2
+    cache.search("Python decorators")
+    assert tavily.calls == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_news_queries_use_the_short_ttl(clock, tavily):
+    cache = SearchCache(news_ttl=10, evergreen_ttl=100)
+    cache.search("latest news on rust")
+    clock.now += 11
+    cache.search("latest news on rust")
+    assert tavily.calls == 2
+
+
+@pytest.mark.parametrize("payload", [{"error": "rate limited"}, {"results": []}])
+def test_errors_and_empty_results_are_not_cached(clock, tavily, payload):
+    tavily.results = [payload, RESULTS]
+    cache = SearchCache()
+    assert cache.search("python decorators") == payload
+    assert cache.search("python decorators") == RESULTS
+    assert tavily.calls == 2
+    assert cache.stats()["uncached"] == 1
+
+
+def test_lru_evicts_the_oldest_entry(clock, tavily):
+    cache = SearchCache(max_entries=2)
+    for query in ("a", "b", "a", "c"):
+        cache.search(query)
+    assert cache.stats()["size"] == 2
+    cache.search("a")
+    cache.search("b")
+    assert tavily.calls == 4
+
+
+def test_concurrent_async_misses_share_one_call(clock, tavily):
+    async def run():
+        cache = SearchCache()
+        tavily.release = asyncio.Event()
+        tasks = [asyncio.create_task(cache.asearch("python decorators")) for _ in range(3)]
+        await asyncio.sleep(0)
+        tavily.release.set()
+        return cache, await asyncio.gather(*tasks)
+
+    cache, results = asyncio.run(run())
+    assert results == [RESULTS] * 3
+    assert tavily.calls == 1
+    assert cache.stats()["coalesced"] == 2
+
+
+def test_async_error_payload_resolves_followers_without_caching(clock, tavily):
+    tavily.results = [{"error": "boom"}, RESULTS]
+
+    async def run():
+        cache = SearchCache()
+        tavily.release = asyncio.Event()
+        tasks = [asyncio.create_task(cache.asearch("python decorators")) for _ in range(2)]
+        await asyncio.sleep(0)
+        tavily.release.set()
+        first = await asyncio.gather(*tasks)
+        return first, await cache.asearch("python decorators")
+
+    first, second = asyncio.run(run())
+    assert first == [{"error": "boom"}] * 2
+    assert second == RESULTS
+
+
+def test_cancelled_leader_does_not_cancel_followers(clock, tavily):
+    async def run():
+        cache = SearchCache()
+        tavily.release = asyncio.Event()
+        leader = asyncio.create_task(cache.asearch("python decorators"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.asearch("python decorators"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        tavily.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == RESULTS
@@ -0,0 +1,82 @@
+"""ShortTermMemory: per-group ring buffers and LRU eviction by groups and characters."""
+import asyncio
+from backend.short_memory import ShortTermMemory
+
+
+def _messages(*contents):
+    return [{"role": "user", "content": content} for content in contents]
+
+
+def _contents(messages):
+    return [message["content"] for message in messages]
+
+
+def test_buffer_keeps_the_most_recent_messages():
+    memory = ShortTermMemory(messages_per_group=3, max_groups=10, max_chars=1000)
+    memory.load("g1", _messages("a", "b"))
+    memory.extend("g1", _messages("c", "d"))
+    assert _contents(memory.get("g1")) == ["b", "c", "d"]
+    assert memory.stats()["chars"] == 3
+
+
+def test_extend_ignores_groups_that_are_not_buffered():
+    memory = ShortTermMemory()
+    memory.extend("g1", _messages("a"))
+    assert memory.get("g1") is None
+    assert memory.stats()["misses"] == 1
+
+
+def test_least_recently_used_group_is_evicted_past_max_groups():
+    memory = ShortTermMemory(messages_per_group=5, max_groups=2, max_chars=1000)
+    memory.load("g1", _messages("a"))
+    memory.load("g2", _messages("b"))
+    memory.get("g1")
+    memory.load("g3", _messages("c"))
+    assert memory.get("g2") is None
+    assert _contents(memory.get("g1")) == ["a"]
+    assert _contents(memory.get("g3")) == ["c"]
+    assert memory.stats()["evictions"] == 1
+
+
+def test_groups_are_evicted_to_stay_under_max_chars():
+    memory = ShortTermMemory(messages_per_group=5, max_groups=10, max_chars=10)
+    memory.load("g1", _messages("aaaa"))
+    memory.load("g2", _messages("bbbb"))
+    memory.extend("g2", _messages("cccc"))
+    assert memory.get("g1") is None
+    assert memory.stats()["chars"] == 8
+
+
+def test_the_group_just_touched_is_never_evicted():
+    memory = ShortTermMemory(messages_per_group=5, max_groups=10, max_chars=5)
+    memory.load("g1", _messages("a"))
+    memory.load("g2", _messages("0123456789"))
+    assert memory.get("g1") is None
+    assert _contents(memory.get("g2")) == ["0123456789"]
+
+
+def test_invalidate_releases_the_groups_characters():
+    memory = ShortTermMemory()
+    memory.load("g1", _messages("abc", "de"))
+    memory.invalidate("g1")
+    assert memory.get("g1") is None
+    assert memory.stats()["chars"] == 0
+
+
+def test_loader_runs_only_on_a_miss():
+    memory = ShortTermMemory()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return _messages("from the database")
+
+    async def run():
+        first = await memory.aget_or_load("g1", loader)
+        second = await memory.aget_or_load("g1", loader)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert _contents(first) == _contents(second) == ["from the database"]
+    assert len(calls) == 1
+    assert _contents(memory.get_or_load("g2", lambda: _messages("sync"))) == ["sync"]
@@ -0,0 +1,134 @@
+"""NumpyVectorStore: add/delete/filter round-trips, persistence, compaction generations and destroy."""
+from typing import List
+import os
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from backend import vector_index
+from backend.vector_index import NumpyVectorStore
+
+WORDS = ["python", "rust", "cricket", "weather", "cooking", "music"]
+
+
+class WordEmbeddings(Embeddings):
+    """One dimension per known word, so similarity is word overlap."""
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(word in text.lower()) for word in WORDS] + [0.01]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def _doc(text, **metadata):
+    return Document(page_content=text, metadata=metadata)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NumpyVectorStore(WordEmbeddings(), str(tmp_path / "index"))
+    store.add_documents(
+        [
+            _doc("python tips", group="a", importance="high"),
+            _doc("rust tips", group="a", importance="low"),
+            _doc("python news", group="b", importance="high"),
+            _doc("cricket scores", group="b", importance="low"),
+        ],
+        ids=["p1", "r1", "p2", "c1"]
+    )
+    return store
+
+
+def _ids(documents):
+    return [doc.id for doc in documents]
+
+
+def test_search_ranks_by_similarity(store):
+    results = store.similarity_search_with_score("python", k=2)
+    assert sorted(_ids(doc for doc, _ in results)) == ["p1", "p2"]
+    assert [score for _, score in results] == pytest.approx([0.0, 0.0], abs=1e-3)
+
+
+def test_filter_matches_every_key(store):
+    assert _ids(store.similarity_search("python", k=4, filter={"group": "a"})) == ["p1", "r1"]
+    assert _ids(store.similarity_search("python", k=4, filter={"group": "b", "importance": "high"})) == ["p2"]
+    assert store.similarity_search("python", k=4, filter={"group": "c"}) == []
+
+
+def test_delete_hides_rows_from_search_and_lookup(store):
+    store.delete(["p1"])
+    assert "p1" not in _ids(store.similarity_search("python", k=4))
+    assert store.similarity_search("python", k=4, filter={"group": "a", "importance": "high"}) == []
+    assert store.get_by_ids(["p1", "r1"])[0].id == "r1"
+    assert len(store) == 3
+
+
+def test_readding_an_id_replaces_it(store):
+    store.add_documents([_doc("weather today", group="c")], ids=["p1"])
+    assert len(store) == 4
+    assert store.get_by_ids(["p1"])[0].page_content == "weather today"
+    assert store.similarity_search("python", k=4, filter={"group": "a"}) == store.similarity_search("rust", k=1)
+
+
+def test_state_survives_reopening(store):
+    store.delete(["r1"])
+    reopened = NumpyVectorStore(WordEmbeddings(), store.path)
+    assert len(reopened) == 3
+    assert _ids(reopened.similarity_search("python", k=4, filter={"group": "a"})) == ["p1"]
+
+
+def test_compaction_keeps_live_rows_and_filters(store, monkeypatch):
+    monkeypatch.setattr(vector_index, "_COMPACT_MIN_DELETED", 1)
+    store.delete(["p1", "r1"])
+    assert store._deleted == 0
+    assert _ids(store.similarity_search("python", k=4, filter={"group": "b"})) == ["p2", "c1"]
+    reopened = NumpyVectorStore(WordEmbeddings(), store.path)
+    assert sorted(_ids(reopened.similarity_search("cricket", k=4))) == ["c1", "p2"]
+
+
+def test_duplicate_ids_in_one_batch_keep_the_last(store):
+    store.add_documents([_doc("weather today"), _doc("music tonight")], ids=["w1", "w1"])
+    assert len(store) == 5
+    assert store.get_by_ids(["w1"])[0].page_content == "music tonight"
+    assert store.similarity_search("weather", k=1)[0].id != "w1"
+    assert len(NumpyVectorStore(WordEmbeddings(), store.path)) == 5
+
+
+def test_appends_trigger_compaction(store, monkeypatch):
+    monkeypatch.setattr(vector_index, "_COMPACT_MIN_DELETED", 2)
+    store.add_documents([_doc("rust news"), _doc("python tricks")], ids=["r1", "p1"])
+    assert store._deleted == 0
+    assert len(store) == 4
+
+
+def test_compaction_switches_generation_in_one_step(store, monkeypatch):
+    monkeypatch.setattr(vector_index, "_COMPACT_MIN_DELETED", 1)
+    store.delete(["p1", "r1"])
+    assert sorted(os.listdir(store.path)) == ["CURRENT", "gen-1"]
+    # An unfinished compaction left behind is ignored and removed on open
+    os.makedirs(os.path.join(store.path, "gen-2"))
+    with open(os.path.join(store.path, "gen-2", "meta.jsonl"), "w") as f:
+        f.write('{"id": "partial", "text": "music", "metadata": {}}\n')
+    reopened = NumpyVectorStore(WordEmbeddings(), store.path)
+    assert sorted(_ids(reopened.similarity_search("music", k=4))) == ["c1", "p2"]
+    assert sorted(os.listdir(store.path)) == ["CURRENT", "gen-1"]
+
+
+def test_closed_store_reopens_on_next_use(store):
+    store.delete(["c1"])
+    store.close()
+    assert store._vectors is None
+    assert _ids(store.similarity_search("python", k=4, filter={"group": "b"})) == ["p2"]
+    store.add_documents([_doc("cricket scores", group="b")], ids=["c2"])
+    assert len(NumpyVectorStore(WordEmbeddings(), store.path)) == 4
+
+
+def test_destroy_then_reuse_the_same_instance(store):
+    store.destroy()
+    assert len(store) == 0
+    assert store.similarity_search("python", k=4) == []
+    store.add_documents([_doc("music playlist", group="a")], ids=["m1"])
+    assert _ids(store.similarity_search("music", k=4, filter={"group": "a"})) == ["m1"]
+    store.delete(["m1"])
+    assert store.similarity_search("music", k=4) == []
+    assert len(NumpyVectorStore(WordEmbeddings(), store.path)) == 0